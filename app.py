@@ -1,31 +1,213 @@
 # app.py (VERSIÓN FINAL PARA RENDER)
 import os 
+import base64
+import csv
+import io
+import json
+import hashlib
+import queue
+import tempfile
+import threading
+import time
+from functools import wraps
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
 import psycopg2 
 import psycopg2.extras 
-from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, make_response
+from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, make_response, g, has_app_context, has_request_context, session, send_file, Response, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 from whitenoise import WhiteNoise # ¡NUEVO!
+from db_pool import ConnectionPool
+from fast_json import FastJSONProvider, columns_of, rows_payload
+from http_cache import HttpCache, version_etag
+from metrics import MetricsRegistry
+from query_trace import QueryTracer
+from ttl_cache import TTLCache
+from pdf_cache import PdfCache
+from pdf_export import PdfExportJobs
+import rollups
+from quote_numbers import allocate_quote_number
+from quote_import import DEFAULT_APPROVAL_THRESHOLD, import_quotes, quote_status_for
+from catalog_search import CatalogSearch
+from catalog_import import import_catalog_csv
+from pg_listener import PgListener
+import queries
+from static_assets import STATIC_DIR, is_fingerprinted, load_manifest
+from passwords import DEFAULT_METHOD as DEFAULT_PASSWORD_METHOD, PasswordHashBusy, PasswordHasher
+import dashboard_events
+from dashboard_events import EventBroker
 
 # Importaciones para el PDF
-import io
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_RIGHT
-from reportlab.lib.utils import ImageReader
+from pdf_render import LOGO as PDF_LOGO, clean_text, fetch_quote_for_pdf, render_quote_pdf
 
 # --- CONFIGURACIÓN Y APP FLASK ---
 app = Flask(__name__)
+# jsonify() con orjson (mismo JSON que antes, ver fast_json.py)
+app.json = FastJSONProvider(app)
 # ¡NUEVO! Configurar WhiteNoise para servir archivos estáticos (CSS, logos, etc.)
-# Busca una carpeta llamada 'static' y la sirve.
-app.wsgi_app = WhiteNoise(app.wsgi_app, root=os.path.join(os.path.dirname(__file__), 'static'))
+# Sirve la carpeta 'static' en /static/, con los .gz/.br de static/dist si el
+# cliente los acepta; lo de dist/ lleva hash en el nombre y se cachea un año.
+app.wsgi_app = WhiteNoise(app.wsgi_app, root=STATIC_DIR, prefix='static/', immutable_file_test=is_fingerprinted)
+# Nombre original -> nombre con hash (python static_assets.py); vacío si no se generó.
+# STATIC_ASSET_MANIFEST=false para desarrollar editando static/ sin regenerar.
+asset_manifest = load_manifest() if os.environ.get('STATIC_ASSET_MANIFEST', 'true').lower() in ('1', 'true', 'yes') else {}
+
+
+@app.template_global()
+def asset_url(name):
+    """URL de un archivo de static/ para las plantillas: la versión con hash si existe."""
+    return url_for('static', filename=asset_manifest.get(name, name))
 
 # Lee la clave secreta desde las variables de entorno de Render
 app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', 'una-clave-secreta-de-respaldo-muy-dificil')
 
+# Pool de conexiones (uno por worker). Ajustar con variables de entorno en Render.
+app.config['DB_POOL_MIN'] = int(os.environ.get('DB_POOL_MIN', 1))
+app.config['DB_POOL_MAX'] = int(os.environ.get('DB_POOL_MAX', 10))
+app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+app.config['DB_POOL_MAX_USES'] = int(os.environ.get('DB_POOL_MAX_USES', 1000))
+app.config['DB_POOL_HEALTH_CHECK'] = os.environ.get('DB_POOL_HEALTH_CHECK', 'true').lower() in ('1', 'true', 'yes')
+
+# --- MÉTRICAS (Prometheus en /metrics, ver metrics.py) ---
+# Cada worker guarda una foto en METRICS_DIR cada METRICS_FLUSH_SECONDS y
+# /metrics suma las de todos; los contadores de workers que ya terminaron se
+# acumulan en un solo archivo. Si METRICS_TOKEN está definido, /metrics exige
+# 'Authorization: Bearer <token>'.
+app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'genuino_metrics'))
+app.config['METRICS_FLUSH_SECONDS'] = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+metrics_registry = MetricsRegistry(app.config['METRICS_DIR'], flush_interval=app.config['METRICS_FLUSH_SECONDS'])
+HTTP_REQUEST_SECONDS = metrics_registry.histogram(
+    'http_request_duration_seconds', 'Duración de las peticiones por ruta', ('route', 'method'))
+HTTP_REQUESTS = metrics_registry.counter(
+    'http_requests_total', 'Peticiones por ruta y código de estado', ('route', 'method', 'status'))
+HTTP_EXCEPTIONS = metrics_registry.counter(
+    'http_exceptions_total', 'Excepciones no controladas por ruta', ('route',))
+DB_QUERIES_PER_REQUEST = metrics_registry.histogram(
+    'db_queries_per_request', 'Consultas a la BD por petición', ('route',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100))
+DB_SECONDS_PER_REQUEST = metrics_registry.histogram(
+    'db_time_per_request_seconds', 'Tiempo en consultas a la BD por petición', ('route',))
+DB_CONNECT_SECONDS = metrics_registry.histogram(
+    'db_connect_duration_seconds', 'Tiempo para abrir una conexión nueva del pool')
+PDF_RENDER_SECONDS = metrics_registry.histogram(
+    'pdf_render_duration_seconds', 'Tiempo de generación de un PDF de cotización')
+DB_SLOW_QUERIES = metrics_registry.counter(
+    'db_slow_queries_total', 'Consultas por encima de QUERY_SLOW_MS', ('route',))
+DB_N_PLUS_ONE = metrics_registry.counter(
+    'db_n_plus_one_total', 'Peticiones que repitieron una sentencia más de QUERY_N_PLUS_ONE_THRESHOLD veces', ('route',))
+
+# --- TRAZA DE CONSULTAS (ver query_trace.py) ---
+# QUERY_SLOW_MS: umbral del registro de consultas lentas (0 lo desactiva).
+# QUERY_EXPLAIN_SLOW: además registra su EXPLAIN ANALYZE (vuelve a ejecutarla).
+# QUERY_N_PLUS_ONE_THRESHOLD: repeticiones de una misma sentencia por petición
+# antes de avisar (0 lo desactiva); con QUERY_N_PLUS_ONE_RAISE la petición
+# falla, pensado para correr las pruebas con el detector estricto.
+app.config['QUERY_SLOW_MS'] = float(os.environ.get('QUERY_SLOW_MS', 200))
+app.config['QUERY_EXPLAIN_SLOW'] = os.environ.get('QUERY_EXPLAIN_SLOW', 'false').lower() in ('1', 'true', 'yes')
+app.config['QUERY_N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('QUERY_N_PLUS_ONE_THRESHOLD', 10))
+app.config['QUERY_N_PLUS_ONE_RAISE'] = os.environ.get('QUERY_N_PLUS_ONE_RAISE', 'false').lower() in ('1', 'true', 'yes')
+query_tracer = QueryTracer(
+    slow_threshold=app.config['QUERY_SLOW_MS'] / 1000 if app.config['QUERY_SLOW_MS'] > 0 else None,
+    explain_slow=app.config['QUERY_EXPLAIN_SLOW'],
+    n_plus_one_threshold=app.config['QUERY_N_PLUS_ONE_THRESHOLD'],
+    raise_on_n_plus_one=app.config['QUERY_N_PLUS_ONE_RAISE'],
+)
+
+def _metrics_route():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+def _record_query(elapsed, cursor, sql, params, ok=True):
+    trace = None
+    if has_app_context():
+        g.db_queries = g.get('db_queries', 0) + 1
+        g.db_time = g.get('db_time', 0.0) + elapsed
+        trace = g.get('query_trace')
+    if query_tracer.record(trace, elapsed, cursor, sql, params, ok):
+        DB_SLOW_QUERIES.inc(trace.label if trace is not None else 'background')
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_start = time.perf_counter()
+    g.query_trace = query_tracer.start(_metrics_route())
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.get('metrics_start')
+    if start is not None:
+        route = _metrics_route()
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, route, request.method)
+        HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+        DB_QUERIES_PER_REQUEST.observe(g.get('db_queries', 0), route)
+        DB_SECONDS_PER_REQUEST.observe(g.get('db_time', 0.0), route)
+    metrics_registry.maybe_flush()
+    trace = g.pop('query_trace', None)
+    try:
+        offenders = query_tracer.finish(trace)
+    except Exception:
+        DB_N_PLUS_ONE.inc(trace.label)
+        raise
+    if offenders:
+        DB_N_PLUS_ONE.inc(trace.label)
+    return response
+
+@app.teardown_request
+def record_request_exception(exc):
+    if exc is not None:
+        HTTP_EXCEPTIONS.inc(_metrics_route())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return 'No autorizado', 401
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+# --- ETAG Y COMPRESIÓN (ver http_cache.py) ---
+# Los GET JSON de /api/ llevan ETag (por versión o por contenido) y un
+# navegador que ya tiene esa versión recibe 304. Las respuestas de texto de
+# más de COMPRESS_MIN_BYTES van con brotli/gzip. Se registra después de las
+# métricas para correr antes que ellas (Flask invierte el orden).
+app.config['COMPRESS_MIN_BYTES'] = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+http_cache = HttpCache(min_size=app.config['COMPRESS_MIN_BYTES'])
+
+def etag_from_version(load_version):
+    """El ETag sale de un sello de versión leído antes de la vista: con If-None-Match vigente, 304 sin ejecutarla.
+
+    El sello se lee antes que los datos, así que el ETag nunca es más nuevo que
+    el cuerpo que acompaña.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = version_etag(request.full_path, load_version())
+            matched = http_cache.client_has(request, etag)
+            if matched:
+                return http_cache.not_modified(app.response_class, matched)
+            g.version_etag = etag
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def bump_version(cursor, key):
+    """Incrementa el sello `key` de app_settings; llamar dentro de la transacción que escribe."""
+    cursor.execute(queries.BUMP_VERSION_SQL, (key,))
+
+def load_version(key):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(queries.LOAD_VERSION_SQL, (key,))
+    row = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    return row[0] if row else '0'
+
+@app.after_request
+def finalize_response(response):
+    return http_cache.finalize(request, response, etag=g.pop('version_etag', None),
+                               add_etag=request.path.startswith('/api/'))
+
 # --- CONFIGURACIÓN DE FLASK-LOGIN ---
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -34,33 +216,227 @@ login_manager.login_message = 'Por favor, inicie sesión para acceder.'
 
 # --- CLASE DE USUARIO Y LOADER ---
 class User(UserMixin):
-    def __init__(self, id, email, fullname, role):
+    def __init__(self, id, email, fullname, role, active=True):
         self.id = id
         self.email = email
         self.fullname = fullname
         self.role = role
+        self.active = active
+
+    @property
+    def is_active(self):
+        return self.active
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(id=row['id'], email=row['email'], fullname=row['fullname'], role=row['role'],
+                   active=bool(row.get('is_active', True)))
+
+    def to_snapshot(self):
+        return {'id': self.id, 'email': self.email, 'fullname': self.fullname, 'role': self.role,
+                'active': self.active, 'ts': time.time()}
+
+# Caché de usuarios por worker: evita el SELECT de load_user en cada petición.
+# update_user/create_user la invalidan; en los demás workers expira por TTL.
+app.config['USER_CACHE_TTL'] = float(os.environ.get('USER_CACHE_TTL', 60))
+app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 1000))
+# Opcional: confiar en una copia del usuario guardada en la cookie de sesión
+# (firmada con SECRET_KEY) durante USER_SESSION_TTL segundos.
+app.config['USER_SESSION_SNAPSHOT'] = os.environ.get('USER_SESSION_SNAPSHOT', 'false').lower() in ('1', 'true', 'yes')
+app.config['USER_SESSION_TTL'] = float(os.environ.get('USER_SESSION_TTL', 30))
+user_cache = TTLCache(maxsize=app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL'])
+# Cuándo se invalidó cada usuario; pasado USER_SESSION_TTL ninguna copia en
+# sesión anterior a la invalidación sigue siendo válida, así que la entrada expira.
+_user_invalidated_at = TTLCache(maxsize=100000, ttl=app.config['USER_SESSION_TTL'])
+
+def invalidate_user(user_id):
+    user_cache.pop(str(user_id))
+    _user_invalidated_at.set(str(user_id), time.time())
+
+def _user_from_session(user_id):
+    if not app.config['USER_SESSION_SNAPSHOT']:
+        return None
+    snapshot = session.get('user_snapshot')
+    if not snapshot or str(snapshot.get('id')) != str(user_id):
+        return None
+    issued = snapshot.get('ts', 0)
+    if time.time() - issued > app.config['USER_SESSION_TTL']:
+        return None
+    if issued <= _user_invalidated_at.get(str(user_id), 0):
+        return None
+    # Copias sin 'active' (formato anterior) o de un usuario inactivo: se relee de la BD.
+    if not snapshot.get('active'):
+        return None
+    return User(id=snapshot['id'], email=snapshot['email'], fullname=snapshot['fullname'], role=snapshot['role'],
+                active=True)
+
+def _remember_user(user):
+    user_cache.set(str(user.id), user)
+    if app.config['USER_SESSION_SNAPSHOT'] and has_request_context():
+        session['user_snapshot'] = user.to_snapshot()
 
 @login_manager.user_loader
 def load_user(user_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) 
-    cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-    user_row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    if user_row:
-        return User(id=user_row['id'], email=user_row['email'], fullname=user_row['fullname'], role=user_row['role'])
-    return None
+    user = user_cache.get(str(user_id))
+    if user is None:
+        user = _user_from_session(user_id)
+        if user is not None:
+            user_cache.set(str(user_id), user)
+    if user is None:
+        conn = get_db_connection()
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) 
+        cursor.execute("SELECT id, email, fullname, role, is_active FROM users WHERE id = %s", (user_id,))
+        user_row = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        if not user_row:
+            return None
+        user = User.from_row(user_row)
+        _remember_user(user)
+    # Un usuario desactivado pierde la sesión en cuanto se invalida su entrada.
+    return user if user.is_active else None
 
 # --- CONEXIÓN A BD (POSTGRESQL) ---
+_db_pool = None
+_db_pool_pid = None
+_db_pool_lock = threading.Lock()
+
+def get_db_pool():
+    # El pool se crea en el primer uso de cada proceso: gunicorn hace fork
+    # de los workers y las conexiones no pueden cruzar procesos.
+    global _db_pool, _db_pool_pid
+    if _db_pool is None or _db_pool_pid != os.getpid():
+        with _db_pool_lock:
+            if _db_pool is None or _db_pool_pid != os.getpid():
+                _db_pool = ConnectionPool(
+                    os.environ.get('DATABASE_URL'),
+                    minconn=app.config['DB_POOL_MIN'],
+                    maxconn=app.config['DB_POOL_MAX'],
+                    timeout=app.config['DB_POOL_TIMEOUT'],
+                    max_uses=app.config['DB_POOL_MAX_USES'],
+                    health_check=app.config['DB_POOL_HEALTH_CHECK'],
+                    on_connect=DB_CONNECT_SECONDS.observe,
+                    on_query=_record_query,
+                )
+                _db_pool_pid = os.getpid()
+    return _db_pool
+
 def get_db_connection():
+    # Dentro de una petición devuelve SIEMPRE la misma conexión (load_user y la
+    # vista la comparten). conn.close() no hace nada: se devuelve en el teardown.
     try:
-        conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
-        return conn
+        if has_app_context():
+            conn = g.get('db_conn')
+            if conn is None or conn.closed:
+                conn = get_db_pool().acquire()
+                conn._request_bound = True
+                g.db_conn = conn
+            return conn
+        # Fuera de una petición (scripts): conn.close() la devuelve al pool.
+        return get_db_pool().acquire()
     except psycopg2.Error as err:
         print(f"Error al conectar a PostgreSQL: {err}")
         return None
 
+@app.teardown_appcontext
+def release_db_connection(exc):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        conn._pool.release(conn)
+
+# --- AJUSTES (app_settings) EN MEMORIA ---
+# Cada worker guarda todos los ajustes en memoria. Un trigger en app_settings
+# avisa por NOTIFY 'app_settings' (payload = setting_key) y el PgListener del
+# worker descarta la copia; SETTINGS_CACHE_MAX_AGE es solo la red de seguridad
+# por si LISTEN no está disponible (p. ej. detrás de pgbouncer).
+app.config['SETTINGS_CACHE_MAX_AGE'] = float(os.environ.get('SETTINGS_CACHE_MAX_AGE', 300))
+app.config['PG_LISTEN'] = os.environ.get('PG_LISTEN', 'true').lower() in ('1', 'true', 'yes')
+settings_cache = TTLCache(maxsize=1, ttl=app.config['SETTINGS_CACHE_MAX_AGE'])
+_settings_generation = 0
+_pg_listener = None
+_pg_listener_pid = None
+
+def invalidate_settings(setting_key=None):
+    global _settings_generation
+    _settings_generation += 1
+    settings_cache.clear()
+
+def _on_app_settings_notify(setting_key):
+    invalidate_settings(setting_key)
+    if setting_key in (None, 'catalog_version'):
+        catalog_search.invalidate()
+
+def get_pg_listener():
+    # Igual que el pool: un hilo por proceso, arrancado después del fork.
+    global _pg_listener, _pg_listener_pid
+    if not app.config['PG_LISTEN']:
+        return None
+    if _pg_listener is None or _pg_listener_pid != os.getpid():
+        with _db_pool_lock:
+            if _pg_listener is None or _pg_listener_pid != os.getpid():
+                listener = PgListener(os.environ.get('DATABASE_URL'))
+                listener.subscribe('app_settings', _on_app_settings_notify)
+                listener.subscribe(dashboard_events.CHANNEL, dashboard_broker.publish)
+                listener.subscribe(dashboard_events.CHANNEL, _on_quote_or_order_notify)
+                _pg_listener = listener.start()
+                _pg_listener_pid = os.getpid()
+    return _pg_listener
+
+@app.before_request
+def start_pg_listener():
+    get_pg_listener()
+
+def get_setting(key, default=None):
+    settings = settings_cache.get('all')
+    if settings is None:
+        generation = _settings_generation
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT setting_key, setting_value FROM app_settings")
+        settings = dict(cursor.fetchall())
+        cursor.close()
+        conn.close()
+        # Si llegó un aviso mientras se leía, no se guarda (podría ser viejo).
+        if generation == _settings_generation:
+            settings_cache.set('all', settings)
+    return settings.get(key, default)
+
+def get_approval_threshold_setting():
+    return float(get_setting('approval_threshold', DEFAULT_APPROVAL_THRESHOLD))
+
+# --- CONTRASEÑAS (ver passwords.py) ---
+# Como mucho PASSWORD_HASH_CONCURRENCY hashes a la vez por worker; el resto
+# espera hasta PASSWORD_HASH_QUEUE_TIMEOUT segundos y luego recibe un 503.
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_PASSWORD_METHOD)
+app.config['PASSWORD_HASH_CONCURRENCY'] = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', 2))
+app.config['PASSWORD_HASH_QUEUE_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+password_hasher = PasswordHasher(app.config['PASSWORD_HASH_METHOD'],
+                                 max_concurrency=app.config['PASSWORD_HASH_CONCURRENCY'],
+                                 queue_timeout=app.config['PASSWORD_HASH_QUEUE_TIMEOUT'])
+PASSWORD_BUSY_MESSAGE = 'El servidor está ocupado, intenta de nuevo en unos segundos.'
+
+def _rehash_password_if_needed(user_row, password):
+    # Si cambiaron los parámetros, el hash se regenera con la contraseña que
+    # acaba de verificarse. Solo si nadie la cambió entretanto.
+    if not password_hasher.needs_rehash(user_row['password_hash']):
+        return
+    try:
+        new_hash = password_hasher.hash(password)
+    except PasswordHashBusy:
+        return  # se intentará en el próximo login
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s",
+                       (new_hash, user_row['id'], user_row['password_hash']))
+        conn.commit()
+    except psycopg2.Error as err:
+        conn.rollback()
+        print(f"No se pudo regenerar el hash del usuario {user_row['id']}: {err}")
+    finally:
+        cursor.close()
+        conn.close()
+
 # --- RUTAS DE AUTENTICACIÓN ---
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -73,10 +449,18 @@ def login():
         user_row = cursor.fetchone()
         cursor.close()
         conn.close()
-        if user_row and check_password_hash(user_row['password_hash'], password):
-            user = User(id=user_row['id'], email=user_row['email'], fullname=user_row['fullname'], role=user_row['role'])
-            login_user(user)
-            return redirect(url_for('my_quotes_page'))
+        try:
+            password_ok = bool(user_row) and password_hasher.verify(user_row['password_hash'], password or '')
+        except PasswordHashBusy:
+            flash(PASSWORD_BUSY_MESSAGE, 'warning')
+            return render_template('login.html'), 503
+        if password_ok:
+            user = User.from_row(user_row)
+            if login_user(user):
+                _remember_user(user)
+                _rehash_password_if_needed(user_row, password)
+                return redirect(url_for('my_quotes_page'))
+            flash('Tu usuario está desactivado.', 'danger')
         else:
             flash('Email o contraseña incorrectos.', 'danger')
     return render_template('login.html')
@@ -85,6 +469,7 @@ def login():
 @login_required
 def logout():
     logout_user()
+    session.pop('user_snapshot', None)
     return redirect(url_for('login'))
 
 # --- RUTAS DEL FRONTEND ---
@@ -133,6 +518,12 @@ def client_login_page(): return render_template('client_login.html')
 @app.route('/client/portal')
 def client_portal_page(): return render_template('client_portal.html')
 
+@app.route('/api/admin/db-pool', methods=['GET'])
+@login_required
+def get_db_pool_stats():
+    if current_user.role != 'Jefe de Ventas': return jsonify({'error': 'No autorizado'}), 403
+    return jsonify(get_db_pool().stats())
+
 # Helper para convertir tuplas a diccionarios
 def fetchall_dict(cursor):
     columns = [col[0] for col in cursor.description]
@@ -144,17 +535,29 @@ def fetchone_dict(cursor):
     return dict(zip(columns, cursor.fetchone()))
 
 # --- APIs (MODIFICADAS PARA CURSORES DE PSYCOPG2) ---
+# Los listados leen tuplas con un cursor normal (sin armar un dict por fila en
+# RealDictCursor) y aceptan ?format=columns para recibir los nombres de las
+# columnas una sola vez: {"columns": [...], "rows": [[...], ...]}.
+def _columnar_requested():
+    return request.args.get('format') == 'columns'
+
+def json_rows(cursor):
+    return jsonify(rows_payload(columns_of(cursor), cursor.fetchall(), _columnar_requested()))
+
+# La lista de usuarios cambia solo en create_user/update_user, que incrementan
+# 'users_version'; depende además de quién la pide (se excluye a sí mismo).
 @app.route('/api/users', methods=['GET'])
 @login_required
+@etag_from_version(lambda: f"{current_user.id}:{load_version('users_version')}")
 def get_users():
     if current_user.role != 'Jefe de Ventas': return jsonify({'error': 'No autorizado'}), 403
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    cursor = conn.cursor()
     cursor.execute("SELECT id, fullname, email, role, is_active FROM users WHERE id != %s ORDER BY fullname", (current_user.id,))
-    users = cursor.fetchall()
+    response = json_rows(cursor)
     cursor.close()
     conn.close()
-    return jsonify(users)
+    return response
 #
 # BUSCA Y REEMPLAZA ESTA FUNCIÓN: create_user
 #
@@ -166,15 +569,21 @@ def create_user():
     data = request.get_json()
     fullname, email, password, role = data.get('fullname'), data.get('email'), data.get('password'), data.get('role')
     if not all([fullname, email, password, role]): return jsonify({'error': 'Todos los campos son requeridos'}), 400
-    hashed_password = generate_password_hash(password)
+    try:
+        hashed_password = password_hasher.hash(password)
+    except PasswordHashBusy:
+        return jsonify({'error': PASSWORD_BUSY_MESSAGE}), 503
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
         # --- ¡CORRECCIÓN! ---
         # PostgreSQL es estricto. 'is_active' debe ser un booleano (True), no un entero (1).
-        cursor.execute("INSERT INTO users (fullname, email, password_hash, role, is_active) VALUES (%s, %s, %s, %s, %s)", 
+        cursor.execute("INSERT INTO users (fullname, email, password_hash, role, is_active) VALUES (%s, %s, %s, %s, %s) RETURNING id", 
                        (fullname, email, hashed_password, role, True)) # <-- CAMBIADO DE 1 a True
+        new_user_id = cursor.fetchone()[0]
+        bump_version(cursor, 'users_version')
         conn.commit()
+        invalidate_user(new_user_id)
     except psycopg2.Error as err:
         conn.rollback(); return jsonify({'error': 'El email ya está registrado'}), 409
     finally:
@@ -216,6 +625,11 @@ def update_user(user_id):
     is_active = bool(data.get('is_active')) 
     
     new_password = data.get('password')
+    # El hash se calcula antes de tomar la conexión (no retiene la transacción).
+    try:
+        hashed_password = password_hasher.hash(new_password) if new_password else None
+    except PasswordHashBusy:
+        return jsonify({'error': PASSWORD_BUSY_MESSAGE}), 503
     
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -231,14 +645,14 @@ def update_user(user_id):
         
         # 2. Lógica de actualización
         if new_password:
-            hashed_password = generate_password_hash(new_password)
             cursor.execute("UPDATE users SET fullname = %s, email = %s, role = %s, is_active = %s, password_hash = %s WHERE id = %s", 
                            (fullname, email, role, is_active, hashed_password, user_id)) # 'is_active' es ahora un booleano
         else:
             cursor.execute("UPDATE users SET fullname = %s, email = %s, role = %s, is_active = %s WHERE id = %s", 
                            (fullname, email, role, is_active, user_id)) # 'is_active' es ahora un booleano
-        
+        bump_version(cursor, 'users_version')
         conn.commit()
+        invalidate_user(user_id)
         
     except psycopg2.Error as err:
         conn.rollback()
@@ -253,60 +667,174 @@ def update_user(user_id):
         
     return jsonify({'message': 'Usuario actualizado correctamente'})
 
-#
-# BUSCA Y REEMPLAZA ESTA FUNCIÓN: get_my_quotes
-#
+# --- PAGINACIÓN DE COTIZACIONES (KEYSET SOBRE created_at, id) ---
+QUOTES_PAGE_DEFAULT = 50
+QUOTES_PAGE_MAX = 200
 
-@app.route('/api/my-quotes', methods=['GET'])
-@login_required
-def get_my_quotes():
+def _encode_quote_cursor(row):
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode_quote_cursor(cursor_value):
+    padded = cursor_value + '=' * (-len(cursor_value) % 4)
+    created_at, quote_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+    return datetime.fromisoformat(created_at), int(quote_id)
+
+def _quote_filters_from_args(args, allow_vendor):
+    """Convierte los parámetros de la URL en condiciones SQL. Lanza ValueError si son inválidos."""
+    where, params = [], []
+    filters = queries.QUOTE_FILTERS
+    if allow_vendor and args.get('vendor_id'):
+        where.append(filters['vendor_id']); params.append(int(args['vendor_id']))
+    if args.get('status'):
+        where.append(filters['status']); params.append(args['status'])
+    if args.get('customer_id'):
+        where.append(filters['customer_id']); params.append(int(args['customer_id']))
+    if args.get('date_from'):
+        where.append(filters['date_from']); params.append(date.fromisoformat(args['date_from']))
+    if args.get('date_to'):
+        # date_to es inclusivo: todo el día indicado
+        where.append(filters['date_to']); params.append(date.fromisoformat(args['date_to']) + timedelta(days=1))
+    return where, params
+
+def _paginated_quotes(select_sql, where, params, args):
+    """Devuelve una página de cotizaciones ordenadas por (created_at, id) descendente.
+
+    select_sql debe usar el alias q para quotes e incluir q.id y q.created_at.
+    Con ?with_total=1 se añade el total de filas que cumplen el filtro (es un
+    COUNT completo, por eso es opcional). Con ?format=columns la página trae
+    columns/rows en lugar de items.
+    """
+    limit = min(max(int(args.get('limit', QUOTES_PAGE_DEFAULT)), 1), QUOTES_PAGE_MAX)
+    page_where, page_params = list(where), list(params)
+    if args.get('cursor'):
+        cursor_created_at, cursor_id = _decode_quote_cursor(args['cursor'])
+        page_where.append(queries.QUOTE_PAGE_AFTER)
+        page_params += [cursor_created_at, cursor_id]
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    
+    cursor = conn.cursor()
     try:
-        # --- ¡CORRECCIÓN! ---
-        # Forzar la conversión a int() para asegurar la coincidencia de tipos
-        user_id_int = int(current_user.id)
-        
-        query = """
-        SELECT q.id, q.quote_number, q.created_at, q.total_amount, q.status, 
-               c.company_name, q.rejection_reason 
-        FROM quotes q 
-        JOIN customers c ON q.customer_id = c.id 
-        WHERE q.user_id = %s 
-        ORDER BY q.created_at DESC
-        """
-        cursor.execute(query, (user_id_int,))
-        quotes = cursor.fetchall()
-    except Exception as e:
-        print(f"Error en get_my_quotes: {e}") # Esto aparecerá en los logs de Render
-        quotes = [] # Devuelve una lista vacía en caso de error
+        cursor.execute(queries.quote_page_sql(select_sql, page_where), page_params + [limit + 1])
+        columns = columns_of(cursor)
+        rows = cursor.fetchall()
+        total = None
+        if args.get('with_total') in ('1', 'true'):
+            cursor.execute(queries.quote_count_sql(where), params)
+            total = cursor.fetchone()[0]
     finally:
         cursor.close()
         conn.close()
-        
-    return jsonify(quotes)
+    next_cursor = _encode_quote_cursor(dict(zip(columns, rows[limit - 1]))) if len(rows) > limit else None
+    page = {'next_cursor': next_cursor, 'total': total}
+    if args.get('format') == 'columns':
+        page.update(rows_payload(columns, rows[:limit], columnar=True))
+    else:
+        page['items'] = rows_payload(columns, rows[:limit])
+    return page
+
+@app.route('/api/my-quotes', methods=['GET'])
+@login_required
+def get_my_quotes():
+    # --- ¡CORRECCIÓN! ---
+    # Forzar la conversión a int() para asegurar la coincidencia de tipos
+    user_id_int = int(current_user.id)
+    try:
+        where, params = _quote_filters_from_args(request.args, allow_vendor=False)
+        where.insert(0, "q.user_id = %s"); params.insert(0, user_id_int)
+        page = _paginated_quotes(queries.MY_QUOTES_SELECT, where, params, request.args)
+    except ValueError:
+        return jsonify({'error': 'Parámetros de filtro o cursor inválidos'}), 400
+    except psycopg2.Error as e:
+        print(f"Error en get_my_quotes: {e}") # Esto aparecerá en los logs de Render
+        page = {'items': [], 'next_cursor': None, 'total': None} # Devuelve una lista vacía en caso de error
+    return jsonify(page)
 @app.route('/api/all-quotes', methods=['GET'])
 @login_required
 def get_all_quotes():
     if current_user.role != 'Jefe de Ventas': return jsonify({'error': 'No autorizado'}), 403
+    try:
+        where, params = _quote_filters_from_args(request.args, allow_vendor=True)
+        page = _paginated_quotes(queries.ALL_QUOTES_SELECT, where, params, request.args)
+    except ValueError:
+        return jsonify({'error': 'Parámetros de filtro o cursor inválidos'}), 400
+    return jsonify(page)
+def _load_customers_version():
+    """Sello de la lista de clientes a partir de sync_txid (sin leer la tabla).
+
+    El mayor sync_txid visible cambia con cada alta, cambio o borrado de una
+    transacción más nueva. Las que tienen un txid menor y siguen en curso
+    pueden confirmar después sin moverlo, así que el sello incluye la lista de
+    todas ellas (txid_snapshot_xip <= máximo): cuando cualquiera termina, la
+    lista cambia y con ella el ETag. Una transacción que termina sin tocar
+    clientes solo cuesta una recarga de más.
+    """
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute("SELECT q.id, q.quote_number, q.created_at, q.total_amount, q.status, c.company_name, q.rejection_reason, u.fullname as vendedor_name, u.id as user_id FROM quotes q JOIN customers c ON q.customer_id = c.id JOIN users u ON q.user_id = u.id ORDER BY q.created_at DESC")
-    quotes = cursor.fetchall()
+    cursor = conn.cursor()
+    cursor.execute(queries.CUSTOMERS_VERSION_SQL)
+    high, in_progress = cursor.fetchone()
     cursor.close()
     conn.close()
-    return jsonify(quotes)
+    stamp = str(high or 0)
+    return f"{stamp}:{','.join(map(str, in_progress))}" if in_progress else stamp
+
 @app.route('/api/customers', methods=['GET'])
 @login_required
+@etag_from_version(_load_customers_version)
 def get_customers():
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute("SELECT id, company_name, nit_ci FROM customers ORDER BY company_name")
-    customers = cursor.fetchall()
+    cursor = conn.cursor()
+    cursor.execute(queries.CUSTOMERS_SQL)
+    response = json_rows(cursor)
     cursor.close()
     conn.close()
-    return jsonify(customers)
+    return response
+# --- SINCRONIZACIÓN INCREMENTAL DE CLIENTES ---
+# Cada cliente guarda el txid de la transacción que lo escribió (sync_txid) y
+# los borrados dejan una lápida en customer_tombstones. El cursor devuelto es
+# el xmin del snapshot de la lectura: lo escrito por transacciones anteriores
+# ya viene en la respuesta y lo que seguía en curso tendrá un txid >= cursor,
+# así que la siguiente sincronización lo trae (puede repetir filas, nunca perderlas).
+@app.route('/api/customers/sync', methods=['GET'])
+@login_required
+def sync_customers():
+    since = request.args.get('since')
+    if since is not None:
+        if not since.isdigit():
+            return jsonify({'error': 'Parámetro since inválido'}), 400
+        since = int(since)
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    try:
+        cursor.execute("""
+            SELECT txid_snapshot_xmin(txid_current_snapshot()) AS cursor,
+                   md5((SELECT COUNT(*) || ':' || COALESCE(SUM(sync_txid), 0) FROM customers) || '/' ||
+                       (SELECT COUNT(*) || ':' || COALESCE(SUM(sync_txid), 0) FROM customer_tombstones)) AS etag
+        """)
+        state = cursor.fetchone()
+        # Sin cursor (o uno del futuro, p. ej. tras restaurar la base): snapshot completo.
+        full = since is None or since > state['cursor']
+        if full:
+            etag = state['etag']
+            if _not_modified(etag, None):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+            cursor.execute(queries.CUSTOMERS_SQL)
+            changed, deleted = cursor.fetchall(), []
+        else:
+            cursor.execute(queries.CUSTOMERS_CHANGED_SQL, (since,))
+            changed = cursor.fetchall()
+            cursor.execute(queries.CUSTOMERS_DELETED_SQL, (since,))
+            deleted = [row['customer_id'] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+    response = jsonify({'full': full, 'cursor': state['cursor'], 'customers': changed, 'deleted': deleted})
+    if full:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 @app.route('/api/customers', methods=['POST'])
 @login_required
 def create_customer():
@@ -329,17 +857,12 @@ def create_quote():
     data = request.get_json()
     user_id = current_user.id 
     conn = get_db_connection()
+    approval_threshold = get_approval_threshold_setting()
     cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute("SELECT setting_value FROM app_settings WHERE setting_key = 'approval_threshold'")
-    threshold_row = cursor.fetchone()
-    approval_threshold = float(threshold_row['setting_value']) if threshold_row else 10000.00
     total_amount = sum(item['quantity'] * item['unit_price'] for item in data['items'])
-    status = 'Pendiente de Aprobacion' if total_amount > approval_threshold else 'Aprobada'
+    status = quote_status_for(total_amount, approval_threshold)
     try:
-        cursor.execute("SELECT MAX(id) as max_id FROM quotes")
-        last_id_result = cursor.fetchone()
-        next_id = (last_id_result['max_id'] if last_id_result['max_id'] else 0) + 1
-        quote_number = f'COT-2025-{next_id:04d}'
+        quote_number = allocate_quote_number(cursor)
         
         cursor.execute('INSERT INTO quotes (customer_id, user_id, total_amount, status, quote_number) VALUES (%s, %s, %s, %s, %s) RETURNING id', (data['customer_id'], user_id, total_amount, status, quote_number))
         quote_id = cursor.fetchone()['id']
@@ -351,10 +874,14 @@ def create_quote():
                 item['quantity'], item['unit_price'], item['quantity'] * item['unit_price']
             ))
         
-        cursor.executemany(
-            'INSERT INTO quote_items (quote_id, type_id, code, description, quantity, unit_price, subtotal) VALUES (%s, %s, %s, %s, %s, %s, %s)', 
+        # Un solo INSERT con todas las filas (executemany hacía un viaje por ítem)
+        psycopg2.extras.execute_values(
+            cursor,
+            'INSERT INTO quote_items (quote_id, type_id, code, description, quantity, unit_price, subtotal) VALUES %s', 
             items_to_insert
         )
+        rollups.record_quote_created(cursor, quote_id)
+        dashboard_events.notify_quote(cursor, quote_id, 'created')
         conn.commit()
     except psycopg2.Error as e:
         conn.rollback(); return jsonify({'error': str(e)}), 500
@@ -362,26 +889,60 @@ def create_quote():
         cursor.close()
         conn.close()
     return jsonify({'message': f'Cotización creada con estado: {status}', 'quote_id': quote_id}), 201
+app.config['QUOTE_IMPORT_MAX'] = int(os.environ.get('QUOTE_IMPORT_MAX', 5000))
+@app.route('/api/quotes/batch', methods=['POST'])
+@login_required
+def create_quotes_batch():
+    if current_user.role != 'Jefe de Ventas': return jsonify({'error': 'No autorizado'}), 403
+    data = request.get_json() or {}
+    quotes = data.get('quotes')
+    if not isinstance(quotes, list) or not quotes:
+        return jsonify({'error': 'Se requiere una lista "quotes"'}), 400
+    if len(quotes) > app.config['QUOTE_IMPORT_MAX']:
+        return jsonify({'error': f"Máximo {app.config['QUOTE_IMPORT_MAX']} cotizaciones por lote"}), 400
+    conn = get_db_connection()
+    try:
+        result = import_quotes(conn, quotes, int(current_user.id),
+                               approval_threshold=get_approval_threshold_setting())
+    except psycopg2.Error as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+    status_code = 201 if result['created'] else 400
+    return jsonify(result), status_code
 @app.route('/api/quotes/pending', methods=['GET'])
 @login_required
 def get_pending_quotes():
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute("SELECT q.*, c.company_name, u.fullname as vendedor_name FROM quotes q JOIN customers c ON q.customer_id = c.id JOIN users u ON q.user_id = u.id WHERE q.status = 'Pendiente de Aprobacion' ORDER BY q.created_at DESC")
-    quotes = cursor.fetchall()
+    cursor = conn.cursor()
+    cursor.execute(queries.PENDING_QUOTES_SQL)
+    response = json_rows(cursor)
     cursor.close()
     conn.close()
-    return jsonify(quotes)
+    return response
 def update_quote_status(quote_id, new_status, reason=None):
     conn = get_db_connection()
     cursor = conn.cursor()
+    # El estado anterior se lee bloqueando la fila para mover la cotización en
+    # sales_rollup dentro de la misma transacción.
+    cursor.execute("SELECT status FROM quotes WHERE id = %s FOR UPDATE", (quote_id,))
+    row = cursor.fetchone()
+    if not row:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+        return jsonify({'error': 'Cotización no encontrada'}), 404
+    old_status = row[0]
     if reason:
-        cursor.execute("UPDATE quotes SET status = %s, rejection_reason = %s WHERE id = %s", (new_status, reason, quote_id))
+        cursor.execute("UPDATE quotes SET status = %s, rejection_reason = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s", (new_status, reason, quote_id))
     else:
-        cursor.execute("UPDATE quotes SET status = %s WHERE id = %s", (new_status, quote_id))
+        cursor.execute("UPDATE quotes SET status = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s", (new_status, quote_id))
+    rollups.record_status_change(cursor, quote_id, old_status, new_status)
+    dashboard_events.notify_quote(cursor, quote_id, 'approved' if new_status == 'Aprobada' else 'rejected')
     conn.commit()
     cursor.close()
     conn.close()
+    pdf_cache.invalidate(quote_id)
     return jsonify({'message': f'Cotización {quote_id} actualizada a {new_status}'})
 @app.route('/api/quotes/<int:quote_id>/approve', methods=['POST'])
 @login_required
@@ -393,78 +954,88 @@ def reject_quote(quote_id):
     data = request.get_json()
     reason = data.get('reason', 'Sin motivo específico.')
     return update_quote_status(quote_id, 'Rechazada', reason)
+# --- PORTAL DE CLIENTES ---
+# El login del portal entrega un token firmado (SECRET_KEY) con el id del
+# cliente; las rutas del portal lo exigen en vez de confiar en un client_id
+# de la URL. El resumen (cotizaciones aprobadas + pedidos) sale de una sola
+# consulta y se cachea por cliente unos segundos; los avisos 'dashboard' de
+# cotizaciones y pedidos descartan la entrada de ese cliente en cada worker.
+app.config['CLIENT_TOKEN_MAX_AGE'] = int(os.environ.get('CLIENT_TOKEN_MAX_AGE', 12 * 3600))
+app.config['CLIENT_PORTAL_CACHE_TTL'] = float(os.environ.get('CLIENT_PORTAL_CACHE_TTL', 30))
+app.config['CLIENT_PORTAL_CACHE_SIZE'] = int(os.environ.get('CLIENT_PORTAL_CACHE_SIZE', 1000))
+client_token_serializer = URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='client-portal')
+client_portal_cache = TTLCache(maxsize=app.config['CLIENT_PORTAL_CACHE_SIZE'], ttl=app.config['CLIENT_PORTAL_CACHE_TTL'])
+
+
+def _client_id_from_request():
+    token = request.args.get('token')
+    auth = request.headers.get('Authorization', '')
+    if auth.startswith('Bearer '):
+        token = auth[len('Bearer '):]
+    if not token:
+        return None
+    try:
+        return int(client_token_serializer.loads(token, max_age=app.config['CLIENT_TOKEN_MAX_AGE']))
+    except (BadSignature, ValueError, TypeError):
+        return None
+
+def _on_quote_or_order_notify(payload):
+    customer_id = None
+    if payload is not None:
+        try:
+            customer_id = json.loads(payload).get('customer_id')
+        except ValueError:
+            pass
+    if customer_id is None:
+        client_portal_cache.clear()
+    else:
+        client_portal_cache.pop(customer_id)
+
 @app.route('/api/client/login', methods=['POST'])
 def client_login():
     data = request.get_json()
     nit_ci = data.get('nit_ci')
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute("SELECT id, company_name FROM customers WHERE nit_ci = %s", (nit_ci,))
+    cursor.execute(queries.CUSTOMER_BY_NIT_SQL, (nit_ci,))
     client = cursor.fetchone()
     cursor.close()
     conn.close()
-    if client: return jsonify(client)
+    if client:
+        client['token'] = client_token_serializer.dumps(client['id'])
+        return jsonify(client)
     else: return jsonify({'error': 'Credenciales incorrectas'}), 401
 
-
-@app.route('/api/client/<int:client_id>/quotes')
-def get_client_quotes(client_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    try:
-        # --- ¡CORRECCIÓN! ---
-        # Forzar la conversión a int() para asegurar la coincidencia de tipos
-        customer_id_int = int(client_id)
-        
-        cursor.execute(
-            "SELECT id, quote_number, created_at, total_amount, status FROM quotes WHERE customer_id = %s AND status = 'Aprobada' ORDER BY created_at DESC", 
-            (customer_id_int,)
-        )
-        quotes = cursor.fetchall()
-    except Exception as e:
-        print(f"Error en get_client_quotes: {e}") # Para los logs de Render
-        quotes = []
-    finally:
-        cursor.close()
-        conn.close()
-    return jsonify(quotes)
-
-#
-# BUSCA Y REEMPLAZA ESTA FUNCIÓN: get_client_orders
-#
-
-@app.route('/api/client/<int:client_id>/orders')
-def get_client_orders(client_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    try:
-        # --- ¡CORRECCIÓN! ---
-        # Forzar la conversión a int() para asegurar la coincidencia de tipos
-        customer_id_int = int(client_id)
-        
-        cursor.execute(
-            "SELECT o.id, q.quote_number, q.created_at, o.order_status FROM orders o JOIN quotes q ON o.quote_id = q.id WHERE q.customer_id = %s ORDER BY q.created_at DESC", 
-            (customer_id_int,)
-        )
-        orders = cursor.fetchall()
-    except Exception as e:
-        print(f"Error en get_client_orders: {e}") # Para los logs de Render
-        orders = []
-    finally:
-        cursor.close()
-        conn.close()
-    return jsonify(orders)
+@app.route('/api/client/portal')
+def get_client_portal():
+    customer_id = _client_id_from_request()
+    if customer_id is None:
+        return jsonify({'error': 'Sesión de cliente inválida o vencida'}), 401
+    summary = client_portal_cache.get(customer_id)
+    if summary is None:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(queries.CLIENT_PORTAL_SQL, {'customer_id': customer_id})
+            summary = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+            conn.close()
+        client_portal_cache.set(customer_id, summary)
+    response = Response(summary, mimetype='application/json')
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
 
 @app.route('/api/quotes/approved', methods=['GET'])
 @login_required
 def get_approved_quotes():
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute("SELECT q.*, c.company_name, u.fullname as vendedor_name FROM quotes q JOIN customers c ON q.customer_id = c.id JOIN users u ON q.user_id = u.id WHERE q.status = 'Aprobada' AND q.id NOT IN (SELECT quote_id FROM orders) ORDER BY q.created_at DESC")
-    quotes = cursor.fetchall()
+    cursor = conn.cursor()
+    cursor.execute(queries.APPROVED_WITHOUT_ORDER_SQL)
+    response = json_rows(cursor)
     cursor.close()
     conn.close()
-    return jsonify(quotes)
+    return response
 @app.route('/api/orders', methods=['POST'])
 @login_required
 def create_order():
@@ -473,7 +1044,8 @@ def create_order():
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("INSERT INTO orders (quote_id, order_status) VALUES (%s, %s)", (quote_id, 'Pedido Confirmado'))
+        cursor.execute("INSERT INTO orders (quote_id, order_status) VALUES (%s, %s) RETURNING id", (quote_id, 'Pedido Confirmado'))
+        dashboard_events.notify_order(cursor, cursor.fetchone()[0], 'created')
         conn.commit()
     except psycopg2.Error:
         conn.rollback(); return jsonify({'error': 'Este pedido ya fue creado'}), 409
@@ -485,12 +1057,52 @@ def create_order():
 @login_required
 def get_active_orders():
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute("SELECT o.id, o.order_status, q.quote_number, c.company_name, q.id as quote_id, u.fullname as vendedor_name FROM orders o JOIN quotes q ON o.quote_id = q.id JOIN customers c ON q.customer_id = c.id JOIN users u ON q.user_id = u.id WHERE o.order_status != 'Listo para Entrega' ORDER BY o.last_update DESC")
-    orders = cursor.fetchall()
+    cursor = conn.cursor()
+    cursor.execute(queries.ACTIVE_ORDERS_SQL)
+    response = json_rows(cursor)
     cursor.close()
     conn.close()
-    return jsonify(orders)
+    return response
+# --- TABLERO EN VIVO (Server-Sent Events) ---
+# Un tablero abierto es un hilo esperando en una cola: no consulta la base
+# entre eventos. Necesita workers con hilos (gunicorn --worker-class gthread
+# --threads N) y se limita a DASHBOARD_STREAM_MAX_CLIENTS por worker. El
+# stream se corta cada DASHBOARD_STREAM_MAX_SECONDS y EventSource reconecta
+# solo (con retry), así ningún hilo queda tomado para siempre.
+app.config['DASHBOARD_STREAM_MAX_CLIENTS'] = int(os.environ.get('DASHBOARD_STREAM_MAX_CLIENTS', 50))
+app.config['DASHBOARD_STREAM_MAX_SECONDS'] = float(os.environ.get('DASHBOARD_STREAM_MAX_SECONDS', 300))
+app.config['DASHBOARD_STREAM_KEEPALIVE'] = float(os.environ.get('DASHBOARD_STREAM_KEEPALIVE', 15))
+dashboard_broker = EventBroker(max_clients=app.config['DASHBOARD_STREAM_MAX_CLIENTS'])
+
+def _dashboard_stream(client):
+    deadline = time.monotonic() + app.config['DASHBOARD_STREAM_MAX_SECONDS']
+    try:
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline:
+            try:
+                data = client.get(timeout=app.config['DASHBOARD_STREAM_KEEPALIVE'])
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            yield f"data: {data}\n\n"
+    finally:
+        dashboard_broker.unsubscribe(client)
+
+@app.route('/api/dashboard/stream', methods=['GET'])
+@login_required
+def dashboard_stream():
+    if current_user.role != 'Jefe de Ventas': return jsonify({'error': 'No autorizado'}), 403
+    if get_pg_listener() is None:
+        return jsonify({'error': 'Eventos en vivo desactivados (PG_LISTEN)'}), 503
+    client = dashboard_broker.subscribe()
+    if client is None:
+        return jsonify({'error': 'Demasiados tableros abiertos en este servidor'}), 503
+    # Sin stream_with_context a propósito: la conexión a la BD de la petición
+    # se devuelve al pool antes de empezar a transmitir.
+    response = Response(_dashboard_stream(client), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 @app.route('/api/orders/<int:order_id>/status', methods=['POST'])
 @login_required
 def update_order_status(order_id):
@@ -500,6 +1112,7 @@ def update_order_status(order_id):
     cursor = conn.cursor()
     try:
         cursor.execute("UPDATE orders SET order_status = %s, last_update = CURRENT_TIMESTAMP WHERE id = %s", (new_status, order_id))
+        dashboard_events.notify_order(cursor, order_id, 'status')
         conn.commit()
     except Exception as e:
         conn.rollback(); return jsonify({'error': str(e)}), 500
@@ -507,138 +1120,86 @@ def update_order_status(order_id):
         cursor.close()
         conn.close()
     return jsonify({'message': 'Estado del pedido actualizado.'})
-def clean_text(text):
-    if text is None: return ''
-    return str(text)
-def _generate_pdf_for_quote(quote_id):
+# --- CACHÉ DE PDFs ---
+# Cambiar PDF_RENDER_VERSION cuando cambie el diseño del PDF para no servir copias viejas.
+PDF_RENDER_VERSION = '2'
+app.config['PDF_CACHE_DIR'] = os.environ.get('PDF_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'genuino_pdf_cache'))
+app.config['PDF_CACHE_MAX_BYTES'] = int(os.environ.get('PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+pdf_cache = PdfCache(app.config['PDF_CACHE_DIR'], app.config['PDF_CACHE_MAX_BYTES'])
+
+def _logo_digest():
+    return hashlib.sha256(PDF_LOGO[0]).hexdigest() if PDF_LOGO else 'sin-logo'
+LOGO_DIGEST = _logo_digest()
+
+def _quote_pdf_fingerprint(quote_id):
+    """Huella de todo lo que aparece en el PDF, calculada en la BD sin traer los ítems."""
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute("SELECT q.*, c.company_name, c.nit_ci, c.contact_person, c.contact_email FROM quotes q JOIN customers c ON q.customer_id = c.id WHERE q.id = %s", (quote_id,))
-    quote = cursor.fetchone()
-    if not quote: 
-        cursor.close()
-        conn.close()
+    cursor.execute(queries.QUOTE_PDF_FINGERPRINT_SQL, (quote_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    if not row:
+        return None
+    key = hashlib.sha256(f"{row['content_hash']}|{LOGO_DIGEST}|{PDF_RENDER_VERSION}".encode()).hexdigest()[:32]
+    return {'quote_number': row['quote_number'], 'etag': key, 'cache_key': f"{row['id']}-{key}",
+            'last_modified': row['last_modified'].replace(tzinfo=timezone.utc) if row['last_modified'] else None}
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return bool(http_cache.client_has(request, etag))
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+def _generate_pdf_for_quote(quote_id):
+    meta = _quote_pdf_fingerprint(quote_id)
+    if not meta:
         return "Cotización no encontrada", 404
-    cursor.execute("SELECT * FROM catalog_types ORDER BY id")
-    types = cursor.fetchall()
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, 
-                            rightMargin=0.5*inch, leftMargin=0.5*inch, 
-                            topMargin=0.5*inch, bottomMargin=0.5*inch)
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='Right', alignment=TA_RIGHT, fontName='Helvetica'))
-    styles.add(ParagraphStyle(name='RightBold', alignment=TA_RIGHT, fontName='Helvetica-Bold'))
-    styles.add(ParagraphStyle(name='GroupHeader', fontName='Helvetica-Bold', fontSize=12, spaceBefore=12, spaceAfter=6))
-    styles['Normal'].fontName = 'Helvetica'
-    styles['Heading1'].fontName = 'Helvetica-Bold'
-    elements = []
-    basedir = os.path.abspath(os.path.dirname(__file__))
-    # WhiteNoise sirve desde 'static', así que la ruta base es el directorio de la app
-    logo_path = os.path.join(basedir, 'static', 'logo.png')
-    if os.path.exists(logo_path):
-        try:
-            img = ImageReader(logo_path)
-            img_width, img_height = img.getSize()
-            max_logo_width = 1.5 * inch 
-            aspect_ratio = img_height / float(img_width)
-            new_logo_width = min(img_width, max_logo_width)
-            new_logo_height = new_logo_width * aspect_ratio
-            logo = Image(logo_path, width=new_logo_width, height=new_logo_height)
-            logo.hAlign = 'LEFT'
-            elements.append(logo)
-        except Exception as e:
-            elements.append(Paragraph("Genuino PRO+ (Error Logo)", styles['Heading1']))
+    if _not_modified(meta['etag'], meta['last_modified']):
+        response = make_response('', 304)
     else:
-        elements.append(Paragraph("Genuino PRO+", styles['Heading1']))
-    elements.append(Spacer(1, 0.25 * inch))
-    elements.append(Paragraph('COTIZACION', styles['Heading1']))
-    elements.append(Paragraph(clean_text(quote['quote_number']), styles['Normal']))
-    elements.append(Spacer(1, 0.25 * inch))
-    data_info = [
-        [Paragraph('<b>Empresa:</b>', styles['Normal']), Paragraph('<b>Cliente:</b>', styles['Normal'])],
-        ['Genuino Importaciones', Paragraph(clean_text(quote['company_name']), styles['Normal'])],
-        ['NIT: 123456789', f"NIT/CI: {clean_text(quote['nit_ci'])}"],
-        ['Cochabamba, Bolivia', f"Atn: {clean_text(quote['contact_person'])}"],
-    ]
-    info_table = Table(data_info, colWidths=[3.5 * inch, 3.5 * inch])
-    info_table.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'TOP'),]))
-    elements.append(info_table)
-    elements.append(Spacer(1, 0.25 * inch))
-    table_style = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#EEEEEE')),
-        ('BOX', (0, 0), (-1, -1), 1, colors.black),
-        ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ALIGN', (1, 1), (1, -1), 'RIGHT'), 
-        ('ALIGN', (3, 1), (3, -1), 'RIGHT'), 
-        ('ALIGN', (4, 1), (4, -1), 'RIGHT'), 
-    ])
-    col_widths = [0.8 * inch, 0.5 * inch, 4.2 * inch, 1 * inch, 1 * inch]
-    subtotals = {} 
-    for c_type in types:
-        cursor.execute("SELECT * FROM quote_items WHERE quote_id = %s AND type_id = %s ORDER BY id", (quote_id, c_type['id']))
-        items = cursor.fetchall()
-        if items:
-            elements.append(Paragraph(clean_text(c_type['name']), styles['GroupHeader']))
-            data_items = [['Código', 'Cant.', 'Descripción', 'P. Unit.', 'Subtotal']]
-            type_subtotal = 0.0
-            for item in items:
-                subtotal = item['subtotal']
-                type_subtotal += subtotal
-                data_items.append([
-                    clean_text(item['code']),
-                    item['quantity'],
-                    Paragraph(clean_text(item['description']), styles['Normal']),
-                    f"{item['unit_price']:,.2f}", 
-                    f"{item['subtotal']:,.2f}"
-                ])
-            subtotals[c_type['name']] = type_subtotal
-            data_items.append([
-                '', '', '', 
-                Paragraph(f"<b>Subtotal {c_type['name']}</b>", styles['RightBold']), 
-                Paragraph(f"<b>{type_subtotal:,.2f}</b>", styles['RightBold'])
-            ])
-            items_table = Table(data_items, colWidths=col_widths)
-            items_table.setStyle(table_style)
-            items_table.setStyle(TableStyle([
-                ('SPAN', (0, -1), (2, -1)),
-                ('ALIGN', (3, -1), (4, -1), 'RIGHT'),
-            ]))
-            elements.append(items_table)
-            elements.append(Spacer(1, 0.1 * inch))
-    cursor.close()
-    conn.close() 
-    elements.append(Spacer(1, 0.25 * inch))
-    summary_data = []
-    for type_name, amount in subtotals.items():
-        summary_data.append([
-            Paragraph(f"Total {type_name}", styles['Right']),
-            Paragraph(f"{amount:,.2f}", styles['Right'])
-        ])
-    summary_data.append([
-        Paragraph(f"<b>TOTAL GENERAL Bs.</b>", styles['RightBold']), 
-        Paragraph(f"<b>{quote['total_amount']:,.2f}</b>", styles['RightBold'])
-    ])
-    summary_table = Table(summary_data, colWidths=[6.5 * inch, 1 * inch])
-    summary_table.setStyle(TableStyle([
-        ('BOX', (0, -1), (-1, -1), 1, colors.black), 
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#EEEEEE')),
-    ]))
-    elements.append(summary_table)
-    doc.build(elements)
-    buffer.seek(0)
-    response = make_response(buffer.getvalue())
-    response.headers.set('Content-Type', 'application/pdf')
-    # ¡CORRECCIÓN DE ERROR TIPOGRÁFICO!
-    response.headers.set('Content-Disposition', 'inline', filename=f"{clean_text(quote['quote_number'])}.pdf")
+        pdf_bytes = pdf_cache.get(meta['cache_key'])
+        if pdf_bytes is None:
+            pdf_bytes = _render_quote_pdf(quote_id)
+            if pdf_bytes is None:
+                return "Cotización no encontrada", 404
+            try:
+                pdf_cache.put(meta['cache_key'], pdf_bytes)
+            except OSError as e:
+                print(f"No se pudo guardar el PDF en caché: {e}")
+        response = make_response(pdf_bytes)
+        response.headers.set('Content-Type', 'application/pdf')
+        # ¡CORRECCIÓN DE ERROR TIPOGRÁFICO!
+        response.headers.set('Content-Disposition', 'inline', filename=f"{clean_text(meta['quote_number'])}.pdf")
+    response.set_etag(meta['etag'])
+    if meta['last_modified']:
+        response.last_modified = meta['last_modified']
+    # Privado (requiere sesión o cliente) y siempre revalidado con ETag.
+    response.headers.set('Cache-Control', 'private, no-cache')
     return response
+
+def _render_quote_pdf(quote_id):
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    try:
+        quote, groups = fetch_quote_for_pdf(cursor, quote_id)
+    finally:
+        cursor.close()
+        conn.close()
+    if not quote:
+        return None
+    with PDF_RENDER_SECONDS.time():
+        return render_quote_pdf(quote, groups)
 @app.route('/api/quote/<int:quote_id>/pdf')
 @login_required
 def generate_quote_pdf(quote_id):
     return _generate_pdf_for_quote(quote_id)
-@app.route('/api/client/<int:client_id>/quote/<int:quote_id>/pdf')
-def generate_client_quote_pdf_secure(client_id, quote_id):
+@app.route('/api/client/quote/<int:quote_id>/pdf')
+def generate_client_quote_pdf_secure(quote_id):
+    client_id = _client_id_from_request()
+    if client_id is None:
+        return "Acceso denegado: sesión de cliente inválida o vencida.", 401
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT 1 FROM quotes WHERE id = %s AND customer_id = %s AND status = 'Aprobada'", (quote_id, client_id))
@@ -649,18 +1210,190 @@ def generate_client_quote_pdf_secure(client_id, quote_id):
         return _generate_pdf_for_quote(quote_id)
     else:
         return "Acceso denegado: La cotización no se encuentra o no está aprobada.", 403
+# --- EXPORTACIÓN MASIVA DE PDFs (ZIP) ---
+app.config['EXPORT_DIR'] = os.environ.get('EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'genuino_exports'))
+app.config['EXPORT_PROCESSES'] = int(os.environ.get('EXPORT_PROCESSES', 2))
+app.config['EXPORT_MAX_QUOTES'] = int(os.environ.get('EXPORT_MAX_QUOTES', 500))
+pdf_exports = PdfExportJobs(app.config['EXPORT_DIR'], max_processes=app.config['EXPORT_PROCESSES'])
+
+def _prepare_pdf_for_export(quote_id):
+    # Corre en el hilo coordinador (fuera de la petición): cada get_db_connection()
+    # toma una conexión del pool y conn.close() la devuelve.
+    meta = _quote_pdf_fingerprint(quote_id)
+    if not meta:
+        return None
+    prepared = {'filename': f"{clean_text(meta['quote_number'])}.pdf", 'cache_key': meta['cache_key']}
+    cached = pdf_cache.get(meta['cache_key'])
+    if cached is not None:
+        prepared['pdf'] = cached
+        return prepared
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    try:
+        quote, groups = fetch_quote_for_pdf(cursor, quote_id)
+    finally:
+        cursor.close()
+        conn.close()
+    if not quote:
+        return None
+    prepared['render_args'] = (quote, groups)
+    return prepared
+
+def _store_exported_pdf(prepared, pdf_bytes):
+    try:
+        pdf_cache.put(prepared['cache_key'], pdf_bytes)
+    except OSError as e:
+        print(f"No se pudo guardar el PDF en caché: {e}")
+
+@app.route('/api/quotes/pdf-export', methods=['POST'])
+@login_required
+def create_pdf_export():
+    if current_user.role != 'Jefe de Ventas': return jsonify({'error': 'No autorizado'}), 403
+    data = request.get_json() or {}
+    max_quotes = app.config['EXPORT_MAX_QUOTES']
+    if data.get('quote_ids'):
+        try:
+            quote_ids = [int(quote_id) for quote_id in data['quote_ids']]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'quote_ids debe ser una lista de números'}), 400
+    else:
+        # Mismo formato de filtros que /api/all-quotes
+        try:
+            where, params = _quote_filters_from_args({k: str(v) for k, v in (data.get('filter') or {}).items()}, allow_vendor=True)
+        except ValueError:
+            return jsonify({'error': 'Filtro inválido'}), 400
+        where_sql = f" WHERE {' AND '.join(where)}" if where else ''
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT q.id FROM quotes q{where_sql} ORDER BY q.created_at DESC, q.id DESC LIMIT %s", params + [max_quotes + 1])
+        quote_ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        conn.close()
+    if not quote_ids:
+        return jsonify({'error': 'No hay cotizaciones para exportar'}), 400
+    if len(quote_ids) > max_quotes:
+        return jsonify({'error': f'Máximo {max_quotes} cotizaciones por exportación'}), 400
+    job_id = pdf_exports.submit(quote_ids, int(current_user.id), _prepare_pdf_for_export, _store_exported_pdf)
+    return jsonify({'job_id': job_id, 'status_url': url_for('get_pdf_export', job_id=job_id),
+                    'total': len(quote_ids)}), 202
+
+def _export_job_for_current_user(job_id):
+    if not job_id.isalnum():
+        return None
+    status = pdf_exports.status(job_id)
+    if not status or status['owner_id'] != int(current_user.id):
+        return None
+    return status
+
+@app.route('/api/quotes/pdf-export/<job_id>', methods=['GET'])
+@login_required
+def get_pdf_export(job_id):
+    status = _export_job_for_current_user(job_id)
+    if not status: return jsonify({'error': 'Exportación no encontrada'}), 404
+    if status['status'] == 'done':
+        status['download_url'] = url_for('download_pdf_export', job_id=job_id)
+    return jsonify(status)
+
+@app.route('/api/quotes/pdf-export/<job_id>/download', methods=['GET'])
+@login_required
+def download_pdf_export(job_id):
+    status = _export_job_for_current_user(job_id)
+    if not status: return jsonify({'error': 'Exportación no encontrada'}), 404
+    if status['status'] != 'done': return jsonify({'error': 'La exportación aún no terminó'}), 409
+    return send_file(pdf_exports.zip_path(job_id), mimetype='application/zip', as_attachment=True,
+                     download_name=f"cotizaciones-{job_id[:8]}.zip")
+# --- EXPORTACIÓN EN STREAMING (CSV / NDJSON) ---
+# Cursores con nombre (del lado del servidor): PostgreSQL entrega las filas de a
+# EXPORT_ITERSIZE y la respuesta se va escribiendo, la memoria no crece con el tamaño.
+app.config['EXPORT_ITERSIZE'] = int(os.environ.get('EXPORT_ITERSIZE', 2000))
+STREAM_EXPORTS = {
+    'quotes': {
+        'columns': ['id', 'quote_number', 'created_at', 'customer_id', 'company_name', 'nit_ci',
+                    'user_id', 'vendedor_name', 'total_amount', 'status', 'rejection_reason'],
+        'select': "q.id, q.quote_number, q.created_at, q.customer_id, c.company_name, c.nit_ci, q.user_id, u.fullname, q.total_amount, q.status, q.rejection_reason",
+        'from': "quotes q JOIN customers c ON q.customer_id = c.id JOIN users u ON q.user_id = u.id",
+        'order': "q.id",
+    },
+    'quote_items': {
+        'columns': ['id', 'quote_id', 'quote_number', 'quote_created_at', 'type_id', 'type_name',
+                    'code', 'description', 'quantity', 'unit_price', 'subtotal'],
+        'select': "i.id, i.quote_id, q.quote_number, q.created_at, i.type_id, t.name, i.code, i.description, i.quantity, i.unit_price, i.subtotal",
+        'from': "quote_items i JOIN quotes q ON i.quote_id = q.id JOIN catalog_types t ON i.type_id = t.id",
+        'order': "i.id",
+    },
+    'orders': {
+        'columns': ['id', 'quote_id', 'quote_number', 'quote_created_at', 'customer_id', 'company_name',
+                    'order_status', 'last_update'],
+        'select': "o.id, o.quote_id, q.quote_number, q.created_at, q.customer_id, c.company_name, o.order_status, o.last_update",
+        'from': "orders o JOIN quotes q ON o.quote_id = q.id JOIN customers c ON q.customer_id = c.id",
+        'order': "o.id",
+    },
+}
+
+def _export_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def _stream_rows(dataset, where, params, fmt):
+    spec = STREAM_EXPORTS[dataset]
+    columns = spec['columns']
+    where_sql = f" WHERE {' AND '.join(where)}" if where else ''
+    sql = f"SELECT {spec['select']} FROM {spec['from']}{where_sql} ORDER BY {spec['order']}"
+    batch_size = app.config['EXPORT_ITERSIZE']
+    conn = get_db_connection()
+    cursor = conn.cursor(name=f"export_{dataset}_{os.getpid()}_{threading.get_ident()}")
+    cursor.itersize = batch_size
+    try:
+        cursor.execute(sql, params)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(columns)
+        pending = 0
+        for row in cursor:
+            if writer:
+                writer.writerow(['' if value is None else _export_value(value) for value in row])
+            else:
+                buffer.write(json.dumps(dict(zip(columns, map(_export_value, row))), ensure_ascii=False))
+                buffer.write('\n')
+            pending += 1
+            if pending >= batch_size:
+                yield buffer.getvalue()
+                buffer.seek(0); buffer.truncate()
+                pending = 0
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        cursor.close()
+        conn.rollback()
+        conn.close()
+
+@app.route('/api/export/<dataset>.<fmt>', methods=['GET'])
+@login_required
+def stream_export(dataset, fmt):
+    if current_user.role != 'Jefe de Ventas': return jsonify({'error': 'No autorizado'}), 403
+    if dataset not in STREAM_EXPORTS or fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Exportación no disponible'}), 404
+    # Filtros opcionales por fecha de la cotización (mismo formato que /api/all-quotes)
+    try:
+        where, params = _quote_filters_from_args(
+            {k: request.args[k] for k in ('date_from', 'date_to', 'status', 'customer_id') if k in request.args},
+            allow_vendor=False)
+    except ValueError:
+        return jsonify({'error': 'Filtro inválido'}), 400
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = Response(stream_with_context(_stream_rows(dataset, where, params, fmt)), mimetype=mimetype)
+    response.headers.set('Content-Disposition', 'attachment', filename=f"{dataset}-{date.today().isoformat()}.{fmt}")
+    return response
+
 @app.route('/api/settings/approval_threshold', methods=['GET'])
 @login_required
 def get_approval_threshold():
     if current_user.role != 'Jefe de Ventas': return jsonify({'error': 'No autorizado'}), 403
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute("SELECT setting_value FROM app_settings WHERE setting_key = 'approval_threshold'")
-    threshold_row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    current_threshold = float(threshold_row['setting_value']) if threshold_row else 10000.00
-    return jsonify({'threshold': current_threshold})
+    return jsonify({'threshold': get_approval_threshold_setting()})
 @app.route('/api/settings/approval_threshold', methods=['POST'])
 @login_required
 def update_approval_threshold():
@@ -684,14 +1417,17 @@ def update_approval_threshold():
     finally:
         cursor.close()
         conn.close()
+    # Este worker no espera al NOTIFY; los demás lo reciben del trigger.
+    invalidate_settings('approval_threshold')
     return jsonify({'message': 'Límite de aprobación actualizado correctamente'})
+# --- REPORTES (leen de sales_rollup, ver rollups.py) ---
 @app.route('/api/reports/sales-by-month')
 @login_required
 def report_sales_by_month():
     if current_user.role != 'Jefe de Ventas': return jsonify({'error': 'No autorizado'}), 403
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute("SELECT to_char(created_at, 'YYYY-MM') as month, SUM(total_amount) as total_sales FROM quotes WHERE status = 'Aprobada' GROUP BY month ORDER BY month ASC")
+    cursor.execute("SELECT to_char(month, 'YYYY-MM') as month, SUM(total_amount) as total_sales FROM sales_rollup WHERE status = 'Aprobada' GROUP BY 1 HAVING SUM(quote_count) > 0 ORDER BY 1 ASC")
     sales_data = cursor.fetchall()
     cursor.close()
     conn.close()
@@ -704,14 +1440,15 @@ def report_sales_by_month_by_vendor():
     cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
     query = """
         SELECT 
-            to_char(q.created_at, 'YYYY-MM') as month, 
+            to_char(r.month, 'YYYY-MM') as month, 
             u.fullname as vendor_name, 
-            SUM(q.total_amount) as total_sales 
-        FROM quotes q 
-        JOIN users u ON q.user_id = u.id 
-        WHERE q.status = 'Aprobada' 
-        GROUP BY month, vendor_name 
-        ORDER BY month, vendor_name
+            SUM(r.total_amount) as total_sales 
+        FROM sales_rollup r 
+        JOIN users u ON r.user_id = u.id 
+        WHERE r.status = 'Aprobada' 
+        GROUP BY 1, 2 
+        HAVING SUM(r.quote_count) > 0
+        ORDER BY 1, 2
     """
     cursor.execute(query)
     rows = cursor.fetchall()
@@ -736,7 +1473,7 @@ def report_quotes_by_vendor():
     if current_user.role != 'Jefe de Ventas': return jsonify({'error': 'No autorizado'}), 403
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cursor.execute("SELECT u.fullname as vendor_name, COUNT(q.id) as quote_count FROM quotes q JOIN users u ON q.user_id = u.id GROUP BY u.fullname ORDER BY quote_count DESC")
+    cursor.execute("SELECT u.fullname as vendor_name, SUM(r.quote_count) as quote_count FROM sales_rollup r JOIN users u ON r.user_id = u.id GROUP BY u.fullname HAVING SUM(r.quote_count) > 0 ORDER BY quote_count DESC")
     vendor_data = cursor.fetchall()
     cursor.close()
     conn.close()
@@ -755,11 +1492,12 @@ def report_rejections_by_vendor():
     
     try:
         cursor.execute("""
-            SELECT u.fullname as vendor_name, COUNT(q.id) as rejection_count 
-            FROM quotes q 
-            JOIN users u ON q.user_id = u.id 
-            WHERE q.status = 'Rechazada' 
+            SELECT u.fullname as vendor_name, SUM(r.quote_count) as rejection_count 
+            FROM sales_rollup r 
+            JOIN users u ON r.user_id = u.id 
+            WHERE r.status = 'Rechazada' 
             GROUP BY u.fullname 
+            HAVING SUM(r.quote_count) > 0
             ORDER BY rejection_count DESC
         """)
         rejection_data = cursor.fetchall()
@@ -774,16 +1512,112 @@ def report_rejections_by_vendor():
         'labels': [row['vendor_name'] for row in rejection_data], 
         'data': [row['rejection_count'] for row in rejection_data]
     })
+# Todos los gráficos de reports.html en una sola petición y una sola consulta.
+# La matriz densa mes × vendedor se arma en PostgreSQL con generate_series y el
+# JSON sale ya armado de la BD: Python solo lo reenvía.
+# A diferencia de /api/reports/sales-by-month(-by-vendor), que solo devuelven
+# los meses con ventas, aquí el eje es continuo (del primer al último mes, o
+# date_from..date_to) y los meses sin ventas aprobadas van con 0. labels y
+# data salen de la misma serie de meses, así que siempre tienen el mismo largo
+# (reports.js se los pasa tal cual a Chart.js).
+REPORT_SUMMARY_SQL = """
+WITH bounds AS (
+    SELECT COALESCE(%(date_from)s::date, MIN(month)) AS first_month,
+           COALESCE(%(date_to)s::date, MAX(month)) AS last_month
+    FROM sales_rollup
+),
+filtered AS (
+    SELECT r.month, r.status, r.quote_count, r.total_amount, u.fullname AS vendor_name
+    FROM sales_rollup r
+    JOIN bounds b ON r.month BETWEEN b.first_month AND b.last_month
+    JOIN users u ON u.id = r.user_id
+    WHERE (%(vendor_id)s::int IS NULL OR r.user_id = %(vendor_id)s::int)
+),
+months AS (
+    SELECT generate_series(first_month, last_month, interval '1 month')::date AS month FROM bounds
+),
+approved AS (
+    SELECT month, vendor_name, SUM(total_amount) AS total_sales
+    FROM filtered WHERE status = 'Aprobada'
+    GROUP BY month, vendor_name HAVING SUM(quote_count) > 0
+),
+vendor_matrix AS (
+    SELECT v.vendor_name, json_agg(COALESCE(a.total_sales, 0) ORDER BY m.month) AS data
+    FROM (SELECT DISTINCT vendor_name FROM approved) v
+    CROSS JOIN months m
+    LEFT JOIN approved a ON a.vendor_name = v.vendor_name AND a.month = m.month
+    GROUP BY v.vendor_name
+),
+counts AS (
+    SELECT vendor_name,
+           SUM(quote_count) AS quote_count,
+           SUM(quote_count) FILTER (WHERE status = 'Rechazada') AS rejection_count
+    FROM filtered GROUP BY vendor_name
+)
+SELECT json_build_object(
+    'sales_by_month', (
+        SELECT json_build_object(
+            'labels', COALESCE(json_agg(to_char(m.month, 'YYYY-MM') ORDER BY m.month), '[]'),
+            'data', COALESCE(json_agg(COALESCE(t.total_sales, 0) ORDER BY m.month), '[]'))
+        FROM months m
+        LEFT JOIN (SELECT month, SUM(total_sales) AS total_sales FROM approved GROUP BY month) t ON t.month = m.month
+    ),
+    'sales_by_month_by_vendor', json_build_object(
+        'labels', (SELECT COALESCE(json_agg(to_char(month, 'YYYY-MM') ORDER BY month), '[]') FROM months),
+        'datasets', (SELECT COALESCE(json_agg(json_build_object('label', vendor_name, 'data', data) ORDER BY vendor_name), '[]')
+                     FROM vendor_matrix)
+    ),
+    'quotes_by_vendor', (
+        SELECT json_build_object(
+            'labels', COALESCE(json_agg(vendor_name ORDER BY quote_count DESC, vendor_name), '[]'),
+            'data', COALESCE(json_agg(quote_count ORDER BY quote_count DESC, vendor_name), '[]'))
+        FROM counts WHERE quote_count > 0
+    ),
+    'rejections_by_vendor', (
+        SELECT json_build_object(
+            'labels', COALESCE(json_agg(vendor_name ORDER BY rejection_count DESC, vendor_name), '[]'),
+            'data', COALESCE(json_agg(rejection_count ORDER BY rejection_count DESC, vendor_name), '[]'))
+        FROM counts WHERE rejection_count > 0
+    )
+)::text
+"""
+
+def _month_arg(value):
+    # Acepta 'YYYY-MM' o 'YYYY-MM-DD'; siempre se normaliza al primer día del mes.
+    if not value:
+        return None
+    return date.fromisoformat(value[:7] + '-01')
+
+@app.route('/api/reports/summary')
+@login_required
+def report_summary():
+    if current_user.role != 'Jefe de Ventas': return jsonify({'error': 'No autorizado'}), 403
+    try:
+        params = {
+            'date_from': _month_arg(request.args.get('date_from')),
+            'date_to': _month_arg(request.args.get('date_to')),
+            'vendor_id': int(request.args['vendor_id']) if request.args.get('vendor_id') else None,
+        }
+    except ValueError:
+        return jsonify({'error': 'Parámetros de filtro inválidos'}), 400
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(REPORT_SUMMARY_SQL, params)
+    summary_json = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return Response(summary_json, mimetype='application/json')
 @app.route('/api/catalog-types', methods=['GET'])
 @login_required
+@etag_from_version(lambda: _load_catalog_version())  # definida más abajo
 def get_catalog_types():
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    cursor = conn.cursor()
     cursor.execute("SELECT * FROM catalog_types ORDER BY name")
-    types = cursor.fetchall()
+    response = json_rows(cursor)
     cursor.close()
     conn.close()
-    return jsonify(types)
+    return response
 @app.route('/api/catalog-types', methods=['POST'])
 @login_required
 def create_catalog_type():
@@ -795,6 +1629,7 @@ def create_catalog_type():
     cursor = conn.cursor()
     try:
         cursor.execute("INSERT INTO catalog_types (name) VALUES (%s)", (name,))
+        bump_catalog_version(cursor)
         conn.commit()
     except psycopg2.Error:
         conn.rollback(); return jsonify({'error': 'Ese tipo ya existe'}), 409
@@ -813,6 +1648,7 @@ def update_catalog_type(type_id):
     cursor = conn.cursor()
     try:
         cursor.execute("UPDATE catalog_types SET name = %s WHERE id = %s", (name, type_id))
+        bump_catalog_version(cursor)
         conn.commit()
     except psycopg2.Error:
         conn.rollback(); return jsonify({'error': 'Ese tipo ya existe'}), 409
@@ -827,11 +1663,12 @@ def delete_catalog_type(type_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT 1 FROM catalog WHERE type_id = %s", (type_id,))
+        cursor.execute(queries.CATALOG_TYPE_IN_USE_SQL, (type_id,))
         items = cursor.fetchone()
         if items:
             return jsonify({'error': 'No se puede eliminar. Hay ítems de catálogo usando este tipo.'}), 409
         cursor.execute("DELETE FROM catalog_types WHERE id = %s", (type_id,))
+        bump_catalog_version(cursor)
         conn.commit()
     except psycopg2.Error:
          conn.rollback(); return jsonify({'error': 'No se puede eliminar. Hay cotizaciones usando este tipo.'}), 409
@@ -841,16 +1678,54 @@ def delete_catalog_type(type_id):
         cursor.close()
         conn.close()
     return jsonify({'message': 'Tipo eliminado'})
+# --- BÚSQUEDA DE CATÁLOGO (índice en memoria, ver catalog_search.py) ---
+# Cada escritura al catálogo o a sus tipos incrementa 'catalog_version' en
+# app_settings dentro de su transacción; los workers comparan esa versión como
+# mucho cada CATALOG_INDEX_CHECK_SECONDS y reconstruyen el índice si cambió.
+# La misma versión es el ETag de GET /api/catalog y /api/catalog-types.
+app.config['CATALOG_INDEX_CHECK_SECONDS'] = float(os.environ.get('CATALOG_INDEX_CHECK_SECONDS', 5))
+app.config['CATALOG_SEARCH_MAX_LIMIT'] = 100
+
+def bump_catalog_version(cursor):
+    bump_version(cursor, 'catalog_version')
+
+def _load_catalog_rows():
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    cursor.execute("SELECT id, type_id, code, description, unit_price FROM catalog")
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return rows
+
+def _load_catalog_version():
+    return load_version('catalog_version')
+
+catalog_search = CatalogSearch(_load_catalog_rows, _load_catalog_version,
+                               check_interval=app.config['CATALOG_INDEX_CHECK_SECONDS'])
+
+@app.route('/api/catalog/search', methods=['GET'])
+@login_required
+def search_catalog():
+    query = request.args.get('q', '')
+    try:
+        type_id = int(request.args['type_id']) if request.args.get('type_id') else None
+        limit = min(max(int(request.args.get('limit', 20)), 1), app.config['CATALOG_SEARCH_MAX_LIMIT'])
+    except ValueError:
+        return jsonify({'error': 'Parámetros inválidos'}), 400
+    return jsonify(catalog_search.search(query, type_id=type_id, limit=limit))
+
 @app.route('/api/catalog', methods=['GET'])
 @login_required
+@etag_from_version(_load_catalog_version)
 def get_catalog_items():
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    cursor = conn.cursor()
     cursor.execute("SELECT c.*, ct.name as type_name FROM catalog c JOIN catalog_types ct ON c.type_id = ct.id ORDER BY ct.name, c.description")
-    items = cursor.fetchall()
+    response = json_rows(cursor)
     cursor.close()
     conn.close()
-    return jsonify(items)
+    return response
 @app.route('/api/catalog', methods=['POST'])
 @login_required
 def create_catalog_item():
@@ -863,7 +1738,9 @@ def create_catalog_item():
     cursor = conn.cursor()
     try:
         cursor.execute("INSERT INTO catalog (type_id, code, description, unit_price) VALUES (%s, %s, %s, %s)", (type_id, code, description, unit_price))
+        bump_catalog_version(cursor)
         conn.commit()
+        catalog_search.invalidate()
     except psycopg2.Error:
         conn.rollback(); return jsonify({'error': 'El código ya existe para este tipo de ítem. Debe ser único.'}), 409
     finally:
@@ -894,7 +1771,9 @@ def update_catalog_item(item_id):
     cursor = conn.cursor()
     try:
         cursor.execute("UPDATE catalog SET type_id = %s, code = %s, description = %s, unit_price = %s WHERE id = %s", (type_id, code, description, unit_price, item_id))
+        bump_catalog_version(cursor)
         conn.commit()
+        catalog_search.invalidate()
     except psycopg2.Error:
         conn.rollback(); return jsonify({'error': 'El código ya existe para este tipo de ítem. Debe ser único.'}), 409
     finally:
@@ -909,12 +1788,40 @@ def delete_catalog_item(item_id):
     cursor = conn.cursor()
     try:
         cursor.execute("DELETE FROM catalog WHERE id = %s", (item_id,))
+        bump_catalog_version(cursor)
         conn.commit()
+        catalog_search.invalidate()
     except Exception as e:
         conn.rollback(); return jsonify({'error': str(e)}), 500
     finally:
         cursor.close()
         conn.close()
     return jsonify({'message': 'Ítem eliminado'})
+# Lista de precios completa en un CSV: COPY a una tabla temporal y un solo
+# INSERT ... ON CONFLICT sobre (type_id, code). Ver catalog_import.py.
+app.config['CATALOG_IMPORT_MAX_BYTES'] = int(os.environ.get('CATALOG_IMPORT_MAX_BYTES', 20 * 1024 * 1024))
+@app.route('/api/catalog/import', methods=['POST'])
+@login_required
+def import_catalog():
+    if current_user.role != 'Jefe de Ventas': return jsonify({'error': 'No autorizado'}), 403
+    if request.content_length and request.content_length > app.config['CATALOG_IMPORT_MAX_BYTES']:
+        return jsonify({'error': f"El archivo supera {app.config['CATALOG_IMPORT_MAX_BYTES'] // (1024 * 1024)} MB"}), 413
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'error': 'Se requiere un archivo CSV en el campo "file"'}), 400
+    conn = get_db_connection()
+    try:
+        result = import_catalog_csv(conn, upload.stream, on_change=bump_catalog_version)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except psycopg2.DataError as e:
+        return jsonify({'error': f'CSV inválido: {e.pgerror or e}'.strip()}), 400
+    except psycopg2.Error as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+    if result['inserted'] or result['updated']:
+        catalog_search.invalidate()
+    return jsonify(result)
 
 # (El código de inicialización de BD se movió a init_db.py)
\ No newline at end of file
@@ -0,0 +1,87 @@
+# bench/bench_json.py
+# Compara cómo se arma el JSON de los listados: lectura + serialización.
+#
+#   actual     RealDictCursor + json de la biblioteca estándar (el jsonify de
+#              Flask antes de fast_json.py)
+#   objetos    tuplas + orjson, lista de objetos (lo que devuelve hoy la API)
+#   columnas   tuplas + orjson en formato columnar (?format=columns)
+#
+# Cada consulta se repite --repeat veces por variante; se reporta el tiempo
+# por llamada (mediana) separado en lectura y serialización, y el tamaño.
+#
+# Uso: DATABASE_URL=... python bench/bench_json.py [--repeat 20] [--limit 200]
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import psycopg2
+import psycopg2.extras
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fast_json import FastJSONProvider, columns_of, orjson, rows_payload  # noqa: E402
+
+QUERIES = {
+    'all_quotes': ("SELECT q.id, q.quote_number, q.created_at, q.total_amount, q.status, c.company_name, "
+                   "q.rejection_reason, u.fullname as vendedor_name, u.id as user_id FROM quotes q "
+                   "JOIN customers c ON q.customer_id = c.id JOIN users u ON q.user_id = u.id "
+                   "ORDER BY q.created_at DESC, q.id DESC LIMIT %(limit)s"),
+    'catalog': ("SELECT c.*, ct.name as type_name FROM catalog c JOIN catalog_types ct ON c.type_id = ct.id "
+                "ORDER BY ct.name, c.description"),
+    'customers': "SELECT id, company_name, nit_ci FROM customers ORDER BY company_name",
+    'quote_items': "SELECT * FROM quote_items ORDER BY id LIMIT %(limit)s * 10",
+}
+
+
+def measure(conn, sql, params, cursor_factory, encode, repeat):
+    fetch_times, encode_times, size = [], [], 0
+    for _ in range(repeat):
+        cursor = conn.cursor(cursor_factory=cursor_factory)
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        columns = columns_of(cursor)
+        fetched = time.perf_counter()
+        body = encode(columns, rows)
+        encode_times.append(time.perf_counter() - fetched)
+        fetch_times.append(fetched - start)
+        size = len(body)
+        cursor.close()
+    return len(rows), statistics.median(fetch_times), statistics.median(encode_times), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de serialización JSON de listados')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=200, help='filas de la página de cotizaciones')
+    args = parser.parse_args()
+    if orjson is None:
+        print("orjson no está instalado: 'objetos' y 'columnas' usan el json estándar.")
+
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    variants = [
+        ('actual', psycopg2.extras.RealDictCursor, lambda columns, rows: stdlib.dumps(rows).encode('utf-8')),
+        ('objetos', None, lambda columns, rows: fast.dumps_bytes(rows_payload(columns, rows))),
+        ('columnas', None, lambda columns, rows: fast.dumps_bytes(rows_payload(columns, rows, columnar=True))),
+    ]
+    conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
+    conn.autocommit = True
+    print(f"{'consulta':<12} {'variante':<10} {'filas':>7} {'lectura ms':>11} {'json ms':>9} {'total ms':>9} {'KB':>8}")
+    with app.app_context():
+        for name, sql in QUERIES.items():
+            for label, cursor_factory, encode in variants:
+                rows, fetch, encode_time, size = measure(conn, sql, {'limit': args.limit}, cursor_factory,
+                                                         encode, args.repeat)
+                print(f"{name:<12} {label:<10} {rows:>7} {fetch * 1000:>11.2f} {encode_time * 1000:>9.2f} "
+                      f"{(fetch + encode_time) * 1000:>9.2f} {size / 1024:>8.1f}")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# bench/bench_login.py
+# Throughput de POST /login con muchos usuarios entrando a la vez.
+#
+# Simula un worker con hilos (gthread): N hilos, cada uno con su propio
+# cliente de Flask, hacen login en bucle durante --seconds segundos. Reporta
+# logins por segundo, latencias y cuántos recibieron 503 por cola llena.
+# Probar distintos --limit (PASSWORD_HASH_CONCURRENCY) y --method.
+#
+# Uso: DATABASE_URL=... python bench/bench_login.py --email jefe@genuino.com --password admin
+#          [--threads 16] [--seconds 10] [--limit 2] [--queue-timeout 5] [--method scrypt:32768:8:1]
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de login concurrente')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--limit', type=int, default=2, help='PASSWORD_HASH_CONCURRENCY')
+    parser.add_argument('--queue-timeout', type=float, default=5, help='PASSWORD_HASH_QUEUE_TIMEOUT')
+    parser.add_argument('--method', help='PASSWORD_HASH_METHOD (por defecto el de passwords.py)')
+    args = parser.parse_args()
+
+    # La configuración se lee al importar app.
+    os.environ['PASSWORD_HASH_CONCURRENCY'] = str(args.limit)
+    os.environ['PASSWORD_HASH_QUEUE_TIMEOUT'] = str(args.queue_timeout)
+    os.environ['DB_POOL_MAX'] = str(max(args.threads, 10))
+    os.environ.setdefault('PG_LISTEN', 'false')
+    if args.method:
+        os.environ['PASSWORD_HASH_METHOD'] = args.method
+    from app import app, password_hasher
+
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def worker():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = client.post('/login', data={'email': args.email, 'password': args.password})
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            client.get('/logout')
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ok = statuses.get(302, 0)
+    print(f"Método: {password_hasher.method_prefix}  límite: {args.limit}  hilos: {args.threads}  duración: {elapsed:.1f}s")
+    print(f"Logins OK: {ok} ({ok / elapsed:.1f}/s)  respuestas: {dict(sorted(statuses.items()))}")
+    print(f"Latencia ms  p50: {statistics.median(latencies) * 1000:.0f}  "
+          f"p95: {percentile(latencies, 0.95) * 1000:.0f}  p99: {percentile(latencies, 0.99) * 1000:.0f}  "
+          f"máx: {max(latencies) * 1000:.0f}")
+    print(f"Hasher: {password_hasher.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# bench/bench_pdf.py
+# Mide la latencia por PDF de pdf_render.render_quote_pdf con cotizaciones
+# sintéticas (no necesita base de datos).
+#
+# Uso: python bench/bench_pdf.py [--sizes 10 100 1000] [--repeat 5]
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_render import render_quote_pdf  # noqa: E402
+
+TYPE_NAMES = ['Productos/Servicios', 'Gastos de Importación']
+
+
+def synthetic_quote(lines):
+    groups = []
+    total = 0.0
+    for type_index, type_name in enumerate(TYPE_NAMES):
+        items = []
+        for i in range(type_index, lines, len(TYPE_NAMES)):
+            quantity = (i % 7) + 1
+            unit_price = 10.5 + (i % 50) * 3.25
+            items.append({
+                'code': f'P-{i:05d}',
+                'description': f'Repuesto de importación número {i} con descripción larga para forzar saltos de línea',
+                'quantity': quantity,
+                'unit_price': unit_price,
+                'subtotal': quantity * unit_price,
+            })
+            total += quantity * unit_price
+        if items:
+            groups.append((type_name, items))
+    quote = {
+        'quote_number': f'COT-BENCH-{lines}',
+        'company_name': 'Cliente de Prueba S.R.L.',
+        'nit_ci': '1234567',
+        'contact_person': 'Juan Pérez',
+        'total_amount': total,
+    }
+    return quote, groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latencia por PDF de cotización')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # Calentamiento: la primera llamada carga fuentes de ReportLab.
+    render_quote_pdf(*synthetic_quote(1))
+    print(f"{'líneas':>8} {'mediana ms':>12} {'mín ms':>10} {'máx ms':>10} {'KB':>8}")
+    for lines in args.sizes:
+        quote, groups = synthetic_quote(lines)
+        timings = []
+        size = 0
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            size = len(render_quote_pdf(quote, groups))
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{lines:>8} {statistics.median(timings):>12.1f} {min(timings):>10.1f} {max(timings):>10.1f} {size / 1024:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# bench/loadtest_quote_numbers.py
+# Prueba de carga del numerador de cotizaciones contra una base real.
+#
+# Lanza N hilos, cada uno con su propia conexión, que crean cotizaciones en
+# paralelo (número + INSERT en la misma transacción, igual que create_quote).
+# Al final verifica que no hubo choques de quote_number y que los números del
+# año quedaron correlativos, y borra todo lo que creó.
+#
+# Uso: DATABASE_URL=... python bench/loadtest_quote_numbers.py [--threads 16] [--per-thread 200]
+import argparse
+import os
+import sys
+import threading
+import time
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quote_numbers import allocate_quote_number  # noqa: E402
+
+PREFIX = 'LOADTEST'
+
+
+def worker(dsn, customer_id, user_id, count, results, errors):
+    conn = psycopg2.connect(dsn)
+    cursor = conn.cursor()
+    try:
+        for _ in range(count):
+            try:
+                number = allocate_quote_number(cursor, prefix=PREFIX)
+                cursor.execute(
+                    "INSERT INTO quotes (customer_id, user_id, total_amount, status, quote_number) VALUES (%s, %s, %s, %s, %s)",
+                    (customer_id, user_id, 1.0, 'Aprobada', number))
+                conn.commit()
+                results.append(number)
+            except psycopg2.Error as e:
+                conn.rollback()
+                errors.append(str(e))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga del numerador de cotizaciones')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--per-thread', type=int, default=200)
+    args = parser.parse_args()
+    dsn = os.environ.get('DATABASE_URL')
+
+    conn = psycopg2.connect(dsn)
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO customers (company_name, nit_ci) VALUES ('Prueba de carga', 'LOADTEST-NIT')
+        ON CONFLICT (nit_ci) DO UPDATE SET company_name = EXCLUDED.company_name RETURNING id
+    """)
+    customer_id = cursor.fetchone()[0]
+    cursor.execute("SELECT id FROM users ORDER BY id LIMIT 1")
+    user_id = cursor.fetchone()[0]
+    cursor.execute("DELETE FROM quote_counters WHERE prefix = %s", (PREFIX,))
+    conn.commit()
+
+    results, errors = [], []
+    threads = [threading.Thread(target=worker, args=(dsn, customer_id, user_id, args.per_thread, results, errors))
+               for _ in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    expected = args.threads * args.per_thread
+    values = sorted(int(number.rsplit('-', 1)[1]) for number in results)
+    print(f"Cotizaciones creadas: {len(results)}/{expected} en {elapsed:.2f}s ({len(results) / elapsed:.0f}/s)")
+    print(f"Números duplicados: {len(results) - len(set(results))}")
+    print(f"Errores (incluye choques de UNIQUE): {len(errors)}")
+    print(f"Correlativos sin huecos: {values == list(range(1, len(values) + 1))}")
+    for error in errors[:5]:
+        print(f"  {error.strip()}")
+
+    cursor.execute("DELETE FROM quotes WHERE quote_number LIKE %s", (PREFIX + '-%',))
+    cursor.execute("DELETE FROM quote_counters WHERE prefix = %s", (PREFIX,))
+    cursor.execute("DELETE FROM customers WHERE nit_ci = 'LOADTEST-NIT'")
+    conn.commit()
+    cursor.close()
+    conn.close()
+    if errors or len(results) != len(set(results)):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,354 @@
+# bench/run_bench.py
+# Carga concurrente sobre los endpoints principales con salida en JSON.
+#
+# Cada escenario corre por separado: --threads hilos, cada uno con su propia
+# sesión (ya logueada), repiten la petición durante --seconds segundos. Se
+# reportan por endpoint las peticiones, errores, peticiones/s y latencias
+# p50/p95/p99/máx en ms, y se guarda todo en --output para comparar corridas
+# (--compare otra.json muestra la diferencia). Pensado para correr después de
+# bench/seed_data.py sobre una base de prueba: crea cotizaciones de verdad.
+#
+# Sin --base-url la app se importa en este proceso (como bench_login.py) y se
+# usan clientes de prueba de Flask; con --base-url se habla HTTP con un
+# gunicorn ya levantado, que es lo que hay que medir antes de un despliegue.
+#
+# Uso: DATABASE_URL=... python bench/run_bench.py [--base-url http://127.0.0.1:8000]
+#          [--threads 8] [--seconds 10] [--only all_quotes,catalog_search]
+#          [--output bench-results.json] [--compare anterior.json]
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SEARCH_TERMS = ['filtro', 'bomba toyota', 'aceite', 'pastilla disco', 'amortiguador', 'bujia', 'radiadr', 'sensor kia']
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class FlaskSession:
+    """Cliente de prueba de Flask con la misma interfaz que HttpSession."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, json_body=None, headers=None):
+        response = self.client.open(path, method=method, data=data, json=json_body, headers=headers)
+        body = response.get_data()
+        response.close()  # termina las respuestas en streaming (PDF, export)
+        return response.status_code, body
+
+
+class HttpSession:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+                                                  _NoRedirect())
+
+    def request(self, method, path, data=None, json_body=None, headers=None):
+        headers = dict(headers or {})
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode()
+        req = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers)
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # El login responde 302: basta con la cookie, no hace falta seguirlo.
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def get_json(session, path, **kwargs):
+    status, body = session.request('GET', path, **kwargs)
+    if status != 200:
+        raise RuntimeError(f"GET {path} respondió {status}: {body[:200]!r}")
+    return json.loads(body)
+
+
+# --- ESCENARIOS ---
+# Cada uno es (nombre, rol, función). La función recibe la sesión, el contexto
+# común (ids tomados de la propia API) y un random por hilo, y devuelve el
+# código HTTP de la petición medida.
+
+def scenario_all_quotes(session, ctx, rng):
+    return session.request('GET', '/api/all-quotes')[0]
+
+
+def scenario_all_quotes_next_page(session, ctx, rng):
+    return session.request('GET', f"/api/all-quotes?cursor={ctx['next_cursor']}")[0]
+
+
+def scenario_all_quotes_by_status(session, ctx, rng):
+    status = rng.choice(['Aprobada', 'Rechazada', 'Pendiente de Aprobacion'])
+    return session.request('GET', f"/api/all-quotes?status={urllib.parse.quote(status)}&with_total=1")[0]
+
+
+def scenario_my_quotes(session, ctx, rng):
+    return session.request('GET', '/api/my-quotes')[0]
+
+
+def scenario_create_quote(session, ctx, rng):
+    items = [{'type_id': item['type_id'], 'code': item['code'], 'description': item['description'],
+              'quantity': rng.randint(1, 10), 'unit_price': item['unit_price']}
+             for item in rng.sample(ctx['catalog_items'], min(len(ctx['catalog_items']), rng.randint(1, 8)))]
+    body = {'customer_id': rng.choice(ctx['customer_ids']), 'items': items}
+    return session.request('POST', '/api/quotes', json_body=body)[0]
+
+
+def scenario_quote_pdf(session, ctx, rng):
+    return session.request('GET', f"/api/quote/{rng.choice(ctx['quote_ids'])}/pdf")[0]
+
+
+def scenario_pending_quotes(session, ctx, rng):
+    return session.request('GET', '/api/quotes/pending')[0]
+
+
+def scenario_active_orders(session, ctx, rng):
+    return session.request('GET', '/api/orders/active')[0]
+
+
+def scenario_reports_summary(session, ctx, rng):
+    return session.request('GET', '/api/reports/summary')[0]
+
+
+def scenario_catalog_search(session, ctx, rng):
+    return session.request('GET', f"/api/catalog/search?q={urllib.parse.quote(rng.choice(SEARCH_TERMS))}")[0]
+
+
+def scenario_customers_sync(session, ctx, rng):
+    return session.request('GET', f"/api/customers/sync?since={ctx['customers_cursor']}")[0]
+
+
+def scenario_client_portal(session, ctx, rng):
+    return session.request('GET', '/api/client/portal', headers={'Authorization': f"Bearer {ctx['client_token']}"})[0]
+
+
+SCENARIOS = [
+    ('all_quotes', 'jefe', scenario_all_quotes),
+    ('all_quotes_next_page', 'jefe', scenario_all_quotes_next_page),
+    ('all_quotes_by_status', 'jefe', scenario_all_quotes_by_status),
+    ('my_quotes', 'vendor', scenario_my_quotes),
+    ('create_quote', 'vendor', scenario_create_quote),
+    ('quote_pdf', 'jefe', scenario_quote_pdf),
+    ('pending_quotes', 'jefe', scenario_pending_quotes),
+    ('active_orders', 'jefe', scenario_active_orders),
+    ('reports_summary', 'jefe', scenario_reports_summary),
+    ('catalog_search', 'vendor', scenario_catalog_search),
+    ('customers_sync', 'vendor', scenario_customers_sync),
+    ('client_portal', 'client', scenario_client_portal),
+]
+
+
+def login(new_session, role, args):
+    session = new_session()
+    if role == 'client':
+        return session
+    email, password = (args.jefe_email, args.jefe_password) if role == 'jefe' else (args.vendor_email, args.vendor_password)
+    status, _ = session.request('POST', '/login', data={'email': email, 'password': password})
+    if status != 302:
+        raise RuntimeError(f"No se pudo iniciar sesión como {email} (HTTP {status})")
+    return session
+
+
+def build_context(new_session, args):
+    """Ids reales para los escenarios, obtenidos a través de la API."""
+    jefe = login(new_session, 'jefe', args)
+    first_page = get_json(jefe, '/api/all-quotes')
+    if not first_page['items'] or not first_page['next_cursor']:
+        raise RuntimeError("Hacen falta datos: correr bench/seed_data.py primero")
+    customers = get_json(jefe, '/api/customers')
+    approved = get_json(jefe, '/api/all-quotes?status=Aprobada&limit=1')['items']
+    client_nit = next(c['nit_ci'] for c in customers if c['company_name'] == approved[0]['company_name'])
+    status, body = jefe.request('POST', '/api/client/login', json_body={'nit_ci': client_nit})
+    if status != 200:
+        raise RuntimeError(f"No se pudo iniciar sesión como cliente {client_nit} (HTTP {status})")
+    catalog_items = []
+    for term in SEARCH_TERMS[:4]:
+        catalog_items += get_json(jefe, f"/api/catalog/search?q={urllib.parse.quote(term)}")
+    if not catalog_items:
+        raise RuntimeError("El catálogo está vacío")
+    return {
+        'next_cursor': first_page['next_cursor'],
+        'quote_ids': [row['id'] for row in get_json(jefe, '/api/all-quotes?limit=200')['items']],
+        'customer_ids': [c['id'] for c in customers],
+        'customers_cursor': get_json(jefe, '/api/customers/sync')['cursor'],
+        'client_token': json.loads(body)['token'],
+        'catalog_items': catalog_items,
+    }
+
+
+def run_scenario(name, role, fn, new_session, ctx, args):
+    sessions = [login(new_session, role, args) for _ in range(args.threads)]
+    for session in sessions[:1]:
+        fn(session, ctx, random.Random(args.seed))  # calentamiento (cachés, pool)
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def worker(session, rng):
+        local_latencies, local_statuses = [], {}
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = fn(session, ctx, rng)
+            except Exception as e:  # conexión cortada, timeout...
+                status = type(e).__name__
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(session, random.Random(args.seed + n)))
+               for n, session in enumerate(sessions)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    errors = sum(count for status, count in statuses.items() if not (isinstance(status, int) and status < 400))
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else 0.0,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(max(latencies, default=0) * 1000, 2),
+    }
+
+
+def dataset_counts():
+    if not os.environ.get('DATABASE_URL'):
+        return None
+    import psycopg2
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    try:
+        cursor = conn.cursor()
+        counts = {}
+        for table in ('users', 'customers', 'catalog', 'quotes', 'quote_items', 'orders'):
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cursor.fetchone()[0]
+        return counts
+    finally:
+        conn.close()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"{'escenario':<22} {'pet.':>7} {'err':>5} {'pet/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'máx':>8}")
+    for name, r in results.items():
+        print(f"{name:<22} {r['requests']:>7} {r['errors']:>5} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}")
+        old = (baseline or {}).get(name)
+        if old:
+            def delta(key):
+                return f"{(r[key] - old[key]) / old[key] * 100:+.0f}%" if old[key] else 'n/a'
+            print(f"{'  vs. anterior':<22} {'':>7} {'':>5} {delta('rps'):>8} {delta('p50_ms'):>8} "
+                  f"{delta('p95_ms'):>8} {delta('p99_ms'):>8} {delta('max_ms'):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrente de los endpoints principales')
+    parser.add_argument('--base-url', help='Servidor a medir; sin esto la app corre en este proceso')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10, help='duración de cada escenario')
+    parser.add_argument('--only', help='escenarios separados por coma (por defecto todos)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--jefe-email', default='jefe@genuino.com')
+    parser.add_argument('--jefe-password', default='admin')
+    parser.add_argument('--vendor-email', default='bench-vendor-1@genuino.com')
+    parser.add_argument('--vendor-password', default='bench')
+    parser.add_argument('--output', default='bench-results.json')
+    parser.add_argument('--compare', help='JSON de una corrida anterior para comparar')
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.only:
+        wanted = set(args.only.split(','))
+        unknown = wanted - {name for name, _, _ in SCENARIOS}
+        if unknown:
+            parser.error(f"escenarios desconocidos: {', '.join(sorted(unknown))}")
+        scenarios = [s for s in SCENARIOS if s[0] in wanted]
+
+    if args.base_url:
+        def new_session():
+            return HttpSession(args.base_url)
+    else:
+        # La configuración se lee al importar app.
+        os.environ['DB_POOL_MAX'] = str(max(args.threads + 2, 10))
+        os.environ.setdefault('PG_LISTEN', 'false')
+        from app import app
+
+        def new_session():
+            return FlaskSession(app)
+
+    ctx = build_context(new_session, args)
+    results = {}
+    for name, role, fn in scenarios:
+        print(f"Corriendo {name}...", flush=True)
+        results[name] = run_scenario(name, role, fn, new_session, ctx, args)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'target': args.base_url or 'in-process',
+            'threads': args.threads,
+            'seconds': args.seconds,
+            'seed': args.seed,
+            'python': sys.version.split()[0],
+            'cpus': os.cpu_count(),
+            'dataset': dataset_counts(),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+    print(f"Resultados en {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+# bench/seed_data.py
+# Llena una base PostgreSQL local con datos sintéticos realistas para los
+# benchmarks: clientes, vendedores, catálogo, cotizaciones, ítems y pedidos.
+#
+# Todo se carga con COPY en bloques y con una semilla fija, así dos corridas
+# con los mismos argumentos generan exactamente los mismos datos. Al final
+# reconstruye sales_rollup, ajusta los contadores de quote_numbers y corre
+# ANALYZE. NUNCA usar contra producción: --reset vacía las tablas.
+#
+# Uso: DATABASE_URL=... python bench/seed_data.py --reset
+#          [--customers 5000] [--vendors 20] [--catalog 2000] [--quotes 300000]
+#          [--items-per-quote 8] [--seed 42]
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queries  # noqa: E402
+from quote_numbers import DEFAULT_PREFIX, format_quote_number  # noqa: E402
+from rollups import rebuild_rollups  # noqa: E402
+
+BENCH_PASSWORD = 'bench'
+STATUSES = [('Aprobada', 0.55), ('Pendiente de Aprobacion', 0.2), ('Rechazada', 0.15), ('Borrador', 0.1)]
+ORDER_STATUSES = ['Pedido Confirmado', 'En Preparación', 'En Tránsito', 'Listo para Entrega']
+WORDS = ['Filtro', 'Bomba', 'Aceite', 'Correa', 'Pastilla', 'Disco', 'Amortiguador', 'Bujía', 'Radiador',
+         'Sensor', 'Rodamiento', 'Junta', 'Embrague', 'Alternador', 'Manguera', 'Termostato']
+BRANDS = ['Toyota', 'Nissan', 'Hyundai', 'Kia', 'Suzuki', 'Mitsubishi', 'Volkswagen', 'Chevrolet']
+BLOCK_ROWS = 50000
+
+
+def copy_rows(cursor, table, columns, rows):
+    """COPY en bloques de BLOCK_ROWS filas; devuelve cuántas se cargaron."""
+    total = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        buffer.seek(0)
+        buffer.truncate()
+
+    for row in rows:
+        writer.writerow(row)
+        total += 1
+        if total % BLOCK_ROWS == 0:
+            flush()
+    if buffer.tell():
+        flush()
+    return total
+
+
+def weighted_status(rng):
+    value = rng.random()
+    for status, weight in STATUSES:
+        value -= weight
+        if value <= 0:
+            return status
+    return STATUSES[-1][0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Carga datos sintéticos para benchmarks')
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--vendors', type=int, default=20)
+    parser.add_argument('--catalog', type=int, default=2000)
+    parser.add_argument('--quotes', type=int, default=300000)
+    parser.add_argument('--items-per-quote', type=int, default=8, help='promedio (1 a 2x-1)')
+    parser.add_argument('--days', type=int, default=730, help='antigüedad de la cotización más vieja')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='Vaciar las tablas antes de cargar')
+    args = parser.parse_args()
+
+    from werkzeug.security import generate_password_hash
+    rng = random.Random(args.seed)
+    conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
+    cursor = conn.cursor()
+    started = time.perf_counter()
+
+    if args.reset:
+        print("Vaciando tablas...")
+        cursor.execute("""
+            TRUNCATE orders, quote_items, quotes, sales_rollup, quote_counters, customer_tombstones,
+                     customers, catalog RESTART IDENTITY CASCADE
+        """)
+        cursor.execute("DELETE FROM users WHERE email LIKE 'bench-vendor-%%@genuino.com'")
+
+    cursor.execute("SELECT id FROM catalog_types ORDER BY id")
+    type_ids = [row[0] for row in cursor.fetchall()]
+    if not type_ids:
+        print("No hay tipos de catálogo: correr init_db.py primero.")
+        sys.exit(1)
+
+    # Vendedores (un solo hash para todos: la contraseña es BENCH_PASSWORD).
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    vendor_ids = []
+    for n in range(args.vendors):
+        cursor.execute("""
+            INSERT INTO users (fullname, email, password_hash, role, is_active)
+            VALUES (%s, %s, %s, 'Vendedor', true)
+            ON CONFLICT (email) DO UPDATE SET password_hash = EXCLUDED.password_hash RETURNING id
+        """, (f"Vendedor Bench {n + 1}", f"bench-vendor-{n + 1}@genuino.com", password_hash))
+        vendor_ids.append(cursor.fetchone()[0])
+    cursor.execute(queries.BUMP_VERSION_SQL, ('users_version',))  # ETag de GET /api/users
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM customers")
+    first_customer = cursor.fetchone()[0] + 1
+    count = copy_rows(cursor, 'customers', ('id', 'company_name', 'nit_ci', 'address', 'contact_person',
+                                            'contact_email'), (
+        (first_customer + n, f"{rng.choice(WORDS)} {rng.choice(BRANDS)} S.R.L. {n}", f"BENCH-{args.seed}-{n}",
+         f"Calle {rng.randint(1, 500)}", f"Contacto {n}", f"cliente{n}@example.com")
+        for n in range(args.customers)))
+    customer_ids = list(range(first_customer, first_customer + count))
+    cursor.execute("SELECT setval(pg_get_serial_sequence('customers', 'id'), (SELECT MAX(id) FROM customers))")
+    print(f"Clientes: {count}")
+
+    catalog = []
+
+    def catalog_rows():
+        for n in range(args.catalog):
+            item = (rng.choice(type_ids), f"B{args.seed}-{n:06d}",
+                    f"{rng.choice(WORDS)} {rng.choice(BRANDS)} modelo {rng.randint(1, 999)}",
+                    round(rng.uniform(5, 2500), 2))
+            catalog.append(item)
+            yield item
+    print(f"Catálogo: {copy_rows(cursor, 'catalog', ('type_id', 'code', 'description', 'unit_price'), catalog_rows())}")
+    # Igual que bump_catalog_version en app.py: invalida el índice de búsqueda y los ETag del catálogo.
+    cursor.execute(queries.BUMP_VERSION_SQL, ('catalog_version',))
+
+    # Los números siguen el formato real (COT-<año>-<correlativo>) a partir
+    # del contador de cada año, que se adelanta al final.
+    cursor.execute("SELECT year, last_value FROM quote_counters WHERE prefix = %s", (DEFAULT_PREFIX,))
+    counters = dict(cursor.fetchall())
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM quotes")
+    next_quote_id = cursor.fetchone()[0] + 1
+    now = datetime.now().replace(microsecond=0)
+    approved = []
+    quote_count = item_count = 0
+    while quote_count < args.quotes:
+        quotes, items = [], []
+        for _ in range(min(BLOCK_ROWS // 4, args.quotes - quote_count)):
+            quote_id = next_quote_id
+            next_quote_id += 1
+            created_at = now - timedelta(seconds=rng.randint(0, args.days * 86400))
+            counters[created_at.year] = counters.get(created_at.year, 0) + 1
+            total = 0.0
+            for _ in range(rng.randint(1, 2 * args.items_per_quote - 1)):
+                type_id, code, description, unit_price = rng.choice(catalog)
+                quantity = rng.randint(1, 20)
+                subtotal = round(quantity * unit_price, 2)
+                total += subtotal
+                items.append((quote_id, type_id, code, description, quantity, unit_price, subtotal))
+            status = weighted_status(rng)
+            if status == 'Aprobada':
+                approved.append(quote_id)
+            quotes.append((quote_id, format_quote_number(DEFAULT_PREFIX, created_at.year, counters[created_at.year]),
+                           rng.choice(customer_ids), rng.choice(vendor_ids), round(total, 2), status,
+                           created_at, created_at))
+        quote_count += copy_rows(cursor, 'quotes', ('id', 'quote_number', 'customer_id', 'user_id', 'total_amount',
+                                                    'status', 'created_at', 'updated_at'), quotes)
+        item_count += copy_rows(cursor, 'quote_items', ('quote_id', 'type_id', 'code', 'description', 'quantity',
+                                                        'unit_price', 'subtotal'), items)
+        print(f"  cotizaciones: {quote_count}  ítems: {item_count}", end='\r', flush=True)
+    print(f"Cotizaciones: {quote_count}  ítems: {item_count}          ")
+    cursor.execute("SELECT setval(pg_get_serial_sequence('quotes', 'id'), (SELECT MAX(id) FROM quotes))")
+    for year, last_value in counters.items():
+        cursor.execute("""
+            INSERT INTO quote_counters (prefix, year, last_value) VALUES (%s, %s, %s)
+            ON CONFLICT (prefix, year) DO UPDATE SET last_value = GREATEST(quote_counters.last_value, EXCLUDED.last_value)
+        """, (DEFAULT_PREFIX, year, last_value))
+
+    with_orders = rng.sample(approved, len(approved) // 2)
+    orders = copy_rows(cursor, 'orders', ('quote_id', 'order_status', 'last_update'), (
+        (quote_id, rng.choice(ORDER_STATUSES), now - timedelta(seconds=rng.randint(0, 30 * 86400)))
+        for quote_id in with_orders))
+    print(f"Pedidos: {orders}")
+    conn.commit()
+
+    print("Reconstruyendo sales_rollup...")
+    rebuild_rollups(conn)
+    cursor.execute("ANALYZE")
+    conn.commit()
+    cursor.close()
+    conn.close()
+    print(f"Listo en {time.perf_counter() - started:.1f}s. Vendedores: bench-vendor-N@genuino.com / {BENCH_PASSWORD}")
+
+
+if __name__ == '__main__':
+    main()
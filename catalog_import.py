@@ -0,0 +1,115 @@
+# catalog_import.py
+# Carga masiva del catálogo desde un CSV (listas de precios de proveedores).
+#
+# El archivo pasa tal cual a una tabla temporal con COPY (sin parsear fila por
+# fila en Python); la validación y el alta/actualización sobre (type_id, code)
+# son sentencias sobre toda la tabla, en una sola transacción. Las filas
+# inválidas se informan por número de línea sin abortar el resto.
+#
+# Columnas (primera fila, en cualquier orden; se ignoran las demás):
+#   type_name o type_id, code, description, unit_price
+# Separador ',' o ';' (el de Excel en español), UTF-8 con o sin BOM.
+import re
+
+KNOWN_COLUMNS = ('type_id', 'type_name', 'code', 'description', 'unit_price')
+REQUIRED_COLUMNS = ('code', 'description', 'unit_price')
+MAX_REPORTED_ERRORS = 100
+
+
+def _read_header(stream):
+    line = stream.readline()
+    if isinstance(line, bytes):
+        line = line.decode('utf-8-sig')
+    line = line.lstrip('\ufeff').rstrip('\r\n')
+    delimiter = ';' if line.count(';') > line.count(',') else ','
+    names = [re.sub(r'\s+', '_', name.strip().strip('"').lower()) for name in line.split(delimiter)]
+    missing = [name for name in REQUIRED_COLUMNS if name not in names]
+    if 'type_id' not in names and 'type_name' not in names:
+        missing.append('type_name o type_id')
+    if missing:
+        raise ValueError(f"Faltan columnas en el CSV: {', '.join(missing)}")
+    return names, delimiter
+
+
+def import_catalog_csv(conn, stream, on_change=None):
+    """Carga el CSV de `stream` (binario o texto) y lo fusiona con catalog.
+
+    Las filas nuevas se insertan y las existentes (mismo tipo y código)
+    actualizan descripción y precio; si un código se repite en el archivo
+    vale la última línea. on_change(cursor) se llama antes del commit si algo
+    cambió (para subir catalog_version en la misma transacción).
+    Devuelve {'inserted', 'updated', 'unchanged', 'rejected', 'errors': [...]}.
+    Lanza ValueError si faltan columnas y psycopg2.DataError si el CSV está
+    mal formado (columnas de más o de menos en una línea, codificación).
+    """
+    names, delimiter = _read_header(stream)
+    # Una columna de texto por columna del archivo; las conocidas con su nombre.
+    columns = [name if name in KNOWN_COLUMNS and name not in names[:i] else f'extra_{i}'
+               for i, name in enumerate(names)]
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            CREATE TEMP TABLE catalog_staging (
+                line BIGSERIAL,
+                {', '.join(f'{column} TEXT' for column in columns)}
+            ) ON COMMIT DROP
+        """)
+        cursor.copy_expert(
+            f"COPY catalog_staging ({', '.join(columns)}) FROM STDIN "
+            f"WITH (FORMAT csv, DELIMITER '{delimiter}', ENCODING 'UTF8')", stream)
+
+        type_id_sql = 'NULL::int'
+        if 'type_id' in columns:
+            type_id_sql = "CASE WHEN btrim(s.type_id) ~ '^[0-9]{1,9}$' THEN btrim(s.type_id)::int END"
+        type_name_sql = 's.type_name' if 'type_name' in columns else 'NULL'
+        # Resuelve el tipo y normaliza cada fila; error queda NULL si es válida.
+        cursor.execute(f"""
+            CREATE TEMP TABLE catalog_checked ON COMMIT DROP AS
+            SELECT s.line + 1 AS line, t.id AS type_id, btrim(s.code) AS code,
+                   btrim(s.description) AS description,
+                   CASE WHEN btrim(s.unit_price) ~ '^[0-9]+([.,][0-9]+)?$'
+                        THEN replace(btrim(s.unit_price), ',', '.')::real END AS unit_price,
+                   CASE
+                       WHEN t.id IS NULL THEN 'Tipo de catálogo inexistente'
+                       WHEN coalesce(btrim(s.code), '') = '' THEN 'Falta el código'
+                       WHEN coalesce(btrim(s.description), '') = '' THEN 'Falta la descripción'
+                       WHEN NOT coalesce(btrim(s.unit_price) ~ '^[0-9]+([.,][0-9]+)?$', false) THEN 'Precio inválido'
+                   END AS error
+            FROM catalog_staging s
+            LEFT JOIN catalog_types t ON t.id = COALESCE({type_id_sql}, (
+                SELECT n.id FROM catalog_types n WHERE lower(n.name) = lower(btrim({type_name_sql})) LIMIT 1))
+        """)
+        cursor.execute("""
+            UPDATE catalog_checked c SET error = 'Código repetido en el archivo (vale la línea ' || later.line || ')'
+            FROM (SELECT type_id, code, MAX(line) AS line FROM catalog_checked WHERE error IS NULL
+                  GROUP BY type_id, code HAVING COUNT(*) > 1) later
+            WHERE c.error IS NULL AND c.type_id = later.type_id AND c.code = later.code AND c.line < later.line
+        """)
+        cursor.execute("""
+            WITH merged AS (
+                INSERT INTO catalog (type_id, code, description, unit_price)
+                SELECT type_id, code, description, unit_price FROM catalog_checked WHERE error IS NULL
+                ON CONFLICT (type_id, code) DO UPDATE
+                    SET description = EXCLUDED.description, unit_price = EXCLUDED.unit_price
+                    WHERE (catalog.description, catalog.unit_price) IS DISTINCT FROM (EXCLUDED.description, EXCLUDED.unit_price)
+                RETURNING xmax = 0 AS inserted
+            )
+            SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted),
+                   (SELECT COUNT(*) FROM catalog_checked WHERE error IS NULL),
+                   (SELECT COUNT(*) FROM catalog_checked WHERE error IS NOT NULL)
+            FROM merged
+        """)
+        inserted, updated, valid, rejected = cursor.fetchone()
+        cursor.execute("SELECT line, error FROM catalog_checked WHERE error IS NOT NULL ORDER BY line LIMIT %s",
+                       (MAX_REPORTED_ERRORS,))
+        errors = [{'line': line, 'error': error} for line, error in cursor.fetchall()]
+        if (inserted or updated) and on_change is not None:
+            on_change(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return {'inserted': inserted, 'updated': updated, 'unchanged': valid - inserted - updated,
+            'rejected': rejected, 'errors': errors}
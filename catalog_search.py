@@ -0,0 +1,183 @@
+# catalog_search.py
+# Índice en memoria del catálogo para la búsqueda "mientras se escribe".
+#
+# Búsqueda por prefijo (código y cada palabra de la descripción) con bisect
+# sobre listas ordenadas y, si no alcanza, búsqueda aproximada por trigramas
+# para tolerar errores de tipeo. Sin acentos ni mayúsculas.
+import bisect
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+FUZZY_MIN_SIMILARITY = 0.3
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', str(text or '').lower())
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _words(text):
+    return [word for word in ''.join(ch if ch.isalnum() else ' ' for ch in text).split() if word]
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CatalogIndex:
+    """Índice inmutable; para refrescarlo se construye uno nuevo."""
+
+    def __init__(self, rows):
+        # rows: dicts con id, type_id, code, description, unit_price
+        entries = []
+        for row in rows:
+            item = dict(row)
+            entries.append((item['type_id'], normalize(item['description']), normalize(item['code']), item))
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+        self.items = [entry[3] for entry in entries]
+        codes, words = [], []
+        self._item_words = []
+        positions_by_word = defaultdict(list)
+        for position, (_, description, code, _) in enumerate(entries):
+            item_words = set(_words(description))
+            item_words.add(code)
+            self._item_words.append(item_words)
+            codes.append((code, position))
+            for word in item_words:
+                words.append((word, position))
+                positions_by_word[word].append(position)
+        codes.sort()
+        words.sort()
+        self._codes = codes
+        self._words = words
+        # Trigramas sobre el vocabulario (palabras distintas), no sobre cada ítem.
+        self._vocabulary = list(positions_by_word)
+        self._vocabulary_positions = [positions_by_word[word] for word in self._vocabulary]
+        self._vocabulary_grams = []
+        self._trigram_index = defaultdict(list)
+        for word_id, word in enumerate(self._vocabulary):
+            grams = trigrams(word)
+            self._vocabulary_grams.append(len(grams))
+            for gram in grams:
+                self._trigram_index[gram].append(word_id)
+
+    @staticmethod
+    def _prefix_range(entries, prefix):
+        return bisect.bisect_left(entries, (prefix,)), bisect.bisect_left(entries, (prefix + '\uffff',))
+
+    def _similar_words(self, term):
+        """{posición: similitud} de los ítems con alguna palabra parecida a term."""
+        term_grams = trigrams(term)
+        shared = defaultdict(int)
+        for gram in term_grams:
+            for word_id in self._trigram_index.get(gram, ()):
+                shared[word_id] += 1
+        best = {}
+        for word_id, common in shared.items():
+            similarity = common / (len(term_grams) + self._vocabulary_grams[word_id] - common)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                for position in self._vocabulary_positions[word_id]:
+                    if similarity > best.get(position, 0):
+                        best[position] = similarity
+        return best
+
+    def search(self, query, type_id=None, limit=20):
+        query = normalize(query).strip()
+
+        def allowed(position):
+            return type_id is None or self.items[position]['type_id'] == type_id
+
+        if not query:
+            return [item for item in self.items if type_id is None or item['type_id'] == type_id][:limit]
+
+        results, seen = [], set()
+
+        def take(positions):
+            for position in positions:
+                if position not in seen and allowed(position):
+                    seen.add(position)
+                    results.append(position)
+                    if len(results) >= limit:
+                        return True
+            return False
+
+        # 1) Código exacto, 2) prefijo de código.
+        start, end = self._prefix_range(self._codes, query)
+        code_matches = [position for _, position in self._codes[start:end]]
+        exact = [p for p in code_matches if self._codes_equal(p, query)]
+        if take(exact) or take(code_matches):
+            return [self.items[p] for p in results]
+
+        # 3) Todas las palabras como prefijo: se recorre el término con menos
+        #    coincidencias y el resto se verifica contra las palabras del ítem.
+        terms = _words(query)
+        if terms:
+            ranges = sorted((self._prefix_range(self._words, term), term) for term in terms)
+            ranges.sort(key=lambda r: r[0][1] - r[0][0])
+            (start, end), _ = ranges[0]
+            others = [term for _, term in ranges[1:]]
+            matches = (position for _, position in self._words[start:end]
+                       if all(any(word.startswith(term) for word in self._item_words[position]) for term in others))
+            if take(matches):
+                return [self.items[p] for p in results]
+
+        # 4) Aproximada por trigramas: cada término debe parecerse a alguna palabra del ítem.
+        scores = None
+        for term in terms or [query]:
+            similar = self._similar_words(term)
+            if scores is None:
+                scores = similar
+            else:
+                scores = {p: scores[p] + sim for p, sim in similar.items() if p in scores}
+            if not scores:
+                break
+        if scores:
+            take(position for position, _ in sorted(scores.items(), key=lambda kv: (-kv[1], kv[0])))
+        return [self.items[p] for p in results]
+
+    def _codes_equal(self, position, query):
+        return normalize(self.items[position]['code']) == query
+
+
+class CatalogSearch:
+    """Mantiene un CatalogIndex al día con la versión del catálogo en la BD.
+
+    load_rows() trae el catálogo completo y load_version() la versión actual
+    (un número que las escrituras incrementan). La versión se consulta como
+    mucho cada `check_interval` segundos; invalidate() fuerza la recarga en
+    este worker.
+    """
+
+    def __init__(self, load_rows, load_version, check_interval=5.0):
+        self._load_rows = load_rows
+        self._load_version = load_version
+        self.check_interval = check_interval
+        self._index = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = 0.0
+            self._version = None
+
+    def index(self):
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < self.check_interval:
+            return self._index
+        with self._lock:
+            if self._index is not None and now - self._checked_at < self.check_interval:
+                return self._index
+            version = self._load_version()
+            if self._index is None or version != self._version:
+                self._index = CatalogIndex(self._load_rows())
+                self._version = version
+            self._checked_at = time.monotonic()
+            return self._index
+
+    def search(self, query, type_id=None, limit=20):
+        return self.index().search(query, type_id=type_id, limit=limit)
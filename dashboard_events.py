@@ -0,0 +1,90 @@
+# dashboard_events.py
+# Cambios de cotizaciones y pedidos para el tablero del Jefe de Ventas (SSE).
+#
+# Las escrituras llaman a notify_quote/notify_order con su cursor, dentro de
+# la misma transacción: pg_notify solo se entrega si hay COMMIT. Cada worker
+# recibe el aviso por su PgListener y lo reparte a sus tableros abiertos con
+# EventBroker, sin volver a consultar la base. Otros suscriptores (la caché
+# del portal de clientes) usan customer_id para invalidar solo lo necesario.
+import json
+import queue
+import threading
+
+CHANNEL = 'dashboard'
+RELOAD = json.dumps({'type': 'reload'})
+
+_QUOTE_EVENT_SQL = """
+    SELECT pg_notify(%s, json_build_object(
+        'type', 'quote', 'event', %s, 'id', q.id, 'quote_number', q.quote_number, 'customer_id', q.customer_id,
+        'status', q.status, 'total_amount', q.total_amount,
+        'company_name', c.company_name, 'vendedor_name', u.fullname,
+        'has_order', EXISTS (SELECT 1 FROM orders o WHERE o.quote_id = q.id))::text)
+    FROM quotes q JOIN customers c ON q.customer_id = c.id JOIN users u ON q.user_id = u.id
+    WHERE q.id = %s
+"""
+
+_ORDER_EVENT_SQL = """
+    SELECT pg_notify(%s, json_build_object(
+        'type', 'order', 'event', %s, 'id', o.id, 'order_status', o.order_status,
+        'quote_id', q.id, 'quote_number', q.quote_number, 'customer_id', q.customer_id,
+        'company_name', c.company_name, 'vendedor_name', u.fullname)::text)
+    FROM orders o JOIN quotes q ON o.quote_id = q.id
+    JOIN customers c ON q.customer_id = c.id JOIN users u ON q.user_id = u.id
+    WHERE o.id = %s
+"""
+
+
+def notify_quote(cursor, quote_id, event):
+    """event: 'created', 'approved' o 'rejected'."""
+    cursor.execute(_QUOTE_EVENT_SQL, (CHANNEL, event, quote_id))
+
+
+def notify_order(cursor, order_id, event):
+    """event: 'created' o 'status'."""
+    cursor.execute(_ORDER_EVENT_SQL, (CHANNEL, event, order_id))
+
+
+def notify_reload(cursor):
+    """Para cambios masivos (importaciones): los tableros recargan sus listas."""
+    cursor.execute("SELECT pg_notify(%s, %s)", (CHANNEL, RELOAD))
+
+
+class EventBroker:
+    """Reparte cada evento a la cola de cada cliente conectado a este worker."""
+
+    def __init__(self, max_clients=50, queue_size=100):
+        self.max_clients = max_clients
+        self.queue_size = queue_size
+        self._clients = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """Devuelve la cola del nuevo cliente, o None si el worker está lleno."""
+        with self._lock:
+            if len(self._clients) >= self.max_clients:
+                return None
+            client = queue.Queue(maxsize=self.queue_size)
+            self._clients.add(client)
+            return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def publish(self, payload):
+        # payload None = el listener se reconectó y pudo perder avisos.
+        data = RELOAD if payload is None else payload
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.put_nowait(data)
+            except queue.Full:
+                # Cliente lento: se vacía su cola y se le pide recargar todo.
+                with client.mutex:
+                    client.queue.clear()
+                client.put_nowait(RELOAD)
+
+    def client_count(self):
+        with self._lock:
+            return len(self._clients)
@@ -0,0 +1,263 @@
+# db_pool.py
+# Pool de conexiones a PostgreSQL compartido por todos los hilos de un worker.
+#
+# Cada worker de gunicorn crea su propio pool (las conexiones no se pueden
+# compartir entre procesos después del fork). app.py toma una conexión por
+# petición y la devuelve en el teardown, así load_user y la vista usan la misma.
+import collections
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """No hubo una conexión libre dentro del tiempo de espera configurado."""
+
+
+_timed_cursor_classes = {}
+
+
+def _timed_cursor_class(base):
+    """Subclase de `base` que informa la duración de cada consulta al pool."""
+    cls = _timed_cursor_classes.get(base)
+    if cls is not None:
+        return cls
+
+    def timed(method_name, with_params):
+        method = getattr(base, method_name)
+
+        def report(self, start, args, kwargs, ok):
+            pool = getattr(self.connection, '_pool', None)
+            if pool is None or pool.on_query is None:
+                return
+            params = (args[1] if len(args) > 1 else kwargs.get('vars')) if with_params else None
+            try:
+                pool.on_query(time.perf_counter() - start, self, args[0] if args else None, params, ok)
+            except Exception as e:
+                # La medición nunca reemplaza el resultado (ni el error) de la consulta.
+                print(f"Error registrando la consulta: {e!r}")
+
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = method(self, *args, **kwargs)
+            except BaseException:
+                report(self, start, args, kwargs, False)
+                raise
+            report(self, start, args, kwargs, True)
+            return result
+        wrapper.__name__ = method_name
+        return wrapper
+
+    cls = type(f"Timed{base.__name__}", (base,), {
+        name: timed(name, name in ('execute', 'executemany', 'callproc'))
+        for name in ('execute', 'executemany', 'callproc', 'copy_expert', 'copy_from', 'copy_to')
+    })
+    _timed_cursor_classes[base] = cls
+    return cls
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Conexión que sabe volver a su pool.
+
+    El código existente llama a conn.close() al terminar; en una conexión del
+    pool eso la devuelve (o no hace nada si está atada a la petición actual,
+    ya que la devuelve el teardown).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = None
+        self._uses = 0
+        self._created_at = time.monotonic()
+        self._request_bound = False
+
+    def cursor(self, *args, **kwargs):
+        # Con pool.on_query definido, los cursores (de cualquier cursor_factory)
+        # miden sus consultas.
+        if self._pool is not None and self._pool.on_query is not None:
+            if len(args) > 1:
+                kwargs['cursor_factory'], args = args[1], args[:1]
+            base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+            kwargs['cursor_factory'] = _timed_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
+    def close(self):
+        if self._pool is None or self.closed:
+            return super().close()
+        if self._request_bound:
+            return
+        self._pool.release(self)
+
+    def really_close(self):
+        if not self.closed:
+            super().close()
+
+
+class ConnectionPool:
+    """Pool acotado con espera, chequeo al prestar y reciclado por usos.
+
+    on_connect(segundos) se llama tras abrir cada conexión y on_query(segundos,
+    cursor, sql, params, ok) tras cada consulta de sus cursores (métricas y
+    traza); ok es False si la consulta lanzó un error.
+    """
+
+    def __init__(self, dsn, minconn=1, maxconn=10, timeout=5.0, max_uses=1000,
+                 health_check=True, connection_factory=PooledConnection, on_connect=None, on_query=None):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Configuración de pool inválida: se requiere 0 <= min <= max y max >= 1")
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_uses = max_uses
+        self.health_check = health_check
+        self.connection_factory = connection_factory
+        self.on_connect = on_connect
+        self.on_query = on_query
+        self._idle = collections.deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = {
+            'connections_opened': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'checkout_timeouts': 0,
+            'failed_health_checks': 0,
+            'recycled': 0,
+            'wait_time_total': 0.0,
+            'connect_time_total': 0.0,
+        }
+        for _ in range(minconn):
+            conn = self._connect()
+            with self._cond:
+                self._size += 1
+                self._idle.append(conn)
+
+    def _connect(self):
+        start = time.perf_counter()
+        conn = psycopg2.connect(self.dsn, connection_factory=self.connection_factory)
+        elapsed = time.perf_counter() - start
+        conn._pool = self
+        with self._cond:
+            self._stats['connections_opened'] += 1
+            self._stats['connect_time_total'] += elapsed
+        if self.on_connect is not None:
+            self.on_connect(elapsed)
+        return conn
+
+    def _discard(self, conn):
+        # Se llama sin el lock tomado; el tamaño ya fue ajustado por quien llama.
+        try:
+            conn.really_close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._stats['connections_closed'] += 1
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        try:
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            # Cursor sin medir: el chequeo no cuenta como consulta de la petición.
+            cursor = psycopg2.extensions.connection.cursor(conn)
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def acquire(self):
+        """Presta una conexión; espera hasta `timeout` segundos si el pool está lleno."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            conn = None
+            must_connect = False
+            with self._cond:
+                if self._closed:
+                    raise psycopg2.InterfaceError("El pool de conexiones está cerrado")
+                while not self._idle and self._size >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['checkout_timeouts'] += 1
+                        raise PoolTimeout(
+                            f"No hay conexiones libres en el pool (máximo {self.maxconn}) tras {self.timeout}s")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn = self._idle.pop()
+                else:
+                    self._size += 1
+                    must_connect = True
+
+            if must_connect:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif self.health_check and not self._is_healthy(conn):
+                with self._cond:
+                    self._size -= 1
+                    self._stats['failed_health_checks'] += 1
+                    self._cond.notify()
+                self._discard(conn)
+                continue
+
+            conn._uses += 1
+            with self._cond:
+                self._stats['checkouts'] += 1
+                self._stats['wait_time_total'] += time.monotonic() - start
+            return conn
+
+    def release(self, conn):
+        """Devuelve una conexión al pool, descartándola si está rota o gastada."""
+        conn._request_bound = False
+        reusable = not conn.closed
+        if reusable:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                reusable = False
+        recycle = reusable and self.max_uses and conn._uses >= self.max_uses
+        with self._cond:
+            if reusable and not recycle and not self._closed:
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+            self._size -= 1
+            if recycle:
+                self._stats['recycled'] += 1
+            self._cond.notify()
+        self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            data = dict(self._stats)
+            data.update({
+                'min': self.minconn,
+                'max': self.maxconn,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+            })
+        return data
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
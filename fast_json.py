@@ -0,0 +1,87 @@
+# fast_json.py
+# Serialización JSON rápida para las respuestas de la API.
+#
+# FastJSONProvider reemplaza al proveedor de Flask (app.json): jsonify() pasa a
+# usar orjson, que recorre dicts/listas en C y devuelve bytes listos para la
+# respuesta. Las fechas y los Decimal se convierten igual que en Flask (fecha
+# HTTP en UTC, Decimal como texto), así que el JSON es semánticamente el mismo
+# (JSON.parse da los mismos valores), pero no byte a byte: orjson escribe los
+# caracteres no ASCII tal cual en UTF-8 ("ñ") donde Flask escribía escapes
+# ("\u00f1"). Los ETag por contenido de esas respuestas cambian una vez.
+# Si orjson no está instalado se usa el json de Flask.
+#
+# rows_payload() arma la respuesta de un listado a partir de tuplas (cursor
+# normal, sin RealDictCursor): como lista de objetos, o en formato columnar
+# {"columns": [...], "rows": [[...], ...]} que repite los nombres una sola vez.
+from datetime import date, datetime, timezone
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él todo sigue igual, solo más lento
+    orjson = None
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    _SORTED_OPTIONS = _OPTIONS | orjson.OPT_SORT_KEYS
+
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def http_date(value):
+    """El mismo texto que werkzeug.http.http_date (UTC si no tiene zona), sin pasar por email.utils."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        hour, minute, second = value.hour, value.minute, value.second
+    else:
+        hour = minute = second = 0
+    return (f"{_DAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} "
+            f"{hour:02d}:{minute:02d}:{second:02d} GMT")
+
+
+def _default(value):
+    # Una fecha por fila en casi todos los listados: es lo único que orjson no hace en C.
+    if isinstance(value, date):
+        return http_date(value)
+    return DefaultJSONProvider.default(value)
+
+
+def columns_of(cursor):
+    return [column[0] for column in cursor.description]
+
+
+def rows_payload(columns, rows, columnar=False):
+    if columnar:
+        return {'columns': columns, 'rows': rows}
+    return [dict(zip(columns, row)) for row in rows]
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+
+    def dumps_bytes(self, obj):
+        if orjson is None:
+            return super().dumps(obj).encode('utf-8')
+        return orjson.dumps(obj, default=self.default, option=_SORTED_OPTIONS if self.sort_keys else _OPTIONS)
+
+    def dumps(self, obj, **kwargs):
+        # Con argumentos propios de json.dumps (indent, cls...) se respeta el camino de Flask.
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # En modo debug Flask indenta la salida; ahí no importa la velocidad.
+        if orjson is None or self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
@@ -0,0 +1,138 @@
+# http_cache.py
+# ETag, 304 y compresión para las respuestas de la API.
+#
+# Dos formas de ETag:
+#   - por versión: la vista declara de qué sello depende (p. ej. catalog_version)
+#     y si el navegador ya tiene esa versión se responde 304 sin consultar ni
+#     serializar nada (ver etag_from_version en app.py);
+#   - por contenido: para el resto de los GET JSON se usa un hash del cuerpo,
+#     que ahorra la transferencia pero no el trabajo de armar la respuesta.
+#
+# La compresión (brotli si está instalado y el cliente lo acepta, si no gzip)
+# se aplica a respuestas de texto de al menos `min_size` bytes, con
+# Vary: Accept-Encoding. Cada codificación es otra representación y lleva su
+# propio ETag fuerte (RFC 9110 §8.8.3): "<etag>-br", "<etag>-gz". Al comparar
+# If-None-Match se ignora ese sufijo (client_has), así un navegador que cambió
+# de Accept-Encoding igual recibe 304, con el ETag que ya tenía. Vale también
+# para los ETag que ponen las vistas (PDF, /api/customers/sync). Los cuerpos
+# comprimidos se guardan por ETag: el mismo catálogo no se vuelve a comprimir
+# para cada usuario.
+import gzip
+import hashlib
+
+from ttl_cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se usa gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/csv', 'text/css',
+                          'application/javascript')
+CODING_SUFFIXES = {'br': '-br', 'gzip': '-gz'}
+
+
+def version_etag(key, version):
+    return 'v' + hashlib.blake2b(f"{key}|{version}".encode('utf-8'), digest_size=12).hexdigest()
+
+
+def body_etag(body):
+    return 'h' + hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def coded_etag(etag, encoding):
+    """ETag de la representación con Content-Encoding `encoding` (None: sin comprimir)."""
+    return etag + CODING_SUFFIXES[encoding] if encoding else etag
+
+
+class HttpCache:
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=5, cache_size=32, cache_ttl=300.0):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._compressed = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    def choose_encoding(self, request):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def client_has(self, request, etag):
+        """El ETag de If-None-Match que corresponde a `etag` en alguna codificación, o None.
+
+        If-None-Match usa comparación débil (RFC 9110). El 304 debe llevar el
+        ETag devuelto, que es el de la representación que el cliente guardó.
+        """
+        if not request.if_none_match:
+            return None
+        for candidate in (etag, *(etag + suffix for suffix in CODING_SUFFIXES.values())):
+            if request.if_none_match.contains_weak(candidate):
+                return candidate
+        return None
+
+    def not_modified(self, response_class, etag, cache_control='private, no-cache'):
+        response = response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def _compress(self, body, encoding):
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def finalize(self, request, response, etag=None, add_etag=False):
+        """ETag, 304 y compresión sobre una respuesta ya armada.
+
+        `etag` es el de versión (si la vista lo declaró); con add_etag se
+        calcula uno por contenido para las respuestas que no traen uno propio.
+        Devuelve la respuesta a enviar (puede ser un 304 nuevo).
+        """
+        if (request.method not in ('GET', 'HEAD') or response.status_code != 200 or response.is_streamed
+                or response.direct_passthrough or 'Content-Encoding' in response.headers):
+            return response
+        body = response.get_data()
+        compressible = response.mimetype in COMPRESSIBLE_MIMETYPES and len(body) >= self.min_size \
+            and 'no-transform' not in response.headers.get('Cache-Control', '')
+        encoding = self.choose_encoding(request) if compressible else None
+
+        # Un ETag puesto por la vista se respeta (y su 304 lo resuelve ella);
+        # solo se le agrega el sufijo de la codificación.
+        own_etag = 'ETag' not in response.headers
+        if own_etag:
+            if etag is None and add_etag:
+                etag = body_etag(body)
+            if etag is not None:
+                matched = self.client_has(request, etag)
+                if matched:
+                    return self.not_modified(type(response), matched,
+                                             response.headers.get('Cache-Control', 'private, no-cache'))
+                response.set_etag(coded_etag(etag, encoding))
+                response.headers.setdefault('Cache-Control', 'private, no-cache')
+        elif encoding is not None:
+            view_etag, weak = response.get_etag()
+            if view_etag and not weak:
+                response.set_etag(coded_etag(view_etag, encoding))
+
+        if compressible:
+            response.vary.add('Accept-Encoding')
+        if encoding is None:
+            return response
+        # Solo con ETag propio: uno de la vista puede repetirse con cuerpos
+        # distintos (p. ej. según los parámetros).
+        cache_key = (etag, encoding) if own_etag and etag else None
+        compressed = self._compressed.get(cache_key) if cache_key else None
+        if compressed is None:
+            compressed = self._compress(body, encoding)
+            if cache_key:
+                self._compressed.set(cache_key, compressed)
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def stats(self):
+        return dict(self._compressed.stats(), brotli=brotli is not None)
@@ -0,0 +1,81 @@
+# import_quotes.py
+# Carga masiva de cotizaciones desde un archivo (migración de planillas).
+#
+# Formatos aceptados:
+#   .json  lista de cotizaciones (o {"quotes": [...]}) con el mismo formato que
+#          POST /api/quotes/batch.
+#   .csv   una fila por ítem; las filas con el mismo quote_ref forman una
+#          cotización. Columnas: quote_ref, customer_nit (o customer_id),
+#          created_at (opcional), vendor_email (opcional), type_name (o type_id),
+#          code, description, quantity, unit_price.
+#
+# Uso: DATABASE_URL=... python import_quotes.py archivo.csv --user-email jefe@genuino.com
+import argparse
+import csv
+import json
+import os
+import sys
+
+import psycopg2
+
+from quote_import import import_quotes
+
+
+def read_csv_quotes(path):
+    quotes = {}
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            ref = row.get('quote_ref') or str(len(quotes))
+            quote = quotes.get(ref)
+            if quote is None:
+                quote = quotes[ref] = {'items': []}
+                for key in ('customer_nit', 'customer_id', 'created_at', 'vendor_email'):
+                    if row.get(key):
+                        quote[key] = row[key]
+            quote['items'].append({key: row.get(key) for key in
+                                   ('type_id', 'type_name', 'code', 'description', 'quantity', 'unit_price')
+                                   if row.get(key)})
+    return list(quotes.values())
+
+
+def read_json_quotes(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return data['quotes'] if isinstance(data, dict) else data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa cotizaciones en lote')
+    parser.add_argument('path', help='Archivo .csv o .json')
+    parser.add_argument('--user-email', required=True, help='Vendedor por defecto de las cotizaciones')
+    args = parser.parse_args()
+
+    quotes = read_json_quotes(args.path) if args.path.endswith('.json') else read_csv_quotes(args.path)
+    conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT email, id FROM users")
+        users_by_email = dict(cursor.fetchall())
+        cursor.close()
+        if args.user_email not in users_by_email:
+            print(f"No existe el usuario {args.user_email}")
+            sys.exit(1)
+        for quote in quotes:
+            email = quote.pop('vendor_email', None)
+            if email:
+                # Un email desconocido deja user_id inválido y la fila se informa como error.
+                quote['user_id'] = users_by_email.get(email, -1)
+        print(f"Importando {len(quotes)} cotizaciones desde {args.path}...")
+        result = import_quotes(conn, quotes, users_by_email[args.user_email])
+    finally:
+        conn.close()
+
+    print(f"Creadas: {len(result['created'])}  Con errores: {len(result['errors'])}")
+    for error in result['errors']:
+        print(f"  #{error['index']}: {error['error']}")
+    if result['errors']:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
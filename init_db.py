@@ -1,7 +1,12 @@
 # init_db.py (VERSIÓN CON CORRECCIÓN DE CONTRASEÑA)
+import argparse
+import json
 import os
+import sys
 import psycopg2
 from werkzeug.security import generate_password_hash # ¡IMPORTANTE!
+import queries
+from rollups import rebuild_rollups
 
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
@@ -34,6 +39,157 @@ INSERT INTO catalog_types (name) VALUES
 ON CONFLICT (name) DO NOTHING;
 """
 
+# --- MIGRACIONES VERSIONADAS ---
+# schema-postgresql.sql solo crea tablas (IF NOT EXISTS). Los cambios que
+# vienen después van aquí, numerados: cada versión se aplica una sola vez, en
+# su propia transacción, y queda registrada en schema_migrations. Para agregar
+# una, sumar una entrada al final con el siguiente número (nunca editar una ya
+# publicada). Todas usan IF NOT EXISTS para que volver a correrlas no falle.
+MIGRATIONS = [
+    (1, 'indices de cotizaciones por vendedor, estado, fecha y cliente', [
+        # Listados paginados: ORDER BY created_at DESC, id DESC con filtro opcional.
+        "CREATE INDEX IF NOT EXISTS idx_quotes_user_created ON quotes (user_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_quotes_status_created ON quotes (status, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_quotes_created ON quotes (created_at, id)",
+        # Portal de clientes y filtro por cliente (y la FK a customers).
+        "CREATE INDEX IF NOT EXISTS idx_quotes_customer_created ON quotes (customer_id, created_at, id)",
+    ]),
+    (2, 'indice de items por cotizacion', [
+        # PDF y huella del PDF: WHERE quote_id = %s ORDER BY type_id.
+        "CREATE INDEX IF NOT EXISTS idx_quote_items_quote_type ON quote_items (quote_id, type_id)",
+    ]),
+    (3, 'indice de pedidos en curso', [
+        # Tablero de pedidos: order_status != 'Listo para Entrega' ORDER BY last_update DESC.
+        "CREATE INDEX IF NOT EXISTS idx_orders_active_last_update ON orders (last_update) "
+        "WHERE order_status <> 'Listo para Entrega'",
+    ]),
+    (4, 'NOTIFY app_settings al cambiar un ajuste', [
+        # Los workers cachean app_settings y la descartan al recibir el aviso.
+        """
+        CREATE OR REPLACE FUNCTION app_settings_notify() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('app_settings', OLD.setting_key);
+            ELSE
+                PERFORM pg_notify('app_settings', NEW.setting_key);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS app_settings_notify ON app_settings",
+        "CREATE TRIGGER app_settings_notify AFTER INSERT OR UPDATE OR DELETE ON app_settings "
+        "FOR EACH ROW EXECUTE PROCEDURE app_settings_notify()",
+    ]),
+]
+
+# Clave del advisory lock que serializa a dos procesos migrando a la vez.
+MIGRATIONS_LOCK_KEY = 7410001
+
+
+def run_migrations(conn):
+    """Aplica las migraciones pendientes y devuelve la lista de versiones aplicadas."""
+    cursor = conn.cursor()
+    applied_now = []
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATIONS_LOCK_KEY,))
+        try:
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cursor.fetchall()}
+            conn.commit()
+            for version, name, statements in MIGRATIONS:
+                if version in applied:
+                    continue
+                print(f"Aplicando migración {version}: {name}...")
+                try:
+                    for statement in statements:
+                        cursor.execute(statement)
+                    cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+                    conn.commit()
+                except psycopg2.Error:
+                    conn.rollback()
+                    raise
+                applied_now.append(version)
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATIONS_LOCK_KEY,))
+            conn.commit()
+    finally:
+        cursor.close()
+    return applied_now
+
+
+# --- VERIFICACIÓN DE ÍNDICES ---
+# Las consultas calientes de la API (las mismas cadenas que ejecuta app.py, ver
+# queries.py) con parámetros de ejemplo y el índice que cada una debe usar. Con
+# enable_seqscan apagado el planificador solo elige un Seq Scan si no hay
+# ningún índice que sirva, así que la verificación vale aun con pocos datos.
+INDEX_CHECK_TABLES = {'quotes', 'quote_items', 'orders', 'catalog', 'customers', 'customer_tombstones'}
+_PAGE_LIMIT = 51
+INDEX_CHECKS = [
+    ('mis cotizaciones (paginado)', 'idx_quotes_user_created',
+     queries.quote_page_sql(queries.MY_QUOTES_SELECT, [queries.QUOTE_FILTERS['vendor_id']]), (1, _PAGE_LIMIT)),
+    ('mis cotizaciones (página siguiente)', 'idx_quotes_user_created',
+     queries.quote_page_sql(queries.MY_QUOTES_SELECT, [queries.QUOTE_FILTERS['vendor_id'], queries.QUOTE_PAGE_AFTER]),
+     (1, '2100-01-01', 100, _PAGE_LIMIT)),
+    ('todas las cotizaciones (paginado)', 'idx_quotes_created',
+     queries.quote_page_sql(queries.ALL_QUOTES_SELECT, []), (_PAGE_LIMIT,)),
+    ('cotizaciones por estado', 'idx_quotes_status_created',
+     queries.quote_page_sql(queries.ALL_QUOTES_SELECT, [queries.QUOTE_FILTERS['status']]), ('Aprobada', _PAGE_LIMIT)),
+    ('cotizaciones por cliente', 'idx_quotes_customer_created',
+     queries.quote_page_sql(queries.ALL_QUOTES_SELECT, [queries.QUOTE_FILTERS['customer_id']]), (1, _PAGE_LIMIT)),
+    ('pendientes de aprobación', 'idx_quotes_status_created', queries.PENDING_QUOTES_SQL, ()),
+    ('aprobadas sin pedido', 'idx_quotes_status_created', queries.APPROVED_WITHOUT_ORDER_SQL, ()),
+    ('pedidos en curso', 'idx_orders_active_last_update', queries.ACTIVE_ORDERS_SQL, ()),
+    ('clientes: sincronización', 'idx_customers_sync_txid', queries.CUSTOMERS_CHANGED_SQL, (1,)),
+    ('clientes: borrados', 'idx_customer_tombstones_sync_txid', queries.CUSTOMERS_DELETED_SQL, (1,)),
+    ('portal: login por NIT', 'customers_nit_ci_key', queries.CUSTOMER_BY_NIT_SQL, ('0',)),
+    ('portal: cotizaciones y pedidos', 'idx_quotes_customer_created', queries.CLIENT_PORTAL_SQL, {'customer_id': 1}),
+    ('huella del PDF', 'idx_quote_items_quote_type', queries.QUOTE_PDF_FINGERPRINT_SQL, (1,)),
+    ('ítems de una cotización (PDF)', 'idx_quote_items_quote_type', queries.PDF_ITEMS_SQL, (1,)),
+    ('catálogo por tipo', 'catalog_type_id_code_key', queries.CATALOG_TYPE_IN_USE_SQL, (1,)),
+    ('sello de versión de clientes', 'idx_customers_sync_txid', queries.CUSTOMERS_VERSION_SQL, ()),
+]
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+def check_indexes(conn):
+    """EXPLAIN de cada consulta de INDEX_CHECKS; devuelve las que no usan su índice."""
+    cursor = conn.cursor()
+    failures = []
+    try:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        for name, expected_index, sql, params in INDEX_CHECKS:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            nodes = list(_plan_nodes(plan[0]['Plan']))
+            problems = [f"Seq Scan en {node['Relation Name']}" for node in nodes
+                        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in INDEX_CHECK_TABLES]
+            if not any(node.get('Index Name') == expected_index for node in nodes):
+                problems.append(f"no usa {expected_index}")
+            print(f"  {'FALLA' if problems else 'ok':6} {name}{': ' + '; '.join(problems) if problems else ''}")
+            if problems:
+                failures.append((name, problems))
+    finally:
+        conn.rollback()
+        cursor.close()
+    return failures
+
+
 def initialize_database():
     conn = None
     try:
@@ -55,6 +211,17 @@ def initialize_database():
         cursor.execute(types_sql)
         
         conn.commit()
+
+        print("Aplicando migraciones pendientes...")
+        run_migrations(conn)
+
+        # Carga inicial del resumen de reportes (solo si todavía está vacío)
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM sales_rollup), EXISTS (SELECT 1 FROM quotes)")
+        rollup_has_rows, has_quotes = cursor.fetchone()
+        if has_quotes and not rollup_has_rows:
+            print("Reconstruyendo sales_rollup desde quotes...")
+            rebuild_rollups(conn)
+        conn.commit()
         cursor.close()
         print("¡Base de datos inicializada y contraseñas actualizadas exitosamente!")
         
@@ -68,4 +235,15 @@ def initialize_database():
             conn.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Inicializa y migra la base de datos')
+    parser.add_argument('--check-indexes', action='store_true',
+                        help='Solo verifica con EXPLAIN que las consultas principales usen índices')
+    args = parser.parse_args()
+    if args.check_indexes:
+        conn = psycopg2.connect(DATABASE_URL)
+        try:
+            failures = check_indexes(conn)
+        finally:
+            conn.close()
+        sys.exit(1 if failures else 0)
     initialize_database()
\ No newline at end of file
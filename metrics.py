@@ -0,0 +1,336 @@
+# metrics.py
+# Contadores e histogramas en memoria con salida en formato texto de Prometheus.
+#
+# Sin dependencias: observe()/inc() son un bisect y una suma bajo un lock.
+# Con varios workers de gunicorn cada proceso tiene sus propios números; si
+# se indica un directorio, cada worker deja ahí una foto (JSON, escritura
+# atómica) y quien atiende /metrics suma las de todos.
+#
+# Cada foto se llama worker-<pid>-<arranque>.json: un worker nuevo que reciba
+# el PID de uno muerto no pisa su archivo (los contadores no bajan). Al salir,
+# un worker suma sus contadores a aggregate.json y borra su foto; las fotos de
+# workers que murieron sin salir limpio (sin escribir en stale_flushes
+# intervalos y con el proceso ya inexistente) se suman igual al leer /metrics.
+# Solo se conservan métricas acumulativas (contadores, histogramas): un valor
+# instantáneo de un proceso muerto no significa nada.
+import atexit
+import bisect
+import glob
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # sin fcntl (Windows) no se bloquea el directorio
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+AGGREGATE_FILE = 'aggregate.json'
+LOCK_FILE = '.lock'
+# worker-<pid>-<arranque>.json, o <pid>.json de versiones anteriores
+_WORKER_FILE_RE = re.compile(r'^(?:worker-)?(\d+)(?:-\d+)?\.json$')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels_text(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # existe, pero es de otro usuario
+    return True
+
+
+class Counter:
+    kind = 'counter'
+    cumulative = True
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return {json.dumps(list(labels)): value for labels, value in self._values.items()}
+
+    @staticmethod
+    def merge(into, samples):
+        for key, value in samples.items():
+            into[key] = into.get(key, 0) + value
+
+    def render(self, samples):
+        lines = []
+        for key, value in sorted(samples.items()):
+            lines.append(f"{self.name}{_labels_text(self.labelnames, json.loads(key))} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    kind = 'histogram'
+    cumulative = True
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(labels)
+            if data is None:
+                # [conteo por bucket..., +Inf, suma]
+                data = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            data[index] += 1
+            data[-1] += value
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {json.dumps(list(labels)): list(data) for labels, data in self._values.items()}
+
+    @staticmethod
+    def merge(into, samples):
+        for key, data in samples.items():
+            current = into.get(key)
+            into[key] = list(data) if current is None else [a + b for a, b in zip(current, data)]
+
+    def render(self, samples):
+        lines = []
+        for key, data in sorted(samples.items()):
+            labels = json.loads(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), data[:-1]):
+                cumulative += count
+                le = ('le', _format_number(float(bound)) if bound != float('inf') else '+Inf')
+                lines.append(f"{self.name}_bucket{_labels_text(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labelnames, labels)} {_format_number(data[-1])}")
+            lines.append(f"{self.name}_count{_labels_text(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self, directory=None, flush_interval=5.0, stale_flushes=12):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.stale_after = flush_interval * stale_flushes
+        self._metrics = {}
+        self._flushed_at = 0.0
+        self._flush_lock = threading.Lock()
+        self._worker_pid = None
+        self._worker_path = None
+        self._retired = False
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def _own_path(self):
+        # Se calcula en el primer flush de cada proceso (después del fork de gunicorn).
+        pid = os.getpid()
+        if self._worker_pid != pid:
+            self._worker_pid = pid
+            self._worker_path = os.path.join(self.directory, f"worker-{pid}-{time.time_ns()}.json")
+            atexit.register(self._retire, pid)
+        return self._worker_path
+
+    def _locked(self):
+        return _DirectoryLock(os.path.join(self.directory, LOCK_FILE))
+
+    def _write_json(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def maybe_flush(self):
+        """Escribe la foto de este proceso como mucho cada flush_interval segundos."""
+        if self.directory and time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if not self.directory or self._retired:
+            return
+        if not self._flush_lock.acquire(blocking=False):
+            return  # otro hilo ya está escribiendo
+        try:
+            self._flushed_at = time.monotonic()
+            os.makedirs(self.directory, exist_ok=True)
+            self._write_json(self._own_path(), self.snapshot())
+        except OSError as e:
+            print(f"No se pudieron guardar las métricas: {e}")
+        finally:
+            self._flush_lock.release()
+
+    def _fold(self, snapshots):
+        """Suma las fotos (solo métricas acumulativas) a aggregate.json. Con el lock exclusivo tomado."""
+        path = os.path.join(self.directory, AGGREGATE_FILE)
+        try:
+            with open(path) as f:
+                aggregate = json.load(f)
+        except (OSError, ValueError):
+            aggregate = {}
+        for snapshot in snapshots:
+            for name, samples in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is not None and getattr(metric, 'cumulative', False):
+                    metric.merge(aggregate.setdefault(name, {}), samples)
+        self._write_json(path, aggregate)
+
+    def _retire(self, pid):
+        # atexit: el handler se hereda en el fork, solo actúa en el proceso que lo registró.
+        if pid != os.getpid() or self._retired:
+            return
+        self._retired = True
+        try:
+            with self._locked():
+                self._fold([self.snapshot()])
+                if os.path.exists(self._worker_path):
+                    os.remove(self._worker_path)
+        except OSError as e:
+            print(f"No se pudieron guardar las métricas al salir: {e}")
+
+    def _compact(self):
+        """Suma a aggregate.json las fotos de workers muertos y las borra."""
+        now = time.time()
+        dead = []
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            match = _WORKER_FILE_RE.match(os.path.basename(path))
+            if not match or path == self._worker_path:
+                continue
+            try:
+                stale = now - os.path.getmtime(path) > self.stale_after
+            except OSError:
+                continue
+            # Un worker ocioso no escribe pero sigue vivo: sumarlo duplicaría sus números.
+            if stale and not _pid_alive(int(match.group(1))):
+                dead.append(path)
+        if not dead:
+            return
+        snapshots = []
+        for path in dead:
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        self._fold(snapshots)
+        for path in dead:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _collect(self):
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        try:
+            with self._locked():
+                self._compact()
+                for path in glob.glob(os.path.join(self.directory, '*.json')):
+                    try:
+                        with open(path) as f:
+                            snapshots.append(json.load(f))
+                    except (OSError, ValueError):
+                        continue  # un worker reescribiéndola justo ahora
+        except OSError as e:
+            print(f"No se pudieron leer las métricas: {e}")
+            return [self.snapshot()]
+        return snapshots
+
+    def render(self):
+        merged = {name: {} for name in self._metrics}
+        for snapshot in self._collect():
+            for name, samples in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is not None:
+                    metric.merge(merged[name], samples)
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render(merged[name]))
+        return '\n'.join(lines) + '\n'
+
+
+class _DirectoryLock:
+    """flock sobre un archivo del directorio: compactar, retirar un worker y leer no se pisan entre procesos."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+        return False
@@ -0,0 +1,60 @@
+# passwords.py
+# Hash y verificación de contraseñas con un límite de concurrencia.
+#
+# scrypt/pbkdf2 son CPU pura: un montón de logins a la vez (cambio de turno)
+# dejaba a todos los workers calculando hashes. Aquí un semáforo por proceso
+# deja calcular como mucho `max_concurrency` hashes a la vez, en el mismo hilo
+# de la petición (hashlib suelta el GIL mientras calcula); si no hay lugar en
+# `queue_timeout` segundos se rechaza con PasswordHashBusy en vez de encolar
+# sin fin.
+#
+# `method` es el de werkzeug (p. ej. 'scrypt:32768:8:1' o
+# 'pbkdf2:sha256:600000'). Si cambia, needs_rehash() detecta los hashes
+# guardados con otros parámetros para regenerarlos en el próximo login.
+import threading
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class PasswordHashBusy(Exception):
+    """No hubo un lugar libre para calcular el hash dentro del tiempo de espera."""
+
+
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, max_concurrency=2, queue_timeout=5.0):
+        self.method = method
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        # Forma canónica que werkzeug guarda delante del primer '$'.
+        self.method_prefix = generate_password_hash('x', method=method).split('$', 1)[0]
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._stats = {'hashed': 0, 'verified': 0, 'rejected_busy': 0}
+
+    def _run(self, stat, fn, *args, **kwargs):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._stats['rejected_busy'] += 1
+            raise PasswordHashBusy()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            self._slots.release()
+        with self._lock:
+            self._stats[stat] += 1
+        return result
+
+    def hash(self, password):
+        return self._run('hashed', generate_password_hash, password, method=self.method)
+
+    def verify(self, password_hash, password):
+        return self._run('verified', check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.method_prefix
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, method=self.method_prefix, max_concurrency=self.max_concurrency)
@@ -0,0 +1,100 @@
+# pdf_cache.py
+# Caché en disco de PDFs de cotizaciones, direccionada por contenido.
+#
+# La clave de cada archivo es "<quote_id>-<huella>", donde la huella resume la
+# cotización, sus ítems y el logo. Si algo cambia la huella cambia y el PDF
+# viejo simplemente deja de usarse hasta que el desalojo LRU lo borra.
+# El directorio puede ser compartido por todos los workers.
+import glob
+import os
+import tempfile
+import threading
+
+
+class PdfCache:
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._approx_bytes = self._scan_size()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _scan_size(self):
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pdf'):
+                try:
+                    total += entry.stat().st_size
+                except FileNotFoundError:
+                    pass
+        return total
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # El mtime hace de "último uso" para el desalojo LRU.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self._approx_bytes += len(data)
+            if self._approx_bytes > self.max_bytes:
+                self._evict()
+
+    def invalidate(self, quote_id):
+        """Borra todas las versiones guardadas de una cotización."""
+        for path in glob.glob(os.path.join(self.directory, f"{int(quote_id)}-*.pdf")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        # Otros workers escriben en el mismo directorio: se recalcula desde disco.
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pdf'):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                total -= size
+        self._approx_bytes = total
+
+    def stats(self):
+        return {'directory': self.directory, 'max_bytes': self.max_bytes,
+                'approx_bytes': self._approx_bytes, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,155 @@
+# pdf_export.py
+# Exportación masiva de PDFs de cotizaciones a un ZIP.
+#
+# El trabajo pesado (ReportLab) corre en un pool de procesos aparte; un hilo
+# coordinador por trabajo prepara los datos, reparte los PDFs y los va
+# escribiendo en el ZIP a medida que terminan. Los hilos de las peticiones
+# solo encolan el trabajo y consultan su estado.
+#
+# El estado de cada trabajo se guarda como JSON junto al ZIP, así cualquier
+# worker de gunicorn puede responder por él (el que lo creó es el que lo ejecuta).
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from pdf_render import render_quote_pdf
+
+
+class PdfExportJobs:
+    def __init__(self, directory, max_processes=2, max_running_jobs=1, job_ttl=24 * 3600):
+        self.directory = directory
+        self.max_processes = max_processes
+        self.job_ttl = job_ttl
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._processes = None
+        self._coordinators = None
+        self._max_running_jobs = max_running_jobs
+
+    def _executors(self):
+        # Se crean en el primer uso de cada proceso (después del fork de gunicorn).
+        # 'spawn' evita heredar hilos, locks y conexiones del worker.
+        with self._lock:
+            if self._pid != os.getpid():
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.max_processes, mp_context=multiprocessing.get_context('spawn'))
+                self._coordinators = ThreadPoolExecutor(
+                    max_workers=self._max_running_jobs, thread_name_prefix='pdf-export')
+                self._pid = os.getpid()
+            return self._processes, self._coordinators
+
+    def _status_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def zip_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.zip")
+
+    def _write_status(self, job_id, status):
+        status['updated_at'] = time.time()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(status, f)
+        os.replace(tmp_path, self._status_path(job_id))
+
+    def status(self, job_id):
+        try:
+            with open(self._status_path(job_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def submit(self, quote_ids, owner_id, prepare, store):
+        """Encola la exportación y devuelve el id del trabajo.
+
+        prepare(quote_id) -> dict con 'filename' y, o bien 'pdf' (bytes ya
+        disponibles, p. ej. de la caché), o bien 'render_args' para
+        render_quote_pdf; None si la cotización no existe.
+        store(prepared, pdf_bytes) se llama tras renderizar (p. ej. para cachear).
+        """
+        self._cleanup()
+        job_id = uuid.uuid4().hex
+        status = {'job_id': job_id, 'owner_id': owner_id, 'status': 'queued',
+                  'total': len(quote_ids), 'done': 0, 'failed': 0, 'errors': [],
+                  'created_at': time.time()}
+        self._write_status(job_id, status)
+        _, coordinators = self._executors()
+        coordinators.submit(self._run, job_id, status, list(quote_ids), prepare, store)
+        return job_id
+
+    def _run(self, job_id, status, quote_ids, prepare, store):
+        processes, _ = self._executors()
+        status['status'] = 'running'
+        self._write_status(job_id, status)
+        used_names = set()
+        # Se limita cuántos PDFs hay en vuelo para no acumular memoria.
+        window = self.max_processes * 2
+        pending = {}
+        try:
+            with zipfile.ZipFile(self.zip_path(job_id) + '.part', 'w', zipfile.ZIP_DEFLATED) as archive:
+                def add(prepared, pdf_bytes):
+                    name = prepared['filename']
+                    if name in used_names:
+                        name = f"{prepared['quote_id']}-{name}"
+                    used_names.add(name)
+                    archive.writestr(name, pdf_bytes)
+                    status['done'] += 1
+
+                def fail(quote_id, error):
+                    status['failed'] += 1
+                    status['errors'].append({'quote_id': quote_id, 'error': str(error)})
+
+                def drain(block_until):
+                    while len(pending) > block_until:
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            prepared = pending.pop(future)
+                            try:
+                                pdf_bytes = future.result()
+                                store(prepared, pdf_bytes)
+                                add(prepared, pdf_bytes)
+                            except Exception as e:
+                                fail(prepared['quote_id'], e)
+                        self._write_status(job_id, status)
+
+                for quote_id in quote_ids:
+                    try:
+                        prepared = prepare(quote_id)
+                    except Exception as e:
+                        fail(quote_id, e)
+                        continue
+                    if prepared is None:
+                        fail(quote_id, 'Cotización no encontrada')
+                        continue
+                    prepared['quote_id'] = quote_id
+                    if prepared.get('pdf') is not None:
+                        add(prepared, prepared['pdf'])
+                        if status['done'] % 20 == 0:
+                            self._write_status(job_id, status)
+                        continue
+                    future = processes.submit(render_quote_pdf, *prepared.pop('render_args'))
+                    pending[future] = prepared
+                    drain(window)
+                drain(0)
+            os.replace(self.zip_path(job_id) + '.part', self.zip_path(job_id))
+            status['status'] = 'done'
+        except Exception as e:
+            print(f"Error en la exportación {job_id}: {e}")
+            status['status'] = 'failed'
+            status['errors'].append({'quote_id': None, 'error': str(e)})
+        self._write_status(job_id, status)
+
+    def _cleanup(self):
+        limit = time.time() - self.job_ttl
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.stat().st_mtime < limit:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
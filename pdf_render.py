@@ -0,0 +1,172 @@
+# pdf_render.py
+# Generación del PDF de una cotización con ReportLab.
+#
+# Todo lo que no depende de la cotización (hojas de estilo, estilos de tabla,
+# logo ya escalado) se construye una sola vez al importar el módulo.
+# render_quote_pdf() no toca la base de datos, así se puede usar también desde
+# procesos separados.
+import io
+import os
+from itertools import groupby
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_RIGHT
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from queries import PDF_ITEMS_SQL, PDF_QUOTE_SQL
+
+BASEDIR = os.path.abspath(os.path.dirname(__file__))
+# WhiteNoise sirve desde 'static', así que la ruta base es el directorio de la app
+LOGO_PATH = os.path.join(BASEDIR, 'static', 'logo.png')
+MAX_LOGO_WIDTH = 1.5 * inch
+
+
+def clean_text(text):
+    if text is None: return ''
+    return str(text)
+
+
+def _build_styles():
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='Right', alignment=TA_RIGHT, fontName='Helvetica'))
+    styles.add(ParagraphStyle(name='RightBold', alignment=TA_RIGHT, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='GroupHeader', fontName='Helvetica-Bold', fontSize=12, spaceBefore=12, spaceAfter=6))
+    styles['Normal'].fontName = 'Helvetica'
+    styles['Heading1'].fontName = 'Helvetica-Bold'
+    return styles
+
+
+def _load_logo():
+    """Lee y mide el logo una sola vez. Devuelve (bytes, ancho, alto) o None."""
+    if not os.path.exists(LOGO_PATH):
+        return None
+    try:
+        with open(LOGO_PATH, 'rb') as f:
+            data = f.read()
+        img_width, img_height = ImageReader(io.BytesIO(data)).getSize()
+        aspect_ratio = img_height / float(img_width)
+        width = min(img_width, MAX_LOGO_WIDTH)
+        return data, width, width * aspect_ratio
+    except Exception as e:
+        print(f"No se pudo cargar el logo para los PDFs: {e}")
+        return None
+
+
+STYLES = _build_styles()
+LOGO = _load_logo()
+LOGO_ERROR = os.path.exists(LOGO_PATH) and LOGO is None
+
+INFO_TABLE_STYLE = TableStyle([('VALIGN', (0, 0), (-1, -1), 'TOP'),])
+ITEMS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#EEEEEE')),
+    ('BOX', (0, 0), (-1, -1), 1, colors.black),
+    ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
+    ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
+    ('ALIGN', (4, 1), (4, -1), 'RIGHT'),
+    ('SPAN', (0, -1), (2, -1)),
+    ('ALIGN', (3, -1), (4, -1), 'RIGHT'),
+])
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BOX', (0, -1), (-1, -1), 1, colors.black),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#EEEEEE')),
+])
+ITEMS_COL_WIDTHS = [0.8 * inch, 0.5 * inch, 4.2 * inch, 1 * inch, 1 * inch]
+ITEMS_HEADER = ['Código', 'Cant.', 'Descripción', 'P. Unit.', 'Subtotal']
+
+
+def fetch_quote_for_pdf(cursor, quote_id):
+    """Trae la cotización y sus ítems agrupados por tipo en dos consultas.
+
+    cursor debe ser un RealDictCursor. Devuelve (quote, groups) donde groups es
+    una lista de (nombre_tipo, [ítems]) en el orden de catalog_types.id, o
+    (None, None) si la cotización no existe.
+    """
+    cursor.execute(PDF_QUOTE_SQL, (quote_id,))
+    quote = cursor.fetchone()
+    if not quote:
+        return None, None
+    cursor.execute(PDF_ITEMS_SQL, (quote_id,))
+    rows = cursor.fetchall()
+    groups = [(type_name, [dict(item) for item in items])
+              for (_, type_name), items in groupby(rows, key=lambda r: (r['type_id'], r['type_name']))]
+    return dict(quote), groups
+
+
+def render_quote_pdf(quote, groups):
+    """Construye el PDF y devuelve sus bytes."""
+    styles = STYLES
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter,
+                            rightMargin=0.5*inch, leftMargin=0.5*inch,
+                            topMargin=0.5*inch, bottomMargin=0.5*inch)
+    elements = []
+    if LOGO:
+        logo_bytes, logo_width, logo_height = LOGO
+        logo = Image(io.BytesIO(logo_bytes), width=logo_width, height=logo_height)
+        logo.hAlign = 'LEFT'
+        elements.append(logo)
+    elif LOGO_ERROR:
+        elements.append(Paragraph("Genuino PRO+ (Error Logo)", styles['Heading1']))
+    else:
+        elements.append(Paragraph("Genuino PRO+", styles['Heading1']))
+    elements.append(Spacer(1, 0.25 * inch))
+    elements.append(Paragraph('COTIZACION', styles['Heading1']))
+    elements.append(Paragraph(clean_text(quote['quote_number']), styles['Normal']))
+    elements.append(Spacer(1, 0.25 * inch))
+    data_info = [
+        [Paragraph('<b>Empresa:</b>', styles['Normal']), Paragraph('<b>Cliente:</b>', styles['Normal'])],
+        ['Genuino Importaciones', Paragraph(clean_text(quote['company_name']), styles['Normal'])],
+        ['NIT: 123456789', f"NIT/CI: {clean_text(quote['nit_ci'])}"],
+        ['Cochabamba, Bolivia', f"Atn: {clean_text(quote['contact_person'])}"],
+    ]
+    info_table = Table(data_info, colWidths=[3.5 * inch, 3.5 * inch])
+    info_table.setStyle(INFO_TABLE_STYLE)
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.25 * inch))
+    subtotals = {}
+    for type_name, items in groups:
+        elements.append(Paragraph(clean_text(type_name), styles['GroupHeader']))
+        data_items = [ITEMS_HEADER]
+        type_subtotal = 0.0
+        for item in items:
+            type_subtotal += item['subtotal']
+            data_items.append([
+                clean_text(item['code']),
+                item['quantity'],
+                Paragraph(clean_text(item['description']), styles['Normal']),
+                f"{item['unit_price']:,.2f}",
+                f"{item['subtotal']:,.2f}"
+            ])
+        subtotals[type_name] = type_subtotal
+        data_items.append([
+            '', '', '',
+            Paragraph(f"<b>Subtotal {type_name}</b>", styles['RightBold']),
+            Paragraph(f"<b>{type_subtotal:,.2f}</b>", styles['RightBold'])
+        ])
+        items_table = Table(data_items, colWidths=ITEMS_COL_WIDTHS)
+        items_table.setStyle(ITEMS_TABLE_STYLE)
+        elements.append(items_table)
+        elements.append(Spacer(1, 0.1 * inch))
+    elements.append(Spacer(1, 0.25 * inch))
+    summary_data = []
+    for type_name, amount in subtotals.items():
+        summary_data.append([
+            Paragraph(f"Total {type_name}", styles['Right']),
+            Paragraph(f"{amount:,.2f}", styles['Right'])
+        ])
+    summary_data.append([
+        Paragraph(f"<b>TOTAL GENERAL Bs.</b>", styles['RightBold']),
+        Paragraph(f"<b>{quote['total_amount']:,.2f}</b>", styles['RightBold'])
+    ])
+    summary_table = Table(summary_data, colWidths=[6.5 * inch, 1 * inch])
+    summary_table.setStyle(SUMMARY_TABLE_STYLE)
+    elements.append(summary_table)
+    doc.build(elements)
+    return buffer.getvalue()
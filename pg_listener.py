@@ -0,0 +1,77 @@
+# pg_listener.py
+# Hilo que escucha canales de PostgreSQL (LISTEN/NOTIFY) en una conexión propia.
+#
+# Cada worker de gunicorn arranca el suyo. Los callbacks reciben el payload de
+# la notificación, o None al (re)conectar: mientras la conexión estuvo caída
+# se pudieron perder avisos, así que quien cachea algo debe descartarlo.
+import select
+import threading
+
+import psycopg2
+import psycopg2.extensions
+
+
+class PgListener:
+    def __init__(self, dsn, reconnect_delay=5.0, poll_timeout=30.0):
+        self.dsn = dsn
+        self.reconnect_delay = reconnect_delay
+        self.poll_timeout = poll_timeout
+        self._callbacks = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.connected = False
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            self._callbacks.setdefault(channel, []).append(callback)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='pg-listener', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _dispatch(self, channel, payload):
+        for callback in list(self._callbacks.get(channel, ())):
+            try:
+                callback(payload)
+            except Exception as e:
+                print(f"Error en el callback de '{channel}': {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conn.cursor()
+                channels = list(self._callbacks)
+                for channel in channels:
+                    cursor.execute(f'LISTEN "{channel}"')
+                self.connected = True
+                for channel in channels:
+                    self._dispatch(channel, None)
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                        cursor.execute("SELECT 1")  # detecta conexiones muertas
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self._dispatch(notify.channel, notify.payload)
+            except (psycopg2.Error, OSError) as e:
+                print(f"PgListener desconectado: {e}")
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except psycopg2.Error:
+                        pass
+            self._stop.wait(self.reconnect_delay)
@@ -0,0 +1,127 @@
+# queries.py
+# SQL de las consultas calientes de la API, en un solo lugar.
+#
+# app.py (y pdf_render.py) ejecutan estas cadenas y `init_db.py
+# --check-indexes` corre EXPLAIN sobre las mismas, así la verificación de
+# índices no se desfasa de lo que corre de verdad. Una consulta nueva que deba
+# usar un índice va aquí y en INDEX_CHECKS de init_db.py.
+
+# --- LISTADOS DE COTIZACIONES (keyset sobre created_at, id) ---
+MY_QUOTES_SELECT = """
+    SELECT q.id, q.quote_number, q.created_at, q.total_amount, q.status,
+           c.company_name, q.rejection_reason
+    FROM quotes q
+    JOIN customers c ON q.customer_id = c.id"""
+ALL_QUOTES_SELECT = """
+    SELECT q.id, q.quote_number, q.created_at, q.total_amount, q.status, c.company_name,
+           q.rejection_reason, u.fullname as vendedor_name, u.id as user_id
+    FROM quotes q
+    JOIN customers c ON q.customer_id = c.id
+    JOIN users u ON q.user_id = u.id"""
+# Condición de cada filtro de la URL (un parámetro cada una).
+QUOTE_FILTERS = {
+    'vendor_id': "q.user_id = %s",
+    'status': "q.status = %s",
+    'customer_id': "q.customer_id = %s",
+    'date_from': "q.created_at >= %s",
+    'date_to': "q.created_at < %s",
+}
+QUOTE_PAGE_AFTER = "(q.created_at, q.id) < (%s, %s)"
+
+
+def _where_sql(where):
+    return f" WHERE {' AND '.join(where)}" if where else ''
+
+
+def quote_page_sql(select_sql, where):
+    """Página de cotizaciones: select_sql (alias q) + condiciones; el último parámetro es el LIMIT."""
+    return f"{select_sql}{_where_sql(where)} ORDER BY q.created_at DESC, q.id DESC LIMIT %s"
+
+
+def quote_count_sql(where):
+    return f"SELECT COUNT(*) AS total FROM quotes q{_where_sql(where)}"
+
+
+# --- BANDEJAS DEL JEFE DE VENTAS ---
+PENDING_QUOTES_SQL = (
+    "SELECT q.*, c.company_name, u.fullname as vendedor_name FROM quotes q "
+    "JOIN customers c ON q.customer_id = c.id JOIN users u ON q.user_id = u.id "
+    "WHERE q.status = 'Pendiente de Aprobacion' ORDER BY q.created_at DESC")
+APPROVED_WITHOUT_ORDER_SQL = (
+    "SELECT q.*, c.company_name, u.fullname as vendedor_name FROM quotes q "
+    "JOIN customers c ON q.customer_id = c.id JOIN users u ON q.user_id = u.id "
+    "WHERE q.status = 'Aprobada' AND NOT EXISTS (SELECT 1 FROM orders o WHERE o.quote_id = q.id) "
+    "ORDER BY q.created_at DESC")
+ACTIVE_ORDERS_SQL = (
+    "SELECT o.id, o.order_status, q.quote_number, c.company_name, q.id as quote_id, u.fullname as vendedor_name "
+    "FROM orders o JOIN quotes q ON o.quote_id = q.id JOIN customers c ON q.customer_id = c.id "
+    "JOIN users u ON q.user_id = u.id WHERE o.order_status != 'Listo para Entrega' ORDER BY o.last_update DESC")
+
+# --- CLIENTES ---
+CUSTOMERS_SQL = "SELECT id, company_name, nit_ci FROM customers ORDER BY company_name"
+CUSTOMERS_CHANGED_SQL = "SELECT id, company_name, nit_ci FROM customers WHERE sync_txid >= %s ORDER BY company_name"
+CUSTOMERS_DELETED_SQL = "SELECT customer_id FROM customer_tombstones WHERE sync_txid >= %s"
+CUSTOMER_BY_NIT_SQL = "SELECT id, company_name FROM customers WHERE nit_ci = %s"
+
+# --- PORTAL DEL CLIENTE (cotizaciones aprobadas + pedidos en una consulta) ---
+CLIENT_PORTAL_SQL = """
+    SELECT json_build_object(
+        'quotes', COALESCE((
+            SELECT json_agg(json_build_object('id', q.id, 'quote_number', q.quote_number, 'created_at', q.created_at,
+                                              'total_amount', q.total_amount, 'status', q.status)
+                            ORDER BY q.created_at DESC)
+            FROM quotes q WHERE q.customer_id = %(customer_id)s AND q.status = 'Aprobada'), '[]'),
+        'orders', COALESCE((
+            SELECT json_agg(json_build_object('id', o.id, 'quote_number', q.quote_number, 'created_at', q.created_at,
+                                              'order_status', o.order_status)
+                            ORDER BY q.created_at DESC)
+            FROM orders o JOIN quotes q ON o.quote_id = q.id WHERE q.customer_id = %(customer_id)s), '[]')
+    )::text
+"""
+
+# --- PDF DE UNA COTIZACIÓN ---
+# Huella de todo lo que aparece en el PDF, calculada en la BD sin traer los ítems.
+QUOTE_PDF_FINGERPRINT_SQL = """
+    SELECT q.id, q.quote_number, COALESCE(q.updated_at, q.created_at) AS last_modified,
+           md5(concat_ws('|', q.quote_number, q.total_amount, q.status,
+                         c.company_name, c.nit_ci, c.contact_person,
+                         (SELECT string_agg(concat_ws('~', i.id, i.type_id, t.name, i.code, i.description,
+                                                      i.quantity, i.unit_price, i.subtotal), '^' ORDER BY i.id)
+                          FROM quote_items i JOIN catalog_types t ON t.id = i.type_id
+                          WHERE i.quote_id = q.id))) AS content_hash
+    FROM quotes q JOIN customers c ON q.customer_id = c.id
+    WHERE q.id = %s
+"""
+PDF_QUOTE_SQL = (
+    "SELECT q.*, c.company_name, c.nit_ci, c.contact_person, c.contact_email "
+    "FROM quotes q JOIN customers c ON q.customer_id = c.id WHERE q.id = %s")
+PDF_ITEMS_SQL = """
+    SELECT i.type_id, t.name AS type_name, i.code, i.description, i.quantity, i.unit_price, i.subtotal
+    FROM quote_items i JOIN catalog_types t ON t.id = i.type_id
+    WHERE i.quote_id = %s
+    ORDER BY i.type_id, i.id
+"""
+
+# --- CATÁLOGO ---
+CATALOG_TYPE_IN_USE_SQL = "SELECT 1 FROM catalog WHERE type_id = %s"
+
+# --- SELLOS DE VERSIÓN (ETag por versión, ver etag_from_version en app.py) ---
+# Contadores en app_settings ('catalog_version', 'users_version') que cada
+# escritura incrementa dentro de su transacción.
+BUMP_VERSION_SQL = """
+    INSERT INTO app_settings (setting_key, setting_value) VALUES (%s, '1')
+    ON CONFLICT (setting_key) DO UPDATE SET setting_value = (app_settings.setting_value::bigint + 1)::text
+"""
+LOAD_VERSION_SQL = "SELECT setting_value FROM app_settings WHERE setting_key = %s"
+# Clientes: el mayor sync_txid visible (filas y lápidas) y las transacciones
+# todavía en curso con un txid menor o igual (ver _load_customers_version).
+CUSTOMERS_VERSION_SQL = """
+    WITH high AS (
+        SELECT GREATEST((SELECT MAX(sync_txid) FROM customers),
+                        (SELECT MAX(sync_txid) FROM customer_tombstones)) AS txid
+    )
+    SELECT high.txid,
+           ARRAY(SELECT xip FROM txid_snapshot_xip(txid_current_snapshot()) AS xip
+                 WHERE xip <= high.txid ORDER BY xip)
+    FROM high
+"""
@@ -0,0 +1,142 @@
+# query_trace.py
+# Registro de consultas lentas y detector de N+1 por petición.
+#
+# db_pool llama a on_query con cada consulta de los cursores del pool; app.py
+# la pasa a QueryTracer.record() junto con la traza de la petición en curso.
+# Al terminar la petición, finish() avisa de las sentencias que se repitieron
+# más de `n_plus_one_threshold` veces (misma forma, distintos parámetros): el
+# típico bucle que hace una consulta por fila.
+import re
+
+import psycopg2
+import psycopg2.extensions
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%(?:\(\w+\))?s")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\?\.\.\.\)(?:\s*,\s*\(\?\.\.\.\))+")
+_SPACES = re.compile(r"\s+")
+
+
+class NPlusOneError(Exception):
+    """Una petición repitió la misma sentencia demasiadas veces."""
+
+
+_shape_cache = {}
+_SHAPE_CACHE_SIZE = 2000
+
+
+def statement_shape(sql):
+    """La sentencia sin valores: dos consultas que solo cambian parámetros dan la misma forma."""
+    # Las sentencias de app.py son plantillas fijas con %s: se normalizan una vez.
+    shape = _shape_cache.get(sql)
+    if shape is None:
+        shape = _normalize(sql)
+        if len(_shape_cache) >= _SHAPE_CACHE_SIZE:
+            _shape_cache.clear()
+        _shape_cache[sql] = shape
+    return shape
+
+
+def _normalize(sql):
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    sql = str(sql)
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _LIST.sub('(?...)', sql)
+    sql = _ROWS.sub('(?...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def _short(value, limit=500):
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+class RequestTrace:
+    def __init__(self, label):
+        self.label = label
+        self.counts = {}
+        self.queries = 0
+
+
+class QueryTracer:
+    def __init__(self, slow_threshold=0.2, explain_slow=False, n_plus_one_threshold=10, raise_on_n_plus_one=False):
+        self.slow_threshold = slow_threshold
+        self.explain_slow = explain_slow
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.raise_on_n_plus_one = raise_on_n_plus_one
+
+    def start(self, label):
+        return RequestTrace(label)
+
+    def record(self, trace, elapsed, cursor, sql, params, ok=True):
+        """Devuelve True si la consulta fue lenta (para contarla en métricas).
+
+        ok=False si la consulta falló: se registra igual, pero sin EXPLAIN (la
+        transacción puede haber quedado abortada).
+        """
+        if sql is None:
+            return False
+        if trace is not None and self.n_plus_one_threshold:
+            shape = statement_shape(sql)
+            trace.counts[shape] = trace.counts.get(shape, 0) + 1
+            trace.queries += 1
+        if self.slow_threshold is None or elapsed < self.slow_threshold:
+            return False
+        where = trace.label if trace is not None else '(fuera de petición)'
+        print(f"[CONSULTA LENTA{'' if ok else ', FALLÓ'}] {elapsed * 1000:.0f} ms en {where}: "
+              f"{statement_shape(sql)[:1000]} params={_short(params)}")
+        if self.explain_slow and ok:
+            plan = self._explain(cursor, sql, params)
+            if plan:
+                print(f"[CONSULTA LENTA] EXPLAIN ANALYZE:\n{plan}")
+        return True
+
+    def _explain(self, cursor, sql, params):
+        # Solo lecturas y solo en cursores normales: EXPLAIN ANALYZE ejecuta
+        # la consulta otra vez. Se usa un cursor sin medir para no recursar.
+        if getattr(cursor, 'name', None):
+            return None
+        text = sql.decode('utf-8', 'replace') if isinstance(sql, bytes) else str(sql)
+        if not text.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        conn = cursor.connection
+        # Con la transacción abortada (o la conexión rota) no se puede ejecutar nada más.
+        if conn.closed or conn.get_transaction_status() not in (psycopg2.extensions.TRANSACTION_STATUS_IDLE,
+                                                                psycopg2.extensions.TRANSACTION_STATUS_INTRANS):
+            return None
+        explain_cursor = psycopg2.extensions.connection.cursor(conn)
+        # Un error del EXPLAIN no debe abortar la transacción de la petición.
+        use_savepoint = not conn.autocommit
+        try:
+            if use_savepoint:
+                explain_cursor.execute("SAVEPOINT query_trace_explain")
+            explain_cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + text, params)
+            plan = '\n'.join(row[0] for row in explain_cursor.fetchall())
+            if use_savepoint:
+                explain_cursor.execute("RELEASE SAVEPOINT query_trace_explain")
+            return plan
+        except psycopg2.Error as e:
+            if use_savepoint:
+                try:
+                    explain_cursor.execute("ROLLBACK TO SAVEPOINT query_trace_explain")
+                except psycopg2.Error:
+                    pass  # la transacción ya no se puede recuperar; que falle la petición, no la traza
+            return f"(no se pudo obtener el plan: {e})"
+        finally:
+            explain_cursor.close()
+
+    def finish(self, trace):
+        """Devuelve [(forma, veces)] de las sentencias repetidas de más."""
+        if trace is None or not self.n_plus_one_threshold:
+            return []
+        offenders = [(shape, count) for shape, count in trace.counts.items() if count > self.n_plus_one_threshold]
+        for shape, count in offenders:
+            print(f"[POSIBLE N+1] {trace.label}: {count} veces (de {trace.queries} consultas): {shape[:500]}")
+        if offenders and self.raise_on_n_plus_one:
+            raise NPlusOneError(f"{trace.label}: {offenders[0][1]} veces la misma sentencia: {offenders[0][0][:200]}")
+        return offenders
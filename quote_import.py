@@ -0,0 +1,178 @@
+# quote_import.py
+# Creación masiva de cotizaciones (migración desde planillas, API por lotes).
+#
+# Todo el lote va en una sola transacción: las cotizaciones con execute_values,
+# los ítems con COPY y el resumen de reportes con un único INSERT agrupado.
+# Las filas inválidas se validan antes de escribir nada y se informan por
+# índice sin abortar el resto del lote.
+import csv
+import io
+from collections import defaultdict
+from datetime import date, datetime
+
+from psycopg2.extras import execute_values
+
+import dashboard_events
+import rollups
+from quote_numbers import DEFAULT_PREFIX, allocate_quote_numbers
+
+DEFAULT_APPROVAL_THRESHOLD = 10000.00
+STATUS_PENDING = 'Pendiente de Aprobacion'
+STATUS_APPROVED = 'Aprobada'
+
+
+def read_approval_threshold(cursor):
+    cursor.execute("SELECT setting_value FROM app_settings WHERE setting_key = 'approval_threshold'")
+    row = cursor.fetchone()
+    if not row:
+        return DEFAULT_APPROVAL_THRESHOLD
+    return float(row['setting_value'] if isinstance(row, dict) else row[0])
+
+
+def quote_status_for(total_amount, approval_threshold):
+    """Las cotizaciones por encima del límite quedan pendientes de aprobación."""
+    return STATUS_PENDING if total_amount > approval_threshold else STATUS_APPROVED
+
+
+def _lookup(cursor, sql, keys):
+    if not keys:
+        return {}
+    cursor.execute(sql, (list(keys),))
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def _parse_created_at(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value))
+
+
+def _validate(index, data, default_user_id, customers_by_nit, customer_ids, user_ids, types_by_name, type_ids):
+    """Devuelve (cotización_normalizada, None) o (None, mensaje_de_error)."""
+    if not isinstance(data, dict):
+        return None, 'La cotización debe ser un objeto'
+    customer_id = data.get('customer_id')
+    if customer_id is None and data.get('customer_nit'):
+        customer_id = customers_by_nit.get(str(data['customer_nit']))
+    if customer_id is None or int(customer_id) not in customer_ids:
+        return None, 'Cliente inexistente (customer_id o customer_nit)'
+    user_id = int(data.get('user_id') or default_user_id)
+    if user_id not in user_ids:
+        return None, f'Vendedor inexistente: {user_id}'
+    try:
+        created_at = _parse_created_at(data.get('created_at'))
+    except ValueError:
+        return None, f"Fecha inválida: {data.get('created_at')}"
+    items = data.get('items') or []
+    if not isinstance(items, list):
+        return None, 'Los ítems deben ser una lista'
+    if not items:
+        return None, 'La cotización no tiene ítems'
+    clean_items = []
+    for item_index, item in enumerate(items):
+        if not isinstance(item, dict):
+            return None, f'Ítem {item_index}: debe ser un objeto'
+        type_id = item.get('type_id')
+        if type_id is None and item.get('type_name'):
+            type_id = types_by_name.get(item['type_name'])
+        if type_id is None or int(type_id) not in type_ids:
+            return None, f'Ítem {item_index}: tipo de catálogo inexistente'
+        if not item.get('description'):
+            return None, f'Ítem {item_index}: falta la descripción'
+        try:
+            quantity = int(item['quantity'])
+            unit_price = float(item['unit_price'])
+        except (KeyError, TypeError, ValueError):
+            return None, f'Ítem {item_index}: cantidad o precio inválidos'
+        if quantity <= 0 or unit_price < 0:
+            return None, f'Ítem {item_index}: cantidad o precio fuera de rango'
+        clean_items.append((int(type_id), item.get('code') or None, item['description'],
+                            quantity, unit_price, quantity * unit_price))
+    return {'index': index, 'customer_id': int(customer_id), 'user_id': user_id,
+            'created_at': created_at, 'items': clean_items,
+            'total_amount': sum(item[5] for item in clean_items)}, None
+
+
+def import_quotes(conn, quotes, default_user_id, prefix=DEFAULT_PREFIX, approval_threshold=None):
+    """Valida e inserta un lote de cotizaciones en una sola transacción.
+
+    Cada cotización: customer_id o customer_nit, items (type_id o type_name,
+    code, description, quantity, unit_price) y opcionalmente user_id y
+    created_at. El estado sale del mismo límite de aprobación que create_quote
+    (approval_threshold, o el de app_settings si no se pasa).
+    Devuelve {'created': [...], 'errors': [...]} con el índice de cada entrada.
+    """
+    cursor = conn.cursor()
+    try:
+        nits = {str(q['customer_nit']) for q in quotes if isinstance(q, dict) and q.get('customer_nit')}
+        customers_by_nit = _lookup(cursor, "SELECT nit_ci, id FROM customers WHERE nit_ci = ANY(%s)", nits)
+        wanted_customers = {int(q['customer_id']) for q in quotes
+                            if isinstance(q, dict) and str(q.get('customer_id', '')).isdigit()}
+        wanted_customers |= set(customers_by_nit.values())
+        customer_ids = set(_lookup(cursor, "SELECT id, id FROM customers WHERE id = ANY(%s)", wanted_customers))
+        cursor.execute("SELECT id FROM users")
+        user_ids = {row[0] for row in cursor.fetchall()}
+        cursor.execute("SELECT name, id FROM catalog_types")
+        types_by_name = dict(cursor.fetchall())
+        type_ids = set(types_by_name.values())
+        if approval_threshold is None:
+            approval_threshold = read_approval_threshold(cursor)
+
+        valid, errors = [], []
+        for index, data in enumerate(quotes):
+            try:
+                quote, error = _validate(index, data, default_user_id, customers_by_nit, customer_ids,
+                                         user_ids, types_by_name, type_ids)
+            except (AttributeError, TypeError, ValueError) as e:
+                quote, error = None, f'Datos inválidos: {e}'
+            if error:
+                errors.append({'index': index, 'error': error})
+            else:
+                quote['status'] = quote_status_for(quote['total_amount'], approval_threshold)
+                valid.append(quote)
+        if not valid:
+            conn.rollback()
+            return {'created': [], 'errors': errors}
+
+        # Números: un bloque por año de created_at (o el año actual de la BD).
+        by_year = defaultdict(list)
+        for quote in valid:
+            by_year[quote['created_at'].year if quote['created_at'] else None].append(quote)
+        for year, year_quotes in by_year.items():
+            for quote, number in zip(year_quotes, allocate_quote_numbers(cursor, len(year_quotes), prefix, year)):
+                quote['quote_number'] = number
+
+        rows = execute_values(cursor, """
+            INSERT INTO quotes (customer_id, user_id, total_amount, status, quote_number, created_at)
+            VALUES %s RETURNING id, quote_number
+        """, [(q['customer_id'], q['user_id'], q['total_amount'], q['status'], q['quote_number'], q['created_at'])
+              for q in valid],
+            template="(%s, %s, %s, %s, %s, COALESCE(%s, CURRENT_TIMESTAMP))", page_size=1000, fetch=True)
+        ids_by_number = {number: quote_id for quote_id, number in rows}
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for quote in valid:
+            quote['quote_id'] = ids_by_number[quote['quote_number']]
+            for item in quote['items']:
+                writer.writerow((quote['quote_id'],) + tuple('' if value is None else value for value in item))
+        buffer.seek(0)
+        cursor.copy_expert(
+            "COPY quote_items (quote_id, type_id, code, description, quantity, unit_price, subtotal) FROM STDIN WITH (FORMAT csv)",
+            buffer)
+
+        rollups.record_quotes_created(cursor, [quote['quote_id'] for quote in valid])
+        dashboard_events.notify_reload(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    created = [{'index': q['index'], 'quote_id': q['quote_id'], 'quote_number': q['quote_number'],
+                'status': q['status'], 'total_amount': q['total_amount']} for q in valid]
+    return {'created': created, 'errors': errors}
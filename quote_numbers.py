@@ -0,0 +1,37 @@
+# quote_numbers.py
+# Numeración de cotizaciones: COT-<año>-<correlativo>, reiniciando cada año.
+#
+# El correlativo vive en la tabla quote_counters (una fila por prefijo y año).
+# allocate_quote_number() lo incrementa con un único INSERT ... ON CONFLICT,
+# que bloquea esa fila hasta el commit: dos vendedores guardando a la vez
+# obtienen números distintos, y si la transacción se revierte el número no se
+# pierde. No hace falta recorrer quotes para saber el siguiente.
+
+DEFAULT_PREFIX = 'COT'
+
+
+def allocate_quote_number(cursor, prefix=DEFAULT_PREFIX, year=None):
+    """Reserva el siguiente número dentro de la transacción actual del cursor.
+
+    Si no se indica el año se usa el de la fecha actual de la base de datos.
+    """
+    return allocate_quote_numbers(cursor, 1, prefix, year)[0]
+
+
+def allocate_quote_numbers(cursor, count, prefix=DEFAULT_PREFIX, year=None):
+    """Reserva `count` números consecutivos con un solo UPDATE del contador."""
+    cursor.execute("""
+        INSERT INTO quote_counters (prefix, year, last_value)
+        VALUES (%s, COALESCE(%s, EXTRACT(YEAR FROM CURRENT_DATE)::int), %s)
+        ON CONFLICT (prefix, year) DO UPDATE SET last_value = quote_counters.last_value + EXCLUDED.last_value
+        RETURNING year, last_value
+    """, (prefix, year, count))
+    row = cursor.fetchone()
+    if isinstance(row, dict):
+        row = (row['year'], row['last_value'])
+    year, last_value = row
+    return [format_quote_number(prefix, year, value) for value in range(last_value - count + 1, last_value + 1)]
+
+
+def format_quote_number(prefix, year, value):
+    return f'{prefix}-{year}-{value:04d}'
@@ -0,0 +1,86 @@
+# rollups.py
+# Resumen de ventas por mes × vendedor × estado (tabla sales_rollup).
+#
+# Se mantiene al día dentro de la misma transacción que crea una cotización o
+# le cambia el estado, así los reportes no tienen que recorrer toda la tabla
+# quotes. Si alguna vez se desincroniza (o para la carga inicial):
+#
+#     python rollups.py --rebuild
+import argparse
+import os
+
+import psycopg2
+
+_UPSERT = """
+    INSERT INTO sales_rollup (month, user_id, status, quote_count, total_amount)
+    SELECT date_trunc('month', created_at)::date, user_id, {status}, {sign}, {sign} * total_amount
+    FROM quotes WHERE id = %s
+    ON CONFLICT (month, user_id, status) DO UPDATE
+    SET quote_count = sales_rollup.quote_count + EXCLUDED.quote_count,
+        total_amount = sales_rollup.total_amount + EXCLUDED.total_amount
+"""
+
+
+def record_quote_created(cursor, quote_id):
+    """Suma una cotización recién insertada a su celda (mes, vendedor, estado)."""
+    cursor.execute(_UPSERT.format(status='status', sign=1), (quote_id,))
+
+
+def record_quotes_created(cursor, quote_ids):
+    """Versión por lotes de record_quote_created: un solo INSERT agrupado."""
+    if not quote_ids:
+        return
+    cursor.execute("""
+        INSERT INTO sales_rollup (month, user_id, status, quote_count, total_amount)
+        SELECT date_trunc('month', created_at)::date, user_id, status, COUNT(*), SUM(total_amount)
+        FROM quotes WHERE id = ANY(%s)
+        GROUP BY 1, 2, 3
+        ON CONFLICT (month, user_id, status) DO UPDATE
+        SET quote_count = sales_rollup.quote_count + EXCLUDED.quote_count,
+            total_amount = sales_rollup.total_amount + EXCLUDED.total_amount
+    """, (list(quote_ids),))
+
+
+def record_status_change(cursor, quote_id, old_status, new_status):
+    """Mueve una cotización de la celda de old_status a la de new_status."""
+    if old_status == new_status:
+        return
+    cursor.execute(_UPSERT.format(status='%s', sign=-1), (old_status, quote_id))
+    cursor.execute(_UPSERT.format(status='%s', sign=1), (new_status, quote_id))
+
+
+def rebuild_rollups(conn):
+    """Recalcula sales_rollup desde cero en una sola transacción."""
+    cursor = conn.cursor()
+    try:
+        # Bloquea escrituras en quotes mientras se reconstruye (las lecturas siguen).
+        cursor.execute("LOCK TABLE quotes IN SHARE MODE")
+        cursor.execute("DELETE FROM sales_rollup")
+        cursor.execute("""
+            INSERT INTO sales_rollup (month, user_id, status, quote_count, total_amount)
+            SELECT date_trunc('month', created_at)::date, user_id, status, COUNT(*), SUM(total_amount)
+            FROM quotes
+            GROUP BY 1, 2, 3
+        """)
+        rows = cursor.rowcount
+        conn.commit()
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Mantenimiento de la tabla sales_rollup')
+    parser.add_argument('--rebuild', action='store_true', help='Reconstruir el resumen desde quotes')
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+    else:
+        conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
+        try:
+            print(f"Resumen reconstruido: {rebuild_rollups(conn)} filas.")
+        finally:
+            conn.close()
@@ -33,7 +33,8 @@ CREATE TABLE IF NOT EXISTS quotes (
     total_amount REAL NOT NULL,
     status TEXT NOT NULL DEFAULT 'Borrador',
     rejection_reason TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE TABLE IF NOT EXISTS orders (
@@ -67,4 +68,65 @@ CREATE TABLE IF NOT EXISTS quote_items (
     quantity INT NOT NULL,
     unit_price REAL NOT NULL,
     subtotal REAL NOT NULL
-);
\ No newline at end of file
+);
+
+-- Resumen de ventas para los reportes (lo mantiene rollups.py)
+CREATE TABLE IF NOT EXISTS sales_rollup (
+    month DATE NOT NULL,
+    user_id INT NOT NULL REFERENCES users(id),
+    status TEXT NOT NULL,
+    quote_count INT NOT NULL DEFAULT 0,
+    total_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, user_id, status)
+);
+
+-- Correlativo de cotizaciones por prefijo y año (lo usa quote_numbers.py)
+CREATE TABLE IF NOT EXISTS quote_counters (
+    prefix TEXT NOT NULL,
+    year INT NOT NULL,
+    last_value INT NOT NULL,
+    PRIMARY KEY (prefix, year)
+);
+
+-- Columnas añadidas después de la primera versión (idempotente para bases existentes)
+ALTER TABLE quotes ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+-- Los números antiguos se calculaban con MAX(id): el contador de cada año
+-- arranca después del mayor número ya emitido (idempotente).
+INSERT INTO quote_counters (prefix, year, last_value)
+SELECT 'COT', split_part(quote_number, '-', 2)::int, MAX(split_part(quote_number, '-', 3)::int)
+FROM quotes
+WHERE quote_number ~ '^COT-[0-9]{4}-[0-9]+$'
+GROUP BY split_part(quote_number, '-', 2)
+ON CONFLICT (prefix, year) DO UPDATE SET last_value = GREATEST(quote_counters.last_value, EXCLUDED.last_value);
+
+-- Sincronización incremental de clientes (GET /api/customers/sync).
+-- sync_txid es la transacción que escribió la fila; los borrados dejan una lápida.
+ALTER TABLE customers ADD COLUMN IF NOT EXISTS sync_txid BIGINT NOT NULL DEFAULT txid_current();
+CREATE INDEX IF NOT EXISTS idx_customers_sync_txid ON customers (sync_txid);
+
+CREATE TABLE IF NOT EXISTS customer_tombstones (
+    customer_id INT PRIMARY KEY,
+    sync_txid BIGINT NOT NULL DEFAULT txid_current(),
+    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_customer_tombstones_sync_txid ON customer_tombstones (sync_txid);
+
+CREATE OR REPLACE FUNCTION customers_sync_track() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO customer_tombstones (customer_id) VALUES (OLD.id)
+        ON CONFLICT (customer_id) DO UPDATE SET sync_txid = EXCLUDED.sync_txid, deleted_at = EXCLUDED.deleted_at;
+        RETURN OLD;
+    END IF;
+    NEW.sync_txid := txid_current();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS customers_sync_update ON customers;
+CREATE TRIGGER customers_sync_update BEFORE UPDATE ON customers
+    FOR EACH ROW EXECUTE PROCEDURE customers_sync_track();
+DROP TRIGGER IF EXISTS customers_sync_delete ON customers;
+CREATE TRIGGER customers_sync_delete AFTER DELETE ON customers
+    FOR EACH ROW EXECUTE PROCEDURE customers_sync_track();
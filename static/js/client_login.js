@@ -0,0 +1,26 @@
+const pageData = document.currentScript.dataset;
+document.getElementById('clientLoginForm').addEventListener('submit', async function(event) {
+    event.preventDefault();
+    const nitCi = document.getElementById('nitCi').value;
+    const errorMessage = document.getElementById('errorMessage');
+
+    const response = await fetch('/api/client/login', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ nit_ci: nitCi })
+    });
+
+    const result = await response.json();
+
+    if (response.ok) {
+        // Guardar datos del cliente para usarlos en el portal
+        sessionStorage.setItem('clientToken', result.token);
+        sessionStorage.setItem('clientName', result.company_name);
+
+        // Redirigir al portal
+        window.location.href = pageData.portalUrl;
+    } else {
+        errorMessage.textContent = `Error: ${result.error}`;
+        errorMessage.classList.remove('d-none');
+    }
+});
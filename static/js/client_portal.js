@@ -0,0 +1,107 @@
+const pageData = document.currentScript.dataset;
+
+// Obtener datos guardados en el login
+const clientToken = sessionStorage.getItem('clientToken');
+const clientName = sessionStorage.getItem('clientName');
+
+function checkLogin() {
+    if (!clientToken || !clientName) {
+        // Si no hay datos, redirigir al login
+        window.location.href = pageData.loginUrl;
+        return false;
+    }
+    return true;
+}
+
+async function loadClientData() {
+    if (!checkLogin()) return; // Detener si no está logueado
+
+    // Actualizar los mensajes de bienvenida PRIMERO
+    try {
+        document.getElementById('welcomeMessage').textContent = `Bienvenido, ${clientName}`;
+        document.getElementById('clientNameDisplay').textContent = `Cliente: ${clientName}`;
+    } catch (e) {
+        console.error("Error al setear nombres:", e);
+    }
+
+    // Cotizaciones y pedidos llegan juntos en una sola petición
+    let summary;
+    try {
+        const response = await fetch('/api/client/portal', {
+            headers: { 'Authorization': `Bearer ${clientToken}` }
+        });
+        if (response.status === 401) {
+            logout(); // Token vencido: volver a ingresar
+            return;
+        }
+        summary = await response.json();
+    } catch (e) {
+        console.error("Error cargando el portal:", e);
+        summary = null;
+    }
+
+    // Cargar Cotizaciones
+    try {
+        const quotes = summary.quotes;
+        const quotesTable = document.getElementById('quotesTableBody');
+        quotesTable.innerHTML = '';
+
+        if (quotes.length === 0) {
+            quotesTable.innerHTML = '<tr><td colspan="5" class="text-center">No tiene cotizaciones aprobadas.</td></tr>';
+        }
+
+        quotes.forEach(quote => {
+            let statusBadge = `<span class="badge bg-success">${quote.status}</span>`;
+            const pdfLink = `/api/client/quote/${quote.id}/pdf?token=${encodeURIComponent(clientToken)}`;
+
+            quotesTable.innerHTML += `
+                <tr>
+                    <td><strong>${quote.quote_number}</strong></td>
+                    <td>${new Date(quote.created_at).toLocaleDateString()}</td>
+                    <td class="text-end">${formatter.format(quote.total_amount)}</td>
+                    <td>${statusBadge}</td>
+                    <td>
+                        <a href="${pdfLink}" target="_blank" class="btn btn-danger btn-sm">
+                            <i class="bi bi-file-earmark-pdf"></i> PDF
+                        </a>
+                    </td>
+                </tr>
+            `;
+        });
+    } catch (e) {
+        console.error("Error cargando cotizaciones:", e);
+        document.getElementById('quotesTableBody').innerHTML = '<tr><td colspan="5" class="text-center text-danger">Error al cargar cotizaciones.</td></tr>';
+    }
+
+    // Cargar Pedidos
+    try {
+        const orders = summary.orders;
+        const ordersTable = document.getElementById('ordersTableBody');
+        ordersTable.innerHTML = '';
+
+        if (orders.length === 0) {
+            ordersTable.innerHTML = '<tr><td colspan="3" class="text-center">No tiene pedidos activos.</td></tr>';
+        }
+
+        orders.forEach(order => {
+            ordersTable.innerHTML += `
+                <tr>
+                    <td><strong>PED-${order.id}</strong></td>
+                    <td>${new Date(order.created_at).toLocaleDateString()}</td>
+                    <td><span class="badge bg-info">${order.order_status}</span></td>
+                </tr>
+            `;
+        });
+    } catch (e) {
+        console.error("Error cargando pedidos:", e);
+        document.getElementById('ordersTableBody').innerHTML = '<tr><td colspan="3" class="text-center text-danger">Error al cargar pedidos.</td></tr>';
+    }
+}
+
+function logout() {
+    sessionStorage.removeItem('clientToken');
+    sessionStorage.removeItem('clientName');
+    window.location.href = pageData.loginUrl;
+}
+
+document.addEventListener('DOMContentLoaded', loadClientData);
@@ -0,0 +1,8 @@
+// Código compartido por las páginas (se carga antes del script de cada una).
+
+// Montos con dos decimales y separador de miles
+const formatter = new Intl.NumberFormat('en-US', {
+    style: 'decimal',
+    minimumFractionDigits: 2,
+    maximumFractionDigits: 2
+});
@@ -0,0 +1,377 @@
+const pageData = document.currentScript.dataset;
+
+let customers = [];
+let catalogTypes = [];
+
+const customerSearch = document.getElementById('customerSearch');
+const customerOptions = document.getElementById('customerOptions');
+const customerIdInput = document.getElementById('customerId');
+
+document.addEventListener('DOMContentLoaded', async () => {
+    await loadCustomers();
+    await loadCatalogTypes();
+    renderCatalogTabs();
+    renderQuoteSections();
+});
+
+// --- CLIENTES: SINCRONIZACIÓN INCREMENTAL ---
+// La lista se guarda en localStorage con el cursor de la última
+// sincronización; al abrir la página solo se piden los cambios.
+const CUSTOMER_CACHE_KEY = 'customers-sync-v1';
+const customerOptionsById = new Map();
+
+function readCustomerCache() {
+    try {
+        return JSON.parse(localStorage.getItem(CUSTOMER_CACHE_KEY));
+    } catch (e) {
+        return null;
+    }
+}
+
+function writeCustomerCache(cursor) {
+    try {
+        localStorage.setItem(CUSTOMER_CACHE_KEY, JSON.stringify({ cursor, customers }));
+    } catch (e) {
+        // Sin espacio o sin localStorage: la próxima vez se baja la lista completa.
+    }
+}
+
+function upsertCustomerOption(customer) {
+    let option = customerOptionsById.get(customer.id);
+    if (!option) {
+        option = document.createElement('option');
+        option.dataset.id = customer.id;
+        customerOptionsById.set(customer.id, option);
+        customerOptions.appendChild(option);
+    }
+    option.value = `${customer.company_name} (NIT: ${customer.nit_ci})`;
+}
+
+function removeCustomerOption(customerId) {
+    const option = customerOptionsById.get(customerId);
+    if (option) {
+        option.remove();
+        customerOptionsById.delete(customerId);
+    }
+}
+
+async function loadCustomers() {
+    const cache = readCustomerCache();
+    if (cache && customers.length === 0) {
+        customers = cache.customers;
+        customers.forEach(upsertCustomerOption);
+    }
+    const url = cache ? `/api/customers/sync?since=${cache.cursor}` : '/api/customers/sync';
+    const response = await fetch(url);
+    if (!response.ok) return;
+    const data = await response.json();
+
+    if (data.full) {
+        const present = new Set(data.customers.map(c => c.id));
+        [...customerOptionsById.keys()].filter(id => !present.has(id)).forEach(removeCustomerOption);
+        customers = data.customers;
+    } else {
+        const byId = new Map(customers.map(c => [c.id, c]));
+        data.customers.forEach(c => byId.set(c.id, c));
+        data.deleted.forEach(id => { byId.delete(id); removeCustomerOption(id); });
+        customers = [...byId.values()];
+    }
+    data.customers.forEach(upsertCustomerOption);
+    writeCustomerCache(data.cursor);
+}
+
+async function loadCatalogTypes() {
+    const response = await fetch('/api/catalog-types');
+    catalogTypes = await response.json();
+}
+
+// Evento para seleccionar cliente del datalist
+customerSearch.addEventListener('input', () => {
+    const selectedOption = Array.from(customerOptions.options).find(opt => opt.value === customerSearch.value);
+    if (selectedOption) {
+        customerIdInput.value = selectedOption.dataset.id;
+    } else {
+        customerIdInput.value = '';
+    }
+});
+
+// --- FUNCIÓN CORREGIDA CON LIMPIEZA FORZADA ---
+async function saveNewCustomer() {
+    // 1. Recopilar datos
+    const newCustomer = {
+        company_name: document.getElementById('companyName').value,
+        nit_ci: document.getElementById('nitCi').value,
+        address: document.getElementById('address').value,
+        contact_person: document.getElementById('contactPerson').value,
+        contact_email: document.getElementById('contactEmail').value,
+        contact_phone: document.getElementById('contactPhone').value
+    };
+
+    // 2. Enviar al servidor
+    const response = await fetch('/api/customers', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(newCustomer)
+    });
+
+    const result = await response.json();
+
+    if (response.ok) {
+        // 3. Cerrar el modal usando Bootstrap
+        const modalEl = document.getElementById('newCustomerModal');
+        const modal = bootstrap.Modal.getInstance(modalEl);
+        modal.hide();
+
+        // --- LIMPIEZA FORZADA (Evita bloqueo de pantalla) ---
+        document.querySelectorAll('.modal-backdrop').forEach(el => el.remove());
+        document.body.classList.remove('modal-open');
+        document.body.style.overflow = 'auto';
+        document.body.style.paddingRight = '';
+
+        // 4. Limpiar formulario y recargar datos
+        document.getElementById('newCustomerForm').reset();
+        await loadCustomers();
+
+        // 5. Seleccionar nuevo cliente
+        customerSearch.value = `${result.customer.company_name} (NIT: ${result.customer.nit_ci})`;
+        customerIdInput.value = result.customer.id;
+
+        // 6. Alerta con retraso
+        setTimeout(() => {
+            alert(result.message);
+        }, 200);
+    } else {
+        alert(`Error: ${result.error}`);
+    }
+}
+
+function renderCatalogTabs() {
+    const tabsContainer = document.getElementById('catalogTabs');
+    const tabsContentContainer = document.getElementById('catalogTabsContent');
+
+    tabsContainer.innerHTML = '';
+    tabsContentContainer.innerHTML = '';
+
+    catalogTypes.forEach((type, index) => {
+        const typeIdSanitized = `catalog-tab-${type.id}`;
+        const isActive = index === 0 ? 'active' : '';
+
+        tabsContainer.innerHTML += `
+            <li class="nav-item" role="presentation">
+                <button class="nav-link ${isActive}" data-bs-toggle="tab" data-bs-target="#${typeIdSanitized}" type="button">${type.name}</button>
+            </li>
+        `;
+
+        tabsContentContainer.innerHTML += `
+            <div class="tab-pane fade show ${isActive}" id="${typeIdSanitized}" role="tabpanel">
+                <input type="text" class="form-control mb-2" id="search-${type.id}" oninput="onCatalogSearchInput(${type.id})" placeholder="Buscar en ${type.name}...">
+                <ul class="list-group" id="list-${type.id}"></ul>
+            </div>
+        `;
+    });
+
+    catalogTypes.forEach(type => filterCatalogList(type.id));
+}
+
+function renderQuoteSections() {
+    const sectionsContainer = document.getElementById('quoteItemSections');
+    sectionsContainer.innerHTML = '';
+
+    catalogTypes.forEach(type => {
+        sectionsContainer.innerHTML += `
+            <div class="quote-section">
+                <h4>${type.name}</h4>
+                <div id="quote-items-list-${type.id}"></div>
+                <button type="button" class="btn btn-secondary btn-sm mt-2" onclick="addManualItem(${type.id})">
+                    + Añadir ${type.name} Manual
+                </button>
+            </div>
+        `;
+    });
+}
+
+// El catálogo ya no se descarga completo: cada búsqueda pide al servidor
+// los primeros resultados del tipo (prefijo y búsqueda aproximada).
+const CATALOG_RESULTS_LIMIT = 50;
+const catalogSearchTimers = {};
+
+async function searchCatalog(typeId, query, limit = CATALOG_RESULTS_LIMIT) {
+    const params = new URLSearchParams({ type_id: typeId, q: query, limit: limit });
+    const response = await fetch(`/api/catalog/search?${params.toString()}`);
+    return response.ok ? await response.json() : [];
+}
+
+// Espera a que se deje de escribir antes de consultar
+function onCatalogSearchInput(typeId) {
+    clearTimeout(catalogSearchTimers[typeId]);
+    catalogSearchTimers[typeId] = setTimeout(() => filterCatalogList(typeId), 200);
+}
+
+async function filterCatalogList(typeId) {
+    const listContainer = document.getElementById(`list-${typeId}`);
+    const searchInput = document.getElementById(`search-${typeId}`);
+    const itemsOfType = await searchCatalog(typeId, searchInput ? searchInput.value : '');
+
+    listContainer.innerHTML = '';
+    itemsOfType.forEach(item => {
+        listContainer.innerHTML += `
+            <li class="list-group-item d-flex justify-content-between align-items-center">
+                <div>
+                    <small class="text-muted">${item.code}</small><br>
+                    <strong>${item.description}</strong><br>
+                    <small>${formatter.format(item.unit_price)} Bs.</small>
+                </div>
+                <button type="button" class="btn btn-success btn-sm"
+                        onclick="addItemFromCatalog(${item.type_id}, '${item.code}', '${item.description}', ${item.unit_price})">
+                    <i class="bi bi-plus-lg"></i>
+                </button>
+            </li>
+        `;
+    });
+}
+
+// --- Gestión de Ítems ---
+let itemIdCounter = 0;
+
+function addItemFromCatalog(typeId, code, description, unit_price) {
+    addItemRow(typeId, code, description, unit_price, true);
+}
+
+function addManualItem(typeId) {
+    addItemRow(typeId, '', '', '', false);
+}
+
+function addItemRow(typeId, code, description, unit_price, isReadOnly) {
+    const itemId = itemIdCounter++;
+    const readOnlyFlag = isReadOnly ? 'readonly' : '';
+    const priceValue = unit_price !== '' ? unit_price.toFixed(2) : '';
+    const codeValue = code || '';
+    const codeInputEvent = isReadOnly ? '' : 'onblur="checkItemCode(event)"';
+
+    const itemsListContainer = document.getElementById(`quote-items-list-${typeId}`);
+
+    const itemHTML = `
+        <div class="row mb-2 align-items-center quote-item-row" id="item-${itemId}" data-type-id="${typeId}">
+            <div class="col-md-2">
+                <input type="text" class="form-control item-code" placeholder="Código" value="${codeValue}" ${readOnlyFlag} ${codeInputEvent} required>
+            </div>
+            <div class="col-md-3">
+                <input type="text" class="form-control item-description" placeholder="Descripción" value="${description}" ${readOnlyFlag} required>
+            </div>
+            <div class="col-md-2">
+                <input type="number" class="form-control item-quantity" placeholder="Cant." min="1" value="1" oninput="updateTotal()" required>
+            </div>
+            <div class="col-md-2">
+                <input type="number" class="form-control item-price" placeholder="P. Unit." step="0.01" min="0" value="${priceValue}" ${readOnlyFlag} oninput="updateTotal()" required>
+            </div>
+            <div class="col-md-2">
+                <input type="text" class="form-control item-subtotal" placeholder="Subtotal" readonly>
+            </div>
+            <div class="col-md-1">
+                <button type="button" class="btn btn-danger btn-sm" onclick="removeItem(${itemId})"><i class="bi bi-trash"></i></button>
+            </div>
+        </div>`;
+
+    itemsListContainer.insertAdjacentHTML('beforeend', itemHTML);
+    updateTotal();
+}
+
+async function checkItemCode(event) {
+    const inputElement = event.target;
+    const typedCode = inputElement.value;
+    const itemRow = inputElement.closest('.row');
+    const currentTypeId = parseInt(itemRow.dataset.typeId);
+
+    if (!typedCode) return;
+
+    // El código exacto siempre aparece primero en los resultados
+    const matches = await searchCatalog(currentTypeId, typedCode, 5);
+    const foundItem = matches.find(item =>
+        item.code === typedCode && item.type_id === currentTypeId
+    );
+
+    if (foundItem) {
+        const descriptionInput = itemRow.querySelector('.item-description');
+        const priceInput = itemRow.querySelector('.item-price');
+
+        descriptionInput.value = foundItem.description;
+        priceInput.value = foundItem.unit_price.toFixed(2);
+
+        descriptionInput.readOnly = true;
+        priceInput.readOnly = true;
+        inputElement.readOnly = true;
+
+        updateTotal();
+    } else {
+        const descriptionInput = itemRow.querySelector('.item-description');
+        const priceInput = itemRow.querySelector('.item-price');
+        descriptionInput.readOnly = false;
+        priceInput.readOnly = false;
+    }
+}
+
+function removeItem(id) {
+    document.getElementById(`item-${id}`).remove();
+    updateTotal();
+}
+
+function updateTotal() {
+    let total = 0;
+    document.querySelectorAll('.quote-item-row').forEach(row => {
+        const quantity = parseFloat(row.querySelector('.item-quantity').value) || 0;
+        const price = parseFloat(row.querySelector('.item-price').value) || 0;
+        const subtotal = quantity * price;
+        row.querySelector('.item-subtotal').value = formatter.format(subtotal);
+        total += subtotal;
+    });
+    document.getElementById('totalAmount').textContent = formatter.format(total);
+}
+
+// --- Enviar Cotización ---
+document.getElementById('quoteForm').addEventListener('submit', async function(event) {
+    event.preventDefault();
+
+    if (!document.getElementById('customerId').value) {
+        alert('Por favor, selecciona un cliente válido.');
+        return;
+    }
+
+    const quoteItems = [];
+    document.querySelectorAll('.quote-item-row').forEach(row => {
+        const description = row.querySelector('.item-description').value;
+        if (description) {
+            quoteItems.push({
+                type_id: parseInt(row.dataset.typeId),
+                code: row.querySelector('.item-code').value,
+                description: description,
+                quantity: parseInt(row.querySelector('.item-quantity').value),
+                unit_price: parseFloat(row.querySelector('.item-price').value)
+            });
+        }
+    });
+
+    if (quoteItems.length === 0) {
+        alert('Debes añadir al menos un ítem a la cotización.');
+        return;
+    }
+
+    const data = {
+        customer_id: parseInt(document.getElementById('customerId').value),
+        items: quoteItems
+    };
+
+    const response = await fetch('/api/quotes', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data)
+    });
+
+    const result = await response.json();
+
+    if (response.ok) {
+        alert(result.message);
+        window.location.href = pageData.myQuotesUrl;
+    } else {
+        alert(`Error: ${result.error}`);
+    }
+});
@@ -0,0 +1,226 @@
+// --- Pestaña 1: Aprobaciones ---
+
+async function loadPendingQuotes() {
+    const response = await fetch('/api/quotes/pending');
+    const quotes = await response.json();
+    const tableBody = document.getElementById('pendingQuotesTable');
+    tableBody.innerHTML = quotes.map(pendingRowHtml).join('');
+}
+
+function pendingRowHtml(quote) {
+    // ¡MODIFICADO! (Punto 2)
+    return `
+        <tr id="quote-row-${quote.id}">
+            <td><strong>${quote.quote_number}</strong></td>
+            <td>${quote.vendedor_name}</td>
+            <td>${quote.company_name}</td>
+            <td class="text-end">${formatter.format(quote.total_amount)}</td>
+            <td>
+                <a href="/api/quote/${quote.id}/pdf" target="_blank" class="btn btn-secondary btn-sm" title="Ver PDF">
+                    <i class="bi bi-file-earmark-pdf"></i>
+                </a>
+                <button class="btn btn-success btn-sm" onclick="approveQuote(${quote.id})">
+                    <i class="bi bi-check-lg"></i> Aprobar
+                </button>
+                <button class="btn btn-danger btn-sm" onclick="rejectQuote(${quote.id})">
+                    <i class="bi bi-x-lg"></i> Rechazar
+                </button>
+            </td>
+        </tr>
+    `;
+}
+
+async function loadApprovedQuotes() {
+    const response = await fetch('/api/quotes/approved');
+    const quotes = await response.json();
+    const tableBody = document.getElementById('approvedQuotesTable');
+    tableBody.innerHTML = quotes.map(approvedRowHtml).join('');
+}
+
+function approvedRowHtml(quote) {
+    return `
+        <tr id="approved-row-${quote.id}">
+            <td><strong>${quote.quote_number}</strong></td>
+            <td>${quote.vendedor_name}</td>
+            <td>${quote.company_name}</td>
+            <td class="text-end">${formatter.format(quote.total_amount)}</td>
+            <td>
+                <button class="btn btn-primary btn-sm" onclick="createOrder(${quote.id})">
+                    <i class="bi bi-box-seam"></i> Iniciar Pedido
+                </button>
+            </td>
+        </tr>
+    `;
+}
+
+async function approveQuote(quoteId) {
+    if (!confirm('¿Seguro que quieres APROBAR esta cotización?')) return;
+    await fetch(`/api/quotes/${quoteId}/approve`, { method: 'POST' });
+    if (!liveUpdates) {
+        loadPendingQuotes();
+        loadApprovedQuotes();
+    }
+}
+
+async function rejectQuote(quoteId) {
+    const reason = prompt('Por favor, ingresa el motivo del rechazo:');
+    if (reason === null) return; // Si el usuario cancela
+    if (reason.trim() === "") {
+        alert("El motivo del rechazo es obligatorio.");
+        return;
+    }
+
+    await fetch(`/api/quotes/${quoteId}/reject`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ reason: reason })
+    });
+    if (!liveUpdates) loadPendingQuotes();
+}
+
+async function createOrder(quoteId) {
+    const response = await fetch('/api/orders', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ quote_id: quoteId })
+    });
+    const result = await response.json();
+    alert(result.message);
+    if(response.ok && !liveUpdates) {
+        document.getElementById(`approved-row-${quoteId}`)?.remove();
+        loadActiveOrders(); // Recargar la otra pestaña
+    }
+}
+
+// --- Pestaña 2: Pedidos ---
+
+async function loadActiveOrders() {
+    const response = await fetch('/api/orders/active');
+    const orders = await response.json();
+    const tableBody = document.getElementById('activeOrdersTable');
+    tableBody.innerHTML = orders.map(orderRowHtml).join('');
+}
+
+function orderRowHtml(order) {
+    const statuses = ['Pedido Confirmado', 'En Preparación', 'En Tránsito', 'Listo para Entrega'];
+    let options = '';
+    statuses.forEach(status => {
+        const selected = (status === order.order_status) ? 'selected' : '';
+        options += `<option value="${status}" ${selected}>${status}</option>`;
+    });
+
+    return `
+        <tr id="order-row-${order.id}">
+            <td><strong>PED-${order.id}</strong></td>
+            <td>${order.quote_number}</td>
+            <td>${order.vendedor_name}</td>
+            <td>${order.company_name}</td>
+            <td><span class="badge bg-info">${order.order_status}</span></td>
+            <td>
+                <div class="input-group">
+                    <select class="form-select" id="status-order-${order.id}">
+                        ${options}
+                    </select>
+                    <button class="btn btn-primary" onclick="updateOrderStatus(${order.id})">Actualizar</button>
+                </div>
+            </td>
+        </tr>
+    `;
+}
+
+async function updateOrderStatus(orderId) {
+    const newStatus = document.getElementById(`status-order-${orderId}`).value;
+    const response = await fetch(`/api/orders/${orderId}/status`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ status: newStatus })
+    });
+    const result = await response.json();
+    alert(result.message);
+    if (!liveUpdates) loadActiveOrders();
+}
+
+// --- Eventos en vivo (SSE) ---
+// El servidor empuja cada cambio como un delta pequeño; las tablas se
+// actualizan fila por fila sin volver a pedir las listas completas.
+let liveUpdates = false;
+
+function prependRow(tableId, html) {
+    document.getElementById(tableId).insertAdjacentHTML('afterbegin', html);
+}
+
+function applyQuoteEvent(quote) {
+    document.getElementById(`quote-row-${quote.id}`)?.remove();
+    document.getElementById(`approved-row-${quote.id}`)?.remove();
+    if (quote.status === 'Pendiente de Aprobacion') {
+        prependRow('pendingQuotesTable', pendingRowHtml(quote));
+    } else if (quote.status === 'Aprobada' && !quote.has_order) {
+        prependRow('approvedQuotesTable', approvedRowHtml(quote));
+    }
+}
+
+function applyOrderEvent(order) {
+    document.getElementById(`approved-row-${order.quote_id}`)?.remove();
+    document.getElementById(`order-row-${order.id}`)?.remove();
+    if (order.order_status !== 'Listo para Entrega') {
+        prependRow('activeOrdersTable', orderRowHtml(order));
+    }
+}
+
+function reloadAll() {
+    loadPendingQuotes();
+    loadApprovedQuotes();
+    loadActiveOrders();
+}
+
+function connectLiveUpdates() {
+    if (!window.EventSource) return;
+    const source = new EventSource('/api/dashboard/stream');
+    let opened = false;
+    source.onopen = () => {
+        // Al reconectar se pudieron perder eventos: se recarga una vez.
+        if (opened) reloadAll();
+        opened = true;
+        liveUpdates = true;
+    };
+    source.onerror = () => { liveUpdates = false; };
+    source.onmessage = (e) => {
+        const event = JSON.parse(e.data);
+        if (event.type === 'quote') applyQuoteEvent(event);
+        else if (event.type === 'order') applyOrderEvent(event);
+        else if (event.type === 'reload') reloadAll();
+    };
+}
+
+// --- Pestaña 3: Configuración ---
+
+async function loadSettings() {
+    const response = await fetch('/api/settings/approval_threshold');
+    const data = await response.json();
+    document.getElementById('approvalThreshold').value = data.threshold;
+}
+
+document.getElementById('thresholdForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+    const newThreshold = document.getElementById('approvalThreshold').value;
+    const response = await fetch('/api/settings/approval_threshold', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ threshold: newThreshold })
+    });
+    const result = await response.json();
+    if(response.ok) {
+        alert(result.message);
+    } else {
+        alert(`Error: ${result.error}`);
+    }
+});
+
+// --- Carga Inicial ---
+document.addEventListener('DOMContentLoaded', () => {
+    loadPendingQuotes();
+    loadApprovedQuotes();
+    loadActiveOrders();
+    loadSettings();
+    connectLiveUpdates();
+});
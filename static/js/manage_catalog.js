@@ -0,0 +1,276 @@
+let allCatalogTypes = [];
+let allCatalogItems = [];
+let editItemModal = null;
+let editTypeModal = null;
+document.addEventListener('DOMContentLoaded', () => {
+    editItemModal = new bootstrap.Modal(document.getElementById('editItemModal'));
+    editTypeModal = new bootstrap.Modal(document.getElementById('editTypeModal'));
+    loadCatalogTypes();
+    loadCatalogItems();
+    document.getElementById('createTypeForm').addEventListener('submit', handleCreateType);
+    document.getElementById('importCatalogForm').addEventListener('submit', handleImportCatalog);
+});
+async function loadCatalogTypes() {
+    const response = await fetch('/api/catalog-types');
+    allCatalogTypes = await response.json();
+    const typesTableBody = document.getElementById('typesTableBody');
+    const itemTypeSelect = document.getElementById('edit_item_type');
+    typesTableBody.innerHTML = '';
+    itemTypeSelect.innerHTML = '';
+    allCatalogTypes.forEach(type => {
+        typesTableBody.innerHTML += `
+            <tr id="type-row-${type.id}">
+                <td>${type.name}</td>
+                <td>
+                    <button class="btn btn-warning btn-sm" onclick="handleEditType(${type.id}, '${type.name}')"><i class="bi bi-pencil"></i></button>
+                    <button class="btn btn-danger btn-sm" onclick="handleDeleteType(${type.id})"><i class="bi bi-trash"></i></button>
+                </td>
+            </tr>
+        `;
+        itemTypeSelect.innerHTML += `<option value="${type.id}">${type.name}</option>`;
+    });
+    renderItemTabs();
+}
+async function handleCreateType(event) {
+    event.preventDefault();
+    const name = document.getElementById('type_name').value;
+    const response = await fetch('/api/catalog-types', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ name: name })
+    });
+    const result = await response.json();
+    if (response.ok) {
+        alert(result.message);
+        document.getElementById('createTypeForm').reset();
+        loadCatalogTypes();
+        loadCatalogItems();
+    } else {
+        alert(`Error: ${result.error}`);
+    }
+}
+function handleEditType(typeId, currentName) {
+    document.getElementById('edit_type_id').value = typeId;
+    document.getElementById('edit_type_name').value = currentName;
+    editTypeModal.show();
+}
+async function handleUpdateType() {
+    const typeId = document.getElementById('edit_type_id').value;
+    const name = document.getElementById('edit_type_name').value;
+    const response = await fetch(`/api/catalog-types/${typeId}`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ name: name })
+    });
+    const result = await response.json();
+    if (response.ok) {
+        alert(result.message);
+        editTypeModal.hide();
+        loadCatalogTypes();
+        loadCatalogItems();
+    } else {
+        alert(`Error: ${result.error}`);
+    }
+}
+async function handleDeleteType(typeId) {
+    if (!confirm('¿Seguro? Si elimina un tipo, NO debe tener ítems asociados.')) return;
+    const response = await fetch(`/api/catalog-types/${typeId}`, { method: 'DELETE' });
+    const result = await response.json();
+    if (response.ok) {
+        alert(result.message);
+        loadCatalogTypes();
+        loadCatalogItems();
+    } else {
+        alert(`Error: ${result.error}`);
+    }
+}
+async function handleImportCatalog(event) {
+    event.preventDefault();
+    const button = document.getElementById('importCatalogButton');
+    const resultDiv = document.getElementById('importResult');
+    const formData = new FormData();
+    formData.append('file', document.getElementById('import_file').files[0]);
+    button.disabled = true;
+    resultDiv.textContent = 'Importando...';
+    try {
+        const response = await fetch('/api/catalog/import', { method: 'POST', body: formData });
+        const result = await response.json();
+        if (!response.ok) {
+            resultDiv.innerHTML = `<div class="alert alert-danger"></div>`;
+            resultDiv.firstChild.textContent = `Error: ${result.error}`;
+            return;
+        }
+        resultDiv.innerHTML = `
+            <ul class="list-group mb-3">
+                <li class="list-group-item">Nuevos: <strong>${result.inserted}</strong></li>
+                <li class="list-group-item">Actualizados: <strong>${result.updated}</strong></li>
+                <li class="list-group-item">Sin cambios: <strong>${result.unchanged}</strong></li>
+                <li class="list-group-item">Rechazados: <strong>${result.rejected}</strong></li>
+            </ul>
+            <table class="table table-sm"><tbody id="importErrorsBody"></tbody></table>`;
+        const errorsBody = document.getElementById('importErrorsBody');
+        result.errors.forEach(error => {
+            const row = errorsBody.insertRow();
+            row.insertCell().textContent = `Línea ${error.line}`;
+            row.insertCell().textContent = error.error;
+        });
+        if (result.inserted || result.updated) loadCatalogItems();
+    } finally {
+        button.disabled = false;
+    }
+}
+async function loadCatalogItems() {
+    const response = await fetch('/api/catalog');
+    allCatalogItems = await response.json();
+    renderItemTabsContent();
+}
+function renderItemTabs() {
+    const tabsContainer = document.getElementById('catalogTypeTabs');
+    const tabsContentContainer = document.getElementById('catalogTypeTabsContent');
+    tabsContainer.innerHTML = '';
+    tabsContentContainer.innerHTML = '';
+    allCatalogTypes.forEach((type, index) => {
+        const typeIdSanitized = `type-tab-content-${type.id}`;
+        const isActive = index === 0 ? 'active' : '';
+        tabsContainer.innerHTML += `
+            <li class="nav-item" role="presentation">
+                <button class="nav-link ${isActive}" id="type-tab-${type.id}" data-bs-toggle="tab" data-bs-target="#${typeIdSanitized}" type="button">
+                    ${type.name}
+                </button>
+            </li>
+        `;
+        tabsContentContainer.innerHTML += `
+            <div class="tab-pane fade show ${isActive}" id="${typeIdSanitized}" role="tabpanel">
+                <div class="row g-4 mt-2">
+                    <div class="col-md-4">
+                        <h3>Añadir ${type.name}</h3>
+                        <div class="card">
+                            <div class="card-body">
+                                <form id="createItemForm-${type.id}" data-type-id="${type.id}">
+                                    <div class="mb-3">
+                                        <label for="code-${type.id}" class="form-label">Código</label>
+                                        <input type="text" class="form-control" id="code-${type.id}" required>
+                                    </div>
+                                    <div class="mb-3">
+                                        <label for="description-${type.id}" class="form-label">Descripción</label>
+                                        <input type="text" class="form-control" id="description-${type.id}" required>
+                                    </div>
+                                    <div class="mb-3">
+                                        <label for="price-${type.id}" class="form-label">Precio Unitario (Bs.)</label>
+                                        <input type="number" step="0.01" class="form-control" id="price-${type.id}" required>
+                                    </div>
+                                    <div class="d-grid">
+                                        <button type="submit" class="btn btn-primary">Añadir</button>
+                                    </div>
+                                </form>
+                            </div>
+                        </div>
+                    </div>
+                    <div class="col-md-8">
+                        <h3>Ítems Actuales</h3>
+                        <table class="table table-hover align-middle">
+                            <thead class="table-light">
+                                <tr><th>Código</th><th>Descripción</th><th class="text-end">Precio (Bs.)</th><th>Acción</th></tr>
+                            </thead>
+                            <tbody id="itemsTableBody-${type.id}"></tbody>
+                        </table>
+                    </div>
+                </div>
+            </div>
+        `;
+    });
+    allCatalogTypes.forEach(type => {
+        document.getElementById(`createItemForm-${type.id}`).addEventListener('submit', handleCreateItem);
+    });
+    renderItemTabsContent();
+}
+function renderItemTabsContent() {
+    allCatalogTypes.forEach(type => {
+        const tableBody = document.getElementById(`itemsTableBody-${type.id}`);
+        if (tableBody) tableBody.innerHTML = '';
+    });
+    allCatalogItems.forEach(item => {
+        const tableBody = document.getElementById(`itemsTableBody-${item.type_id}`);
+        if (tableBody) {
+            tableBody.innerHTML += `
+                <tr id="item-row-${item.id}">
+                    <td>${item.code}</td>
+                    <td>${item.description}</td>
+                    <td class="text-end">${formatter.format(item.unit_price)}</td>
+                    <td>
+                        <button class="btn btn-warning btn-sm" onclick="handleEditItem(${item.id})"><i class="bi bi-pencil"></i></button>
+                        <button class="btn btn-danger btn-sm" onclick="handleDeleteItem(${item.id})"><i class="bi bi-trash"></i></button>
+                    </td>
+                </tr>
+            `;
+        }
+    });
+}
+async function handleCreateItem(event) {
+    event.preventDefault();
+    const form = event.target;
+    const typeId = form.dataset.typeId;
+    const data = {
+        type_id: parseInt(typeId),
+        code: document.getElementById(`code-${typeId}`).value,
+        description: document.getElementById(`description-${typeId}`).value,
+        unit_price: parseFloat(document.getElementById(`price-${typeId}`).value)
+    };
+    const response = await fetch('/api/catalog', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data)
+    });
+    const result = await response.json();
+    if (response.ok) {
+        alert(result.message);
+        form.reset();
+        loadCatalogItems();
+    } else {
+        alert(`Error: ${result.error}`);
+    }
+}
+async function handleEditItem(itemId) {
+    const response = await fetch(`/api/catalog/${itemId}`);
+    if (!response.ok) { alert('Error al cargar datos del ítem.'); return; }
+    const item = await response.json();
+    document.getElementById('edit_item_id').value = item.id;
+    document.getElementById('edit_item_type').value = item.type_id;
+    document.getElementById('edit_code').value = item.code;
+    document.getElementById('edit_description').value = item.description;
+    document.getElementById('edit_unit_price').value = item.unit_price;
+    editItemModal.show();
+}
+async function handleUpdateItem() {
+    const itemId = document.getElementById('edit_item_id').value;
+    const data = {
+        type_id: parseInt(document.getElementById('edit_item_type').value),
+        code: document.getElementById('edit_code').value,
+        description: document.getElementById('edit_description').value,
+        unit_price: parseFloat(document.getElementById('edit_unit_price').value)
+    };
+    const response = await fetch(`/api/catalog/${itemId}`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data)
+    });
+    const result = await response.json();
+    if (response.ok) {
+        alert(result.message);
+        editItemModal.hide();
+        loadCatalogItems();
+    } else {
+        alert(`Error: ${result.error}`);
+    }
+}
+async function handleDeleteItem(itemId) {
+    if (!confirm('¿Seguro que quieres eliminar este ítem?')) return;
+    const response = await fetch(`/api/catalog/${itemId}`, { method: 'DELETE' });
+    const result = await response.json();
+    if (response.ok) {
+        alert(result.message);
+        loadCatalogItems();
+    } else {
+        alert(`Error: ${result.error}`);
+    }
+}
@@ -0,0 +1,131 @@
+// Cargar la lista de usuarios
+async function loadUsers() {
+    const response = await fetch('/api/users');
+    if (!response.ok) { alert('No se pudieron cargar los usuarios.'); return; }
+    const users = await response.json();
+    const tableBody = document.getElementById('usersTableBody');
+    tableBody.innerHTML = '';
+
+    users.forEach(user => {
+        const roleBadge = user.role === 'Jefe de Ventas' ? 'bg-success' : 'bg-secondary';
+        const statusBadge = user.is_active ? 'bg-info' : 'bg-danger';
+        const statusText = user.is_active ? 'Activo' : 'Inactivo';
+
+        const row = `
+            <tr>
+                <td>${user.fullname}</td>
+                <td>${user.email}</td>
+                <td><span class="badge ${roleBadge}">${user.role}</span></td>
+                <td><span class="badge ${statusBadge}">${statusText}</span></td>
+                <td>
+                    <button class="btn btn-warning btn-sm" onclick="handleEditUser(${user.id})">
+                        <i class="bi bi-pencil"></i>
+                    </button>
+                </td>
+            </tr>
+        `;
+        tableBody.innerHTML += row;
+    });
+}
+
+// Manejar el formulario de creación de usuarios
+document.getElementById('createUserForm').addEventListener('submit', async function(event) {
+    event.preventDefault();
+    const data = {
+        fullname: document.getElementById('fullname').value,
+        email: document.getElementById('email').value,
+        password: document.getElementById('password').value,
+        role: document.getElementById('role').value
+    };
+    const response = await fetch('/api/users', {
+        method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(data)
+    });
+    const result = await response.json();
+    if (response.ok) {
+        alert(result.message);
+        document.getElementById('createUserForm').reset();
+        loadUsers();
+    } else { alert(`Error: ${result.error}`); }
+});
+
+// Funciones para el Límite de Aprobación (sin cambios)
+async function loadCurrentThreshold() {
+    const response = await fetch('/api/settings/approval_threshold');
+    if (response.ok) {
+        const data = await response.json();
+        document.getElementById('approvalThreshold').value = data.threshold;
+    } else { console.error("No se pudo cargar el límite actual."); }
+}
+document.getElementById('updateThresholdForm').addEventListener('submit', async function(event) {
+    event.preventDefault();
+    const newThreshold = document.getElementById('approvalThreshold').value;
+    const response = await fetch('/api/settings/approval_threshold', {
+        method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ threshold: newThreshold })
+    });
+    const result = await response.json();
+    if (response.ok) { alert(result.message); }
+    else { alert(`Error: ${result.error}`); }
+});
+
+// --- ¡NUEVAS FUNCIONES PARA EDITAR USUARIOS! ---
+
+let editUserModal = null; // Variable para guardar la instancia del modal
+
+// 1. Abrir el modal y cargar los datos del usuario
+async function handleEditUser(userId) {
+    const response = await fetch(`/api/users/${userId}`);
+    if (!response.ok) { alert('Error al cargar los datos del usuario.'); return; }
+    const user = await response.json();
+
+    document.getElementById('edit_user_id').value = user.id;
+    document.getElementById('edit_fullname').value = user.fullname;
+    document.getElementById('edit_email').value = user.email;
+    document.getElementById('edit_role').value = user.role;
+    document.getElementById('edit_is_active').value = user.is_active ? '1' : '0';
+    document.getElementById('edit_password').value = ''; // Limpiar el campo de contraseña
+
+    if (!editUserModal) {
+        editUserModal = new bootstrap.Modal(document.getElementById('editUserModal'));
+    }
+    editUserModal.show();
+}
+
+// 2. Guardar los cambios del modal
+async function handleUpdateUser() {
+    const userId = document.getElementById('edit_user_id').value;
+    const newPassword = document.getElementById('edit_password').value;
+
+    const data = {
+        fullname: document.getElementById('edit_fullname').value,
+        email: document.getElementById('edit_email').value,
+        role: document.getElementById('edit_role').value,
+        is_active: parseInt(document.getElementById('edit_is_active').value)
+    };
+
+    // Solo añadir la contraseña al JSON si el usuario escribió una
+    if (newPassword) {
+        data.password = newPassword;
+    }
+
+    const response = await fetch(`/api/users/${userId}`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data)
+    });
+
+    const result = await response.json();
+
+    if (response.ok) {
+        alert(result.message);
+        editUserModal.hide();
+        loadUsers();
+    } else {
+        alert(`Error: ${result.error}`);
+    }
+}
+
+// Cargar todo al iniciar la página
+document.addEventListener('DOMContentLoaded', () => {
+    loadUsers();
+    loadCurrentThreshold();
+});
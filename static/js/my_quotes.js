@@ -0,0 +1,150 @@
+// Datos del usuario
+const userInfo = document.getElementById('currentUserInfo');
+const userRole = userInfo.dataset.role;
+const currentUserId = parseInt(userInfo.dataset.id);
+
+// Datos de vendedores para el filtro del Jefe
+let allSellersData = [];
+
+// Cursor de la siguiente página (el servidor pagina y filtra)
+let nextCursor = null;
+
+// Función para renderizar una fila (compartida por ambas vistas)
+function renderQuoteRow(quote, tableBody) {
+    let statusBadge = '';
+    if (quote.status === 'Aprobada') {
+        statusBadge = `<span class="badge bg-success">${quote.status}</span>`;
+    } else if (quote.status === 'Rechazada') {
+        let reason = quote.rejection_reason
+            ? `<br><small class="text-danger fst-italic">Motivo: ${quote.rejection_reason}</small>`
+            : '';
+        statusBadge = `<span class="badge bg-danger">${quote.status}</span>${reason}`;
+    } else {
+        statusBadge = `<span class="badge bg-warning text-dark">${quote.status}</span>`;
+    }
+
+    // El Jefe (admin) SIEMPRE puede ver el PDF.
+    // El Vendedor solo puede verlo si está APROBADA.
+    const pdfButtonDisabled = (quote.status !== 'Aprobada' && userRole !== 'Jefe de Ventas') ? 'disabled' : '';
+
+    // Columna de Vendedor (solo para el Jefe)
+    const vendorColumn = (userRole === 'Jefe de Ventas')
+        ? `<td>${quote.vendedor_name}</td>`
+        : `<td>${new Date(quote.created_at).toLocaleDateString()}</td>`; // Vendedor ve la Fecha
+
+    const row = `
+        <tr>
+            <td><strong>${quote.quote_number}</strong></td>
+            ${vendorColumn}
+            <td>${quote.company_name}</td>
+            <td class="text-end">${formatter.format(quote.total_amount)}</td>
+            <td>${statusBadge}</td>
+            <td>
+                <a href="/api/quote/${quote.id}/pdf" target="_blank" class="btn btn-danger btn-sm ${pdfButtonDisabled}">
+                    <i class="bi bi-file-earmark-pdf"></i> PDF
+                </a>
+            </td>
+        </tr>
+    `;
+    tableBody.insertAdjacentHTML('beforeend', row);
+}
+
+// Pide una página al servidor y la agrega a la tabla.
+// reset=true vuelve a empezar desde la primera página (p. ej. al cambiar el filtro).
+async function loadQuotesPage(url, params, tableBody, moreBtn, emptyMessage, reset) {
+    if (reset) {
+        nextCursor = null;
+        tableBody.innerHTML = '';
+    }
+    if (nextCursor) params.set('cursor', nextCursor);
+    const response = await fetch(`${url}?${params.toString()}`);
+    const page = await response.json();
+    page.items.forEach(quote => renderQuoteRow(quote, tableBody));
+    nextCursor = page.next_cursor;
+    moreBtn.classList.toggle('d-none', !nextCursor);
+    if (reset && page.items.length === 0) {
+        tableBody.innerHTML = `<tr><td colspan="6" class="text-center">${emptyMessage}</td></tr>`;
+    }
+}
+
+// --- LÓGICA PARA VENDEDOR ---
+function loadMyQuotes(reset) {
+    return loadQuotesPage('/api/my-quotes', new URLSearchParams(),
+        document.getElementById('myQuotesTableBody'),
+        document.getElementById('myQuotesMoreBtn'),
+        'No tienes cotizaciones.', reset);
+}
+
+// --- LÓGICA PARA JEFE DE VENTAS ---
+
+// 1. Cargar vendedores y poblar filtro
+async function initializeManagerView() {
+    // Cargar vendedores para el filtro
+    const usersResponse = await fetch('/api/users');
+    allSellersData = await usersResponse.json();
+    const filterSelect = document.getElementById('sellerFilter');
+    allSellersData.forEach(seller => {
+        if (seller.id !== currentUserId) { // No repetir al jefe si ya está en la lista
+            filterSelect.innerHTML += `<option value="${seller.id}">${seller.fullname}</option>`;
+        }
+    });
+
+    // Al cambiar el filtro se vuelve a pedir la primera página
+    filterSelect.addEventListener('change', () => loadAllQuotes(true));
+    document.getElementById('exportPdfBtn').addEventListener('click', exportFilteredPdfs);
+    document.getElementById('allQuotesMoreBtn').addEventListener('click', () => loadAllQuotes(false));
+
+    // Renderizar la tabla inicial (con "Todas")
+    loadAllQuotes(true);
+}
+
+// 2. Cargar una página de la tabla del Jefe (el filtro se aplica en el servidor)
+function loadAllQuotes(reset) {
+    const params = new URLSearchParams();
+    const filterValue = document.getElementById('sellerFilter').value;
+    if (filterValue !== 'all') params.set('vendor_id', filterValue);
+    return loadQuotesPage('/api/all-quotes', params,
+        document.getElementById('allQuotesTableBody'),
+        document.getElementById('allQuotesMoreBtn'),
+        'No se encontraron cotizaciones con este filtro.', reset);
+}
+
+// 3. Exportar a ZIP los PDFs del filtro actual (se genera en segundo plano)
+async function exportFilteredPdfs() {
+    const button = document.getElementById('exportPdfBtn');
+    const filterValue = document.getElementById('sellerFilter').value;
+    const filter = filterValue !== 'all' ? { vendor_id: filterValue } : {};
+    button.disabled = true;
+    try {
+        const response = await fetch('/api/quotes/pdf-export', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filter })
+        });
+        let job = await response.json();
+        if (!response.ok) { alert(job.error); return; }
+        while (job.status !== 'done' && job.status !== 'failed') {
+            button.innerHTML = `<i class="bi bi-hourglass-split"></i> ${job.done || 0}/${job.total}`;
+            await new Promise(resolve => setTimeout(resolve, 1500));
+            job = await (await fetch(job.status_url || `/api/quotes/pdf-export/${job.job_id}`)).json();
+        }
+        if (job.status === 'done') {
+            window.location = job.download_url;
+        } else {
+            alert('La exportación falló.');
+        }
+    } finally {
+        button.disabled = false;
+        button.innerHTML = '<i class="bi bi-file-earmark-zip"></i> Exportar PDFs';
+    }
+}
+
+// --- Carga Inicial ---
+document.addEventListener('DOMContentLoaded', () => {
+    if (userRole === 'Jefe de Ventas') {
+        initializeManagerView();
+    } else {
+        document.getElementById('myQuotesMoreBtn').addEventListener('click', () => loadMyQuotes(false));
+        loadMyQuotes(true);
+    }
+});
@@ -0,0 +1,157 @@
+// Paleta de colores para gráficos
+const chartColors = [
+    '#4e73df', '#1cc88a', '#36b9cc', '#f6c23e', '#e74a3b',
+    '#858796', '#5a5c69', '#f8f9fc', '#17a2b8', '#fd7e14'
+];
+
+// Formateador de moneda para los tooltips
+const moneyFormatter = new Intl.NumberFormat('en-US', {
+    style: 'currency',
+    currency: 'USD', // Puedes cambiarlo a 'BOB' si prefieres Bs.
+    minimumFractionDigits: 2
+});
+
+// ¡FUNCIÓN DE GRÁFICOS MODIFICADA! (Punto 2: Interactividad)
+function createSimpleChart(ctx, type, labels, data, label, formatAsMoney = false) {
+    const chartData = {
+        labels: labels,
+        datasets: [{
+            label: label,
+            data: data,
+            borderWidth: 1
+        }]
+    };
+
+    const options = {
+        responsive: true,
+        maintainAspectRatio: false,
+        plugins: {
+            legend: {
+                position: (type === 'pie' || type === 'doughnut') ? 'top' : 'bottom',
+            },
+            // ¡MEJORA DE TOOLTIPS! (Punto 2)
+            tooltip: {
+                enabled: true,
+                intersect: false,
+                mode: (type === 'pie' || type === 'doughnut') ? 'point' : 'index',
+                callbacks: {
+                    label: function(context) {
+                        let val = context.parsed;
+                        if (type !== 'pie' && type !== 'doughnut') {
+                            val = context.parsed.y;
+                        }
+                        if (formatAsMoney) {
+                            return `${context.dataset.label}: ${moneyFormatter.format(val)}`;
+                        }
+                        return `${context.dataset.label}: ${val}`;
+                    }
+                }
+            }
+        }
+    };
+
+    if (type === 'pie' || type === 'doughnut') {
+        chartData.datasets[0].backgroundColor = chartColors;
+    } else {
+        chartData.datasets[0].backgroundColor = 'rgba(78, 115, 223, 0.1)';
+        chartData.datasets[0].borderColor = 'rgba(78, 115, 223, 1)';
+        chartData.datasets[0].fill = type === 'line';
+        options.scales = { y: { beginAtZero: (type === 'bar') } };
+    }
+
+    return new Chart(ctx, { type: type, data: chartData, options: options });
+}
+
+// ¡NUEVA FUNCIÓN DE GRÁFICO APILADO! (Punto 1)
+function createStackedBarChart(ctx, labels, datasets) {
+    // Asigna colores a cada vendedor
+    datasets.forEach((dataset, index) => {
+        dataset.backgroundColor = chartColors[index % chartColors.length];
+    });
+
+    return new Chart(ctx, {
+        type: 'bar',
+        data: {
+            labels: labels,
+            datasets: datasets
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            // ¡MEJORA DE TOOLTIPS! (Punto 2)
+            plugins: {
+                tooltip: {
+                    enabled: true,
+                    intersect: false,
+                    mode: 'index',
+                    callbacks: {
+                        label: function(context) {
+                            const val = context.parsed.y;
+                            return `${context.dataset.label}: ${moneyFormatter.format(val)}`;
+                        }
+                    }
+                }
+            },
+            scales: {
+                x: { stacked: true }, // Apilar horizontalmente
+                y: {
+                    stacked: true,  // Apilar verticalmente
+                    beginAtZero: true
+                }
+            }
+        }
+    });
+}
+
+// Gráficos actuales (se destruyen antes de redibujar con otros filtros)
+let charts = [];
+
+// Cargar los 4 gráficos con una sola petición al servidor
+async function loadReports() {
+    const params = new URLSearchParams();
+    const from = document.getElementById('filterFrom').value;
+    const to = document.getElementById('filterTo').value;
+    const vendor = document.getElementById('filterVendor').value;
+    if (from) params.set('date_from', from);
+    if (to) params.set('date_to', to);
+    if (vendor) params.set('vendor_id', vendor);
+    const response = await fetch(`/api/reports/summary?${params.toString()}`);
+    const result = await response.json();
+    if (!response.ok) { alert(result.error); return; }
+
+    charts.forEach(chart => chart.destroy());
+    charts = [
+        // Gráfico 1: Ventas Totales por Mes (Línea)
+        createSimpleChart(document.getElementById('salesByMonthChart'), 'line',
+            result.sales_by_month.labels, result.sales_by_month.data, 'Total Ventas (Bs.)', true),
+        // Gráfico 2: Ventas por Vendedor por Mes (Barras Apiladas)
+        createStackedBarChart(document.getElementById('salesByMonthByVendorChart'),
+            result.sales_by_month_by_vendor.labels, result.sales_by_month_by_vendor.datasets),
+        // Gráfico 3: Cotizaciones por Vendedor (Torta)
+        createSimpleChart(document.getElementById('quotesByVendorChart'), 'pie',
+            result.quotes_by_vendor.labels, result.quotes_by_vendor.data, 'Nro. de Cotizaciones', false),
+        // Gráfico 4: Rechazos por Vendedor (Torta)
+        createSimpleChart(document.getElementById('rejectionsChart'), 'pie',
+            result.rejections_by_vendor.labels, result.rejections_by_vendor.data, 'Nro. de Rechazos', false),
+    ];
+}
+
+// Vendedores para el filtro
+async function loadVendorFilter() {
+    const response = await fetch('/api/users');
+    const users = await response.json();
+    const select = document.getElementById('filterVendor');
+    users.forEach(user => {
+        select.innerHTML += `<option value="${user.id}">${user.fullname}</option>`;
+    });
+}
+
+// Carga inicial
+document.addEventListener('DOMContentLoaded', () => {
+    loadVendorFilter();
+    loadReports();
+    document.getElementById('reportFilters').addEventListener('submit', (event) => {
+        event.preventDefault();
+        loadReports();
+    });
+});
@@ -0,0 +1,121 @@
+# static_assets.py
+# Archivos estáticos con hash en el nombre, precomprimidos y con manifiesto.
+#
+# build() copia cada archivo de static/ (JS y CSS de las páginas, logos) a
+# static/dist/ con el hash del contenido en el nombre (js/dashboard.js ->
+# dist/js/dashboard.3f9c0a1b2c4d.js), genera las variantes .gz y .br que
+# WhiteNoise sirve solas según Accept-Encoding, y escribe manifest.json
+# (nombre original -> nombre con hash). app.py lo lee al arrancar y el helper
+# asset_url() de las plantillas devuelve la versión con hash, que se sirve con
+# caché inmutable de un año: un cambio en el archivo cambia su URL.
+#
+# Correr en cada despliegue, después de pip install y antes de arrancar:
+#     python static_assets.py [--clean]
+# Sin static/dist las plantillas usan los archivos originales (caché corta).
+# Los hashes viejos se conservan (páginas ya abiertas pueden pedirlos); --clean
+# borra los que no están en el manifiesto nuevo.
+import argparse
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:  # sin brotli solo se generan los .gz
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIRNAME = 'dist'
+MANIFEST_NAME = 'manifest.json'
+COMPRESS_EXTENSIONS = ('.js', '.css', '.svg', '.json', '.txt', '.html', '.map')
+COMPRESS_MIN_BYTES = 256
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    """{'js/dashboard.js': 'dist/js/dashboard.<hash>.js', ...}; vacío si no se generó."""
+    try:
+        with open(os.path.join(static_dir, DIST_DIRNAME, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def is_fingerprinted(path, url):
+    """immutable_file_test de WhiteNoise: todo lo que está en dist/ lleva hash."""
+    return f'/{DIST_DIRNAME}/' in url
+
+
+def _source_files(static_dir):
+    for dirpath, dirnames, filenames in os.walk(static_dir):
+        if dirpath == static_dir:
+            dirnames[:] = [d for d in dirnames if d != DIST_DIRNAME]
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for filename in sorted(filenames):
+            if filename.startswith('.') or filename.endswith(('.gz', '.br')):
+                continue
+            path = os.path.join(dirpath, filename)
+            yield os.path.relpath(path, static_dir).replace(os.sep, '/'), path
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build(static_dir=STATIC_DIR, clean=False):
+    """Genera dist/ y el manifiesto; devuelve una lista de (nombre, bytes, gz, br) para el resumen."""
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    manifest, summary, written = {}, [], set()
+    for name, path in _source_files(static_dir):
+        with open(path, 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        hashed = f"{DIST_DIRNAME}/{stem}.{hashlib.md5(data).hexdigest()[:12]}{ext}"
+        target = os.path.join(static_dir, hashed)
+        written.add(target)
+        if not os.path.exists(target):
+            _write(target, data)
+        gz_size = br_size = None
+        if ext in COMPRESS_EXTENSIONS and len(data) >= COMPRESS_MIN_BYTES:
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                _write(target + '.gz', compressed)
+                written.add(target + '.gz')
+                gz_size = len(compressed)
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    _write(target + '.br', compressed)
+                    written.add(target + '.br')
+                    br_size = len(compressed)
+        manifest[name] = hashed
+        summary.append((name, len(data), gz_size, br_size))
+    # El manifiesto va al final: si algo falló antes, el anterior sigue siendo válido.
+    _write(os.path.join(dist_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    if clean:
+        for dirpath, _, filenames in os.walk(dist_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if filename != MANIFEST_NAME and path not in written:
+                    os.remove(path)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera static/dist con hashes, .gz/.br y manifiesto')
+    parser.add_argument('--clean', action='store_true', help='Borrar de dist/ lo que no está en el manifiesto nuevo')
+    args = parser.parse_args()
+    summary = build(clean=args.clean)
+    for name, size, gz_size, br_size in summary:
+        print(f"{name:<32} {size:>8} B  gz: {gz_size or '-':>7}  br: {br_size or '-':>7}")
+    if brotli is None:
+        print("brotli no está instalado: solo se generaron variantes .gz")
+    print(f"{len(summary)} archivos -> {os.path.join(STATIC_DIR, DIST_DIRNAME, MANIFEST_NAME)}")
+
+
+if __name__ == '__main__':
+    main()